@@ -0,0 +1,26 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This subpackage contains `airspeed velocity <https://asv.readthedocs.io>`_
+benchmarks for the computationally expensive parts of BET.
+
+    * :mod:`~benchmarks.common` provides models and set constructors shared
+        by the benchmarks.
+    * :mod:`~benchmarks.bench_sample` benchmarks nearest neighbor queries,
+        volume estimation, and saving/loading of sample sets.
+    * :mod:`~benchmarks.bench_calculateP` benchmarks the calculation of
+        probabilities on Voronoi cells.
+    * :mod:`~benchmarks.bench_simpleFunP` benchmarks the construction of
+        simple function approximations of the data distribution.
+    * :mod:`~benchmarks.bench_calculateError` benchmarks cell connectivity
+        and sampling error estimates.
+    * :mod:`~benchmarks.bench_sensitivity` benchmarks gradient approximation
+        and the optimal choice of QoIs.
+    * :mod:`~benchmarks.bench_postProcess` benchmarks the calculation of
+        marginal probabilities.
+    * :mod:`~benchmarks.mpi_scaling` is a strong and weak scaling harness
+        for the sampling to probability workflow run with ``mpirun``.
+
+"""
+__all__ = ['common', 'bench_sample', 'bench_calculateP', 'bench_simpleFunP',
+        'bench_calculateError', 'bench_sensitivity', 'bench_postProcess', 'mpi_scaling']
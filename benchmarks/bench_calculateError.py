@@ -0,0 +1,34 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+Benchmarks for :mod:`bet.calculateP.calculateError`.
+"""
+
+import numpy as np
+import bet.calculateP.calculateError as calculateError
+import bet.calculateP.simpleFunP as simpleFunP
+from benchmarks import common
+
+class cell_connectivity(object):
+    """
+    Benchmarks :meth:`bet.calculateP.calculateError.cell_connectivity_exact`
+    and the sampling error estimates that are built on top of it.
+    """
+    params = ([100, 1000, 10000], [1, 2, 3])
+    param_names = ['num_samples', 'dim']
+    timeout = 600
+
+    def setup(self, num_samples, dim):
+        self.disc = common.linear_discretization(dim, 1, num_samples)
+        simpleFunP.regular_partition_uniform_distribution_rectangle_size(
+                self.disc, Q_ref=np.mean(self.disc._output_sample_set._values,
+                    0), rect_size=0.5)
+        self.disc._input_sample_set.estimate_volume_mc()
+        self.disc.set_io_ptr()
+
+    def time_cell_connectivity_exact(self, num_samples, dim):
+        calculateError.cell_connectivity_exact(self.disc)
+
+    def time_sampling_error(self, num_samples, dim):
+        s_error = calculateError.sampling_error(self.disc, exact=True)
+        s_error.calculate_for_contour_events()
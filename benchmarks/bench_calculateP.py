@@ -0,0 +1,38 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+Benchmarks for :mod:`bet.calculateP.calculateP`.
+"""
+
+import bet.calculateP.calculateP as calculateP
+import bet.calculateP.simpleFunP as simpleFunP
+from benchmarks import common
+
+class prob(object):
+    r"""
+    Benchmarks :meth:`bet.calculateP.calculateP.prob` and
+    :meth:`bet.calculateP.calculateP.prob_on_emulated_samples` for a
+    :math:`\rho_{\mathcal{D},M}` with ``M`` bins.
+    """
+    params = ([1000, 10000, 100000], [2, 4], [10, 100, 1000])
+    param_names = ['num_samples', 'dim', 'M']
+    timeout = 300
+
+    def setup(self, num_samples, dim, M):
+        self.disc = common.linear_discretization(dim, 2, num_samples)
+        self.disc._input_sample_set.estimate_volume_mc()
+        simpleFunP.uniform_partition_uniform_distribution_rectangle_scaled(
+                self.disc, Q_ref=self.disc._output_sample_set._values[0],
+                rect_scale=0.5, M=M, num_d_emulate=10*M)
+        self.disc.set_emulated_input_sample_set(common.unit_voronoi_set(dim,
+            num_samples, seed=1))
+        # compute the pointers once so that only the probability calculation
+        # is timed
+        self.disc.set_io_ptr()
+        self.disc.set_emulated_ii_ptr(globalize=False)
+
+    def time_prob(self, num_samples, dim, M):
+        calculateP.prob(self.disc)
+
+    def time_prob_on_emulated_samples(self, num_samples, dim, M):
+        calculateP.prob_on_emulated_samples(self.disc)
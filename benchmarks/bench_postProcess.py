@@ -0,0 +1,29 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+Benchmarks for :mod:`bet.postProcess`.
+"""
+
+import numpy as np
+import bet.postProcess.plotP as plotP
+from benchmarks import common
+
+class marginals(object):
+    """
+    Benchmarks :meth:`bet.postProcess.plotP.calculate_1D_marginal_probs` and
+    :meth:`bet.postProcess.plotP.calculate_2D_marginal_probs`.
+    """
+    params = ([1000, 10000, 100000], [2, 4], [10, 40])
+    param_names = ['num_samples', 'dim', 'nbins']
+    timeout = 300
+
+    def setup(self, num_samples, dim, nbins):
+        self.s_set = common.unit_voronoi_set(dim, num_samples)
+        probs = np.random.random(num_samples)
+        self.s_set.set_probabilities(probs/np.sum(probs))
+
+    def time_calculate_1D_marginal_probs(self, num_samples, dim, nbins):
+        plotP.calculate_1D_marginal_probs(self.s_set, nbins=nbins)
+
+    def time_calculate_2D_marginal_probs(self, num_samples, dim, nbins):
+        plotP.calculate_2D_marginal_probs(self.s_set, nbins=nbins)
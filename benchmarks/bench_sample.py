@@ -0,0 +1,74 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+Benchmarks for :mod:`bet.sample`.
+"""
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import bet.sample as sample
+from benchmarks import common
+
+class voronoi_query(object):
+    """
+    Benchmarks :meth:`bet.sample.voronoi_sample_set.query` including the
+    construction of the :class:`scipy.spatial.KDTree`.
+    """
+    params = ([1000, 10000, 100000], [1, 2, 4])
+    param_names = ['num_samples', 'dim']
+    timeout = 300
+
+    def setup(self, num_samples, dim):
+        self.s_set = common.unit_voronoi_set(dim, num_samples)
+        self.points = np.random.random((num_samples, dim))
+
+    def time_query(self, num_samples, dim):
+        self.s_set._kdtree = None
+        self.s_set.query(self.points)
+
+class estimate_volume(object):
+    """
+    Benchmarks the Monte Carlo volume estimates
+    :meth:`bet.sample.sample_set_base.estimate_volume` and
+    :meth:`bet.sample.sample_set_base.estimate_volume_emulated`.
+    """
+    params = ([100, 1000, 10000], [1, 2, 4], [10000, 100000])
+    param_names = ['num_samples', 'dim', 'num_emulate']
+    timeout = 300
+
+    def setup(self, num_samples, dim, num_emulate):
+        self.s_set = common.unit_voronoi_set(dim, num_samples)
+        self.emulated_set = common.unit_voronoi_set(dim, num_emulate, seed=1)
+
+    def time_estimate_volume(self, num_samples, dim, num_emulate):
+        self.s_set.estimate_volume(n_mc_points=num_emulate)
+
+    def time_estimate_volume_emulated(self, num_samples, dim, num_emulate):
+        self.s_set.estimate_volume_emulated(self.emulated_set)
+
+class save_load(object):
+    """
+    Benchmarks the round trip of :meth:`bet.sample.save_discretization` and
+    :meth:`bet.sample.load_discretization`.
+    """
+    params = ([1000, 10000, 100000], [1, 4])
+    param_names = ['num_samples', 'dim']
+    timeout = 300
+
+    def setup(self, num_samples, dim):
+        self.disc = common.linear_discretization(dim, 2, num_samples)
+        self.tempdir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.tempdir, 'bench_disc')
+
+    def teardown(self, num_samples, dim):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def time_save_load_discretization(self, num_samples, dim):
+        sample.save_discretization(self.disc, self.file_name)
+        sample.load_discretization(self.file_name)
+
+    def time_save_load_sample_set(self, num_samples, dim):
+        sample.save_sample_set(self.disc._input_sample_set, self.file_name)
+        sample.load_sample_set(self.file_name)
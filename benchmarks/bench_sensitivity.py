@@ -0,0 +1,53 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+Benchmarks for :mod:`bet.sensitivity`.
+"""
+
+import numpy as np
+import bet.sample as sample
+import bet.sensitivity.gradients as grad
+import bet.sensitivity.chooseQoIs as cQoIs
+from benchmarks import common
+
+class gradients_rbf(object):
+    r"""
+    Benchmarks :meth:`bet.sensitivity.gradients.calculate_gradients_rbf` on
+    clusters of samples in :math:`\ell^1` balls around random centers.
+    """
+    params = ([10, 100, 1000], [2, 4])
+    param_names = ['num_centers', 'dim']
+    timeout = 300
+
+    def setup(self, num_centers, dim):
+        centers = common.unit_voronoi_set(dim, num_centers)
+        input_set = grad.sample_l1_ball(centers, dim+1, 0.01*np.ones(dim))
+        output_set = sample.sample_set(2*dim)
+        output_set.set_values(common.nonlinear_model(dim,
+            2*dim)(input_set._values))
+        self.cluster_disc = sample.discretization(input_set, output_set)
+
+    def time_calculate_gradients_rbf(self, num_centers, dim):
+        grad.calculate_gradients_rbf(self.cluster_disc, num_centers)
+
+class choose_opt_qois(object):
+    """
+    Benchmarks :meth:`bet.sensitivity.chooseQoIs.chooseOptQoIs` for
+    Jacobians of ``num_qois`` QoIs at ``num_centers`` samples.
+    """
+    params = ([10, 100], [2, 3], [6, 12])
+    param_names = ['num_centers', 'dim', 'num_qois']
+    timeout = 300
+
+    def setup(self, num_centers, dim, num_qois):
+        self.input_set = common.unit_voronoi_set(dim, num_centers)
+        self.input_set.set_jacobians(np.random.uniform(-1, 1,
+            (num_centers, num_qois, dim)))
+
+    def time_chooseOptQoIs(self, num_centers, dim, num_qois):
+        cQoIs.chooseOptQoIs(self.input_set, num_qois_return=dim,
+                num_optsets_return=5)
+
+    def time_chooseOptQoIs_measure(self, num_centers, dim, num_qois):
+        cQoIs.chooseOptQoIs(self.input_set, num_qois_return=dim,
+                num_optsets_return=5, measure=True)
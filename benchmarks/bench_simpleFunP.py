@@ -0,0 +1,65 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+Benchmarks for :mod:`bet.calculateP.simpleFunP`.
+"""
+
+import numpy as np
+import bet.calculateP.simpleFunP as simpleFunP
+from benchmarks import common
+
+class simple_function(object):
+    r"""
+    Benchmarks the constructors of :math:`\rho_{\mathcal{D},M}` in
+    :mod:`bet.calculateP.simpleFunP` that emulate the data space with
+    ``num_emulate`` samples and bin them into ``M`` Voronoi cells.
+    """
+    params = ([1, 2, 4], [10, 100, 1000], [10000, 100000])
+    param_names = ['dim', 'M', 'num_emulate']
+    timeout = 300
+
+    def setup(self, dim, M, num_emulate):
+        self.disc = common.linear_discretization(dim, dim, 1000)
+        self.Q_ref = np.mean(self.disc._output_sample_set._values, 0)
+        self.std = 0.1*np.ones(dim)
+
+    def time_rectangle_size(self, dim, M, num_emulate):
+        simpleFunP.uniform_partition_uniform_distribution_rectangle_size(
+                self.disc, self.Q_ref, rect_size=0.5, M=M,
+                num_d_emulate=num_emulate)
+
+    def time_rectangle_scaled(self, dim, M, num_emulate):
+        simpleFunP.uniform_partition_uniform_distribution_rectangle_scaled(
+                self.disc, self.Q_ref, rect_scale=0.2, M=M,
+                num_d_emulate=num_emulate)
+
+    def time_rectangle_domain(self, dim, M, num_emulate):
+        rect_domain = np.column_stack((self.Q_ref-0.25, self.Q_ref+0.25))
+        simpleFunP.uniform_partition_uniform_distribution_rectangle_domain(
+                self.disc, rect_domain, M=M, num_d_emulate=num_emulate)
+
+    def time_normal_partition_normal_distribution(self, dim, M,
+            num_emulate):
+        simpleFunP.normal_partition_normal_distribution(self.disc,
+                self.Q_ref, self.std, M, num_d_emulate=num_emulate)
+
+    def time_uniform_partition_normal_distribution(self, dim, M,
+            num_emulate):
+        simpleFunP.uniform_partition_normal_distribution(self.disc,
+                self.Q_ref, self.std, M, num_d_emulate=num_emulate)
+
+class data_samples(object):
+    """
+    Benchmarks
+    :meth:`bet.calculateP.simpleFunP.uniform_partition_uniform_distribution_data_samples`.
+    """
+    params = ([1000, 10000, 100000], [1, 2, 4])
+    param_names = ['num_samples', 'dim']
+    timeout = 300
+
+    def setup(self, num_samples, dim):
+        self.disc = common.linear_discretization(dim, dim, num_samples)
+
+    def time_data_samples(self, num_samples, dim):
+        simpleFunP.uniform_partition_uniform_distribution_data_samples(
+                self.disc)
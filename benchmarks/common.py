@@ -0,0 +1,82 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module contains models and constructors for sample sets and
+discretizations that are shared by the benchmarks in :mod:`benchmarks`.
+Every constructor seeds :mod:`numpy.random` so that repeated runs of a
+benchmark time the same problem.
+"""
+
+import numpy as np
+import bet.sample as sample
+
+def linear_model(input_dim, output_dim, seed=0):
+    """
+    Creates a random linear map from ``input_dim`` to ``output_dim``.
+
+    :param int input_dim: dimension of the input space
+    :param int output_dim: dimension of the output space
+    :param int seed: seed for the random map
+
+    :rtype: callable
+    :returns: model mapping ``(num, input_dim)`` to ``(num, output_dim)``
+    """
+    Q_map = np.random.RandomState(seed).random_sample((input_dim,
+        output_dim))
+    def model(input_samples):
+        return np.dot(input_samples, Q_map)
+    return model
+
+def nonlinear_model(input_dim, output_dim, seed=0):
+    """
+    Creates a smooth nonlinear map from ``input_dim`` to ``output_dim``.
+
+    :param int input_dim: dimension of the input space
+    :param int output_dim: dimension of the output space
+    :param int seed: seed for the random map
+
+    :rtype: callable
+    :returns: model mapping ``(num, input_dim)`` to ``(num, output_dim)``
+    """
+    Q_map = np.random.RandomState(seed).random_sample((input_dim,
+        output_dim))
+    def model(input_samples):
+        return np.sin(np.pi*np.dot(input_samples, Q_map))
+    return model
+
+def unit_voronoi_set(dim, num_samples, seed=0):
+    """
+    Creates a :class:`~bet.sample.voronoi_sample_set` of ``num_samples``
+    uniform random samples of the unit hypercube.
+
+    :param int dim: dimension of the sample set
+    :param int num_samples: number of samples
+    :param int seed: seed for the random samples
+
+    :rtype: :class:`~bet.sample.voronoi_sample_set`
+    :returns: sample set with values and domain set
+    """
+    np.random.seed(seed)
+    s_set = sample.voronoi_sample_set(dim)
+    s_set.set_domain(np.repeat([[0.0, 1.0]], dim, axis=0))
+    s_set.set_values(np.random.random((num_samples, dim)))
+    return s_set
+
+def linear_discretization(input_dim, output_dim, num_samples, seed=0):
+    """
+    Creates a :class:`~bet.sample.discretization` of the unit hypercube
+    using ``num_samples`` random samples and :meth:`linear_model`.
+
+    :param int input_dim: dimension of the input space
+    :param int output_dim: dimension of the output space
+    :param int num_samples: number of samples
+    :param int seed: seed for the samples and the map
+
+    :rtype: :class:`~bet.sample.discretization`
+    :returns: discretization with input and output values set
+    """
+    input_set = unit_voronoi_set(input_dim, num_samples, seed)
+    output_set = sample.sample_set(output_dim)
+    output_set.set_values(linear_model(input_dim, output_dim,
+        seed)(input_set._values))
+    return sample.discretization(input_set, output_set)
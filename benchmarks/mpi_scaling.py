@@ -0,0 +1,281 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module is a strong and weak scaling harness for the full sampling to
+probability workflow of BET:
+
+    #. :meth:`bet.sampling.basicSampling.sampler.create_random_discretization`
+    #. :meth:`bet.calculateP.simpleFunP.uniform_partition_uniform_distribution_rectangle_scaled`
+    #. :meth:`bet.calculateP.calculateP.prob_on_emulated_samples`
+    #. :meth:`bet.postProcess.plotP.calculate_2D_marginal_probs`
+
+Each run is launched with ``mpirun`` and appends one record per stage to a
+JSON lines file. The wall time of a stage is the maximum over the processors
+and the communication time is the time spent inside calls to
+:data:`bet.Comm.comm` (including waiting for other processors). To sweep
+over a number of processors and then report the efficiencies call::
+
+    python benchmarks/mpi_scaling.py sweep --nprocs 1,2,4,8 --mode strong
+    python benchmarks/mpi_scaling.py sweep --nprocs 1,2,4,8 --mode weak
+    python benchmarks/mpi_scaling.py report
+
+A single run can also be launched directly::
+
+    mpirun -np 4 python benchmarks/mpi_scaling.py run --mode strong
+
+For strong scaling ``--num_samples`` is the total number of samples, for
+weak scaling it is the number of samples per processor. The efficiency of
+a stage on ``p`` processors is :math:`T_{p_0} p_0/(T_p p)` for strong
+scaling and :math:`T_{p_0}/T_p` for weak scaling where :math:`p_0` is the
+smallest number of processors in the results.
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+
+STAGES = ['sampling', 'simpleFunP', 'prob_on_emulated_samples',
+        'marginals']
+
+def linear_model(input_samples):
+    r"""
+    Vectorized linear map from :math:`\mathbb{R}^3` to :math:`\mathbb{R}^2`
+    (see ``examples/linearMap/myModel.py``).
+    """
+    Q_map = np.array([[0.506, 0.463], [0.253, 0.918], [0.085, 0.496]])
+    return np.dot(input_samples, Q_map)
+
+def nonlinear_model(input_samples):
+    r"""
+    Vectorized nonlinear map from :math:`\mathbb{R}^3` to
+    :math:`\mathbb{R}^2` (see ``examples/nonlinearMap/myModel.py``).
+    """
+    x = np.array([[0.5, 0.5, 0.5], [0.25, 0.25, 0.15]])
+    return np.sin(np.pi*np.dot(input_samples, x.transpose()))*\
+            np.exp(-np.sum(input_samples, 1))[:, np.newaxis]
+
+MODELS = {'linear': linear_model, 'nonlinear': nonlinear_model}
+
+class timed_comm(object):
+    """
+    Wraps a communicator and accumulates the time spent in its methods.
+    Attributes that are not callable (e.g. ``rank`` and ``size``) are passed
+    through unchanged.
+    """
+    def __init__(self, comm):
+        """
+        :param comm: communicator to wrap
+        :type comm: :class:`mpi4py.MPI.Comm`
+        """
+        self._comm = comm
+        #: time spent in communication since the last :meth:`reset`
+        self.elapsed = 0.0
+
+    def reset(self):
+        """
+        Resets the accumulated communication time.
+
+        :rtype: float
+        :returns: the communication time before the reset
+        """
+        elapsed, self.elapsed = self.elapsed, 0.0
+        return elapsed
+
+    def __getattr__(self, name):
+        attr = getattr(self._comm, name)
+        if not callable(attr):
+            return attr
+        def timed(*args, **kwargs):
+            start = time.time()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.elapsed += time.time()-start
+        return timed
+
+def install_timed_comm():
+    """
+    Replaces :data:`bet.Comm.comm` in every loaded module of :mod:`bet`
+    with a :class:`timed_comm`.
+
+    :rtype: :class:`timed_comm`
+    :returns: the installed communicator
+    """
+    import bet.Comm
+    tcomm = timed_comm(bet.Comm.comm)
+    for name, module in sys.modules.items():
+        if name.startswith('bet.') and name != 'bet.Comm' and \
+                getattr(module, 'comm', None) is bet.Comm.comm:
+            module.comm = tcomm
+    return tcomm
+
+def run(args):
+    """
+    Runs the workflow once on the processors of this ``mpirun`` and appends
+    the per stage timings to ``args.output`` on rank 0.
+    """
+    import bet.sample as sample
+    import bet.sampling.basicSampling as bsam
+    import bet.calculateP.simpleFunP as simpleFunP
+    import bet.calculateP.calculateP as calculateP
+    import bet.postProcess.plotP as plotP
+    from bet.Comm import comm
+
+    tcomm = install_timed_comm()
+    size = comm.size
+    if args.mode == 'strong':
+        num_samples = args.num_samples
+        num_emulate = args.num_emulate
+    else:
+        num_samples = args.num_samples*size
+        num_emulate = args.num_emulate*size
+    np.random.seed(args.seed+comm.rank)
+
+    timings = dict()
+    def timed_stage(name, stage):
+        comm.Barrier()
+        tcomm.reset()
+        start = time.time()
+        result = stage()
+        wall = time.time()-start
+        comm_time = tcomm.reset()
+        comm.Barrier()
+        timings[name] = (comm.allreduce(wall, op=max_op()),
+                comm.allreduce(comm_time)/float(size))
+        return result
+
+    input_samples = sample.sample_set(3)
+    input_samples.set_domain(np.repeat([[0.0, 1.0]], 3, axis=0))
+    my_sampler = bsam.sampler(MODELS[args.model])
+    disc = timed_stage('sampling', lambda:
+            my_sampler.create_random_discretization('random', input_samples,
+                num_samples=num_samples))
+    Q_ref = MODELS[args.model](0.5*np.ones((1, 3)))[0]
+    timed_stage('simpleFunP', lambda:
+            simpleFunP.uniform_partition_uniform_distribution_rectangle_scaled(
+                disc, Q_ref, rect_scale=0.25, M=args.M,
+                num_d_emulate=num_emulate))
+    emulated_samples = bsam.random_sample_set('random',
+            input_samples.get_domain(), num_emulate, globalize=False)
+    disc.set_emulated_input_sample_set(emulated_samples)
+    timed_stage('prob_on_emulated_samples', lambda:
+            calculateP.prob_on_emulated_samples(disc))
+    timed_stage('marginals', lambda:
+            plotP.calculate_2D_marginal_probs(disc._emulated_input_sample_set,
+                nbins=args.nbins))
+
+    if comm.rank == 0:
+        with open(args.output, 'a') as out:
+            for name in STAGES:
+                wall, comm_time = timings[name]
+                out.write(json.dumps({'mode': args.mode, 'model': args.model,
+                    'nprocs': size, 'num_samples': num_samples,
+                    'num_emulate': num_emulate, 'M': args.M, 'stage': name,
+                    'wall': wall, 'comm': comm_time})+'\n')
+        print_timings(args.mode, size, timings)
+
+def max_op():
+    """
+    :rtype: :class:`mpi4py.MPI.Op`
+    :returns: ``MPI.MAX`` or ``max`` if :mod:`mpi4py` is not available
+    """
+    from bet.Comm import MPI
+    return getattr(MPI, 'MAX', max)
+
+def print_timings(mode, size, timings):
+    """
+    Prints the timings of a single run.
+    """
+    print "{} scaling on {} processor(s)".format(mode, size)
+    for name in STAGES:
+        wall, comm_time = timings[name]
+        print "  {:<26s} {:10.4f} s  comm {:6.1%}".format(name, wall,
+                comm_time/wall if wall > 0 else 0.0)
+
+def report(args):
+    """
+    Reads the records in ``args.output`` and prints the strong and weak
+    scaling efficiency and the communication share of each stage. Repeated
+    runs of the same configuration are reduced to their minimum wall time.
+    """
+    best = dict()
+    with open(args.output) as records:
+        for line in records:
+            rec = json.loads(line)
+            key = (rec['mode'], rec['model'], rec['stage'], rec['nprocs'])
+            if key not in best or rec['wall'] < best[key]['wall']:
+                best[key] = rec
+    for mode in ['strong', 'weak']:
+        for model in sorted(MODELS.keys()):
+            nprocs = sorted(set(k[3] for k in best if k[0] == mode and \
+                    k[1] == model))
+            if len(nprocs) == 0:
+                continue
+            print "{} scaling, {} model".format(mode, model)
+            print "  {:<26s} {:>6s} {:>10s} {:>10s} {:>8s}".format('stage',
+                    'nprocs', 'wall [s]', 'efficiency', 'comm')
+            for stage in STAGES:
+                base = best.get((mode, model, stage, nprocs[0]))
+                for p in nprocs:
+                    rec = best.get((mode, model, stage, p))
+                    if rec is None or base is None:
+                        continue
+                    if mode == 'strong':
+                        eff = base['wall']*nprocs[0]/(rec['wall']*p)
+                    else:
+                        eff = base['wall']/rec['wall']
+                    share = rec['comm']/rec['wall'] if rec['wall'] > 0 \
+                            else 0.0
+                    print "  {:<26s} {:>6d} {:>10.4f} {:>10.1%} {:>8.1%}".format(
+                            stage, p, rec['wall'], eff, share)
+
+def sweep(args):
+    """
+    Launches :meth:`run` with ``mpirun`` for each number of processors in
+    ``args.nprocs``.
+    """
+    for p in [int(n) for n in args.nprocs.split(',')]:
+        for _ in xrange(args.repeat):
+            subprocess.check_call(args.mpirun.split()+['-np', str(p),
+                sys.executable, __file__, 'run']+run_arguments(args))
+
+def run_arguments(args):
+    """
+    :rtype: list
+    :returns: command line arguments to pass from :meth:`sweep` to
+        :meth:`run`
+    """
+    return ['--mode', args.mode, '--model', args.model, '--num_samples',
+            str(args.num_samples), '--num_emulate', str(args.num_emulate),
+            '--M', str(args.M), '--nbins', str(args.nbins), '--seed',
+            str(args.seed), '--output', args.output]
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments of the harness.
+    """
+    parser = argparse.ArgumentParser(description="MPI scaling harness for "
+            "the BET sampling to probability workflow.")
+    parser.add_argument('command', choices=['run', 'sweep', 'report'])
+    parser.add_argument('--mode', choices=['strong', 'weak'],
+            default='strong')
+    parser.add_argument('--model', choices=sorted(MODELS.keys()),
+            default='linear')
+    parser.add_argument('--num_samples', type=int, default=20000)
+    parser.add_argument('--num_emulate', type=int, default=100000)
+    parser.add_argument('--M', type=int, default=50)
+    parser.add_argument('--nbins', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--nprocs', default='1,2,4')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--mpirun', default='mpirun', help="MPI launcher "
+            "including any options, e.g. 'mpirun --oversubscribe'")
+    parser.add_argument('--output', default='mpi_scaling.json')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    {'run': run, 'sweep': sweep, 'report': report}[args.command](args)
@@ -5,7 +5,9 @@ This module provides a workaround for people without mpi4py installed
 to run BET.
 """
 
+import sys
 import collections
+import contextlib
 
 class comm_for_no_mpi4py(object):
 
@@ -97,6 +99,16 @@ class comm_for_no_mpi4py(object):
             val1 = val1[0]
         return val1
 
+    def alltoall(self, val):
+        """
+        :param list val: objects to send to each processor, ``[object]``
+        
+        :rtype: list
+        :returns: val
+        
+        """
+        return val
+
     def Allgather(self, val, val2=None):
         """
         :param object val: object to Allgather
@@ -184,3 +196,34 @@ except ImportError:
 
 size = comm.Get_size()
 rank = comm.Get_rank()
+
+@contextlib.contextmanager
+def use_comm(new_comm):
+    """
+    Runs BET on ``new_comm`` instead of ``comm`` inside a ``with`` block,
+    e.g. on the communicator of a group of processors created with
+    ``comm.Split``. The ``comm`` of this module and of every loaded BET
+    module is replaced for the duration of the block and restored
+    afterwards, so this is not thread safe.
+
+    :param new_comm: communicator to run BET on
+
+    """
+    this_module = sys.modules[__name__]
+    old_comm = this_module.comm
+
+    def replace(current, new):
+        this_module.comm = new
+        this_module.size = new.Get_size()
+        this_module.rank = new.Get_rank()
+        for name, module in sys.modules.items():
+            if (name == 'bet' or name.startswith('bet.')) and \
+                    getattr(module, 'comm', None) is current:
+                module.comm = new
+
+    replace(old_comm, new_comm)
+    try:
+        yield new_comm
+    finally:
+        # modules first imported in the block have imported ``new_comm``
+        replace(new_comm, old_comm)
@@ -5,8 +5,12 @@ This module provides methods for calulating error estimates of
 the probability measure for calculate probability measures. See
 `Butler et al. 2015. <http://arxiv.org/pdf/1407.3851>`.
 
+* :class:`~bet.calculateErrors.cell_connectivity` stores the contour
+    events of the neighbors of each cell in CSR format.
 * :meth:`~bet.calculateErrors.cell_connectivity_exact` calculates 
     the connectivity of cells.
+* :meth:`~bet.calculateErrors.cell_connectivity_knn` approximates the
+    connectivity of cells with nearest neighbors in high dimensions.
 * :meth:`~bet.calculateErrors.boundary_sets` calculates which cells are 
     on the boundary and strictly interior for contour events.
 * :class:`~bet.calculateErrors.sampling_error` is for calculating error
@@ -27,22 +31,117 @@ class wrong_argument_type(Exception):
     types.
     """
 
+class cell_connectivity(object):
+    """
+    The contour events of the neighbors of each cell in compressed sparse row
+    (CSR) format: the contour events of the neighbors of cell ``i`` are
+    ``indices[indptr[i]:indptr[i+1]]``, sorted and without duplicates.
+    Indexing with ``i`` returns this slice, so the connectivity can be used
+    like a list of lists of neighboring contour events.
+
+    """
+    def __init__(self, indptr, indices, num_events):
+        """
+        Initialization
+
+        :param indptr: start of the contour events of each cell in
+            ``indices``
+        :type indptr: :class:`numpy.ndarray` of ints of shape (num+1,)
+        :param indices: contour events of the neighbors of all cells
+        :type indices: :class:`numpy.ndarray` of ints
+        :param int num_events: number of contour events
+
+        """
+        #: :class:`numpy.ndarray` of shape (num+1,), start of the contour
+        #: events of each cell in ``indices``
+        self.indptr = indptr
+        #: :class:`numpy.ndarray`, contour events of the neighbors of all
+        #: cells
+        self.indices = indices
+        #: int, number of contour events
+        self.num_events = num_events
+
+    @classmethod
+    def from_pairs(cls, cells, events, num, num_events):
+        """
+        Creates the connectivity from pairs of cells and contour events of
+        their neighbors, duplicate pairs are removed.
+
+        :param cells: cells
+        :type cells: :class:`numpy.ndarray` of ints
+        :param events: contour event of a neighbor of each cell in ``cells``
+        :type events: :class:`numpy.ndarray` of ints
+        :param int num: number of cells
+        :param int num_events: number of contour events
+
+        :rtype: :class:`~bet.calculateP.calculateError.cell_connectivity`
+        :returns: connectivity
+
+        """
+        keys = np.unique(np.asarray(cells, dtype=np.int64)*num_events + \
+                np.asarray(events, dtype=np.int64))
+        (cells, events) = np.divmod(keys, num_events)
+        indptr = np.zeros((num+1,), dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=num), out=indptr[1:])
+        return cls(indptr, events, num_events)
+
+    def __len__(self):
+        """
+        :rtype: int
+        :returns: number of cells
+        """
+        return self.indptr.shape[0] - 1
+
+    def __getitem__(self, i):
+        """
+        :param int i: cell
+
+        :rtype: :class:`numpy.ndarray` of ints
+        :returns: contour events of the neighbors of cell ``i``
+        """
+        return self.indices[self.indptr[i]:self.indptr[i+1]]
+
+    def counts(self):
+        """
+        :rtype: :class:`numpy.ndarray` of ints of shape (num,)
+        :returns: number of neighboring contour events of each cell
+        """
+        return np.diff(self.indptr)
+
+    def cells(self):
+        """
+        :rtype: :class:`numpy.ndarray` of ints of shape (len(indices),)
+        :returns: the cell of each entry of ``indices``
+        """
+        return np.repeat(np.arange(len(self)), self.counts())
+
+def _num_events(disc):
+    """
+    :param disc: An object containing the discretization information.
+    :type disc: :class:`bet.sample.discretization`
+
+    :rtype: int
+    :returns: number of contour events of ``disc``
+    """
+    if disc._output_probability_set is not None:
+        return disc._output_probability_set.check_num()
+    return int(np.max(disc._io_ptr)) + 1
+
 def cell_connectivity_exact(disc):
     """
     
-    Calculates contour events of the cells and its neighbors.
+    Calculates contour events of the cells and its neighbors. Neighbors are
+    the neighbors of the Delaunay triangulation of the samples (adjacent
+    samples in 1D).
 
     :param disc: An object containing the discretization information.
     :type disc: :class:`bet.sample.discretization`
 
-    :rtype: list
-    :returns: list of lists of neighboring cells
+    :rtype: :class:`~bet.calculateP.calculateError.cell_connectivity`
+    :returns: contour events of neighboring cells
 
     """
     from scipy.spatial import Delaunay
-    from collections import defaultdict
-    import itertools
-    import numpy.linalg as nlinalg
 
     # Check inputs
     if not isinstance(disc, samp.discretization):
@@ -64,31 +163,115 @@ def cell_connectivity_exact(disc):
         disc.set_io_ptr()
         
     if disc._input_sample_set._dim == 1:
-        # Adding contours on the left
+        # Neighbors are adjacent in sorted order
         s_sort = disc._input_sample_set._values.flat[:].argsort()
-        neiList = defaultdict(set)
-        for p in range(num): 
-            order = s_sort[p]
-            if order > 0:
-                val = np.equal(s_sort, order - 1)
-                args = np.argwhere(val)                
-                neiList[p].add(disc._io_ptr[args[0][0]])
-                neiList[args[0][0]].add(disc._io_ptr[p])
+        cells = np.concatenate((s_sort[1:], s_sort[:-1]))
+        neighbors = np.concatenate((s_sort[:-1], s_sort[1:]))
     else:
         # Form Delaunay triangulation
         tri = Delaunay(disc._input_sample_set._values)
+        (indptr, neighbors) = tri.vertex_neighbor_vertices
+        cells = np.repeat(np.arange(num), np.diff(indptr))
+
+    return cell_connectivity.from_pairs(cells, disc._io_ptr[neighbors], num,
+            _num_events(disc))
 
-        # Find neighbors
-        neiList = defaultdict(set)
-        for p in tri.vertices:
-            for i, j in itertools.combinations(p, 2):
-                neiList[i].add(disc._io_ptr[j])
-                neiList[j].add(disc._io_ptr[i])
-    # Get rid of redundant entries
-    for i in range(num):
-        neiList[i] = list(set(neiList[i]))
+def cell_connectivity_knn(disc, k=None, gabriel=False, chunk_size=1000):
+    """
 
-    return neiList
+    Approximates the contour events of the cells and its neighbors with the
+    graph of the ``k`` nearest neighbors of the samples, made symmetric. With
+    ``gabriel`` an edge between two samples is removed if one of the ``k``
+    nearest neighbors of either sample lies in the ball with the edge as
+    diameter (empty-ball test of the Gabriel graph, a subgraph of the
+    Delaunay triangulation). Unlike :meth:`cell_connectivity_exact` this is
+    feasible in high dimensions.
+
+    :param disc: An object containing the discretization information.
+    :type disc: :class:`bet.sample.discretization`
+    :param int k: number of nearest neighbors of each sample, defaults to
+        ``2*dim``
+    :param bool gabriel: Whether or not to prune edges with the empty-ball
+        test
+    :param int chunk_size: number of samples tested at once with ``gabriel``
+
+    :rtype: :class:`~bet.calculateP.calculateError.cell_connectivity`
+    :returns: contour events of neighboring cells
+
+    """
+    from scipy.spatial import cKDTree
+
+    # Check inputs
+    if not isinstance(disc, samp.discretization):
+        msg = "The argument must be of type bet.sample.discretization."
+        raise wrong_argument_type(msg)
+
+    if not isinstance(disc._input_sample_set, samp.voronoi_sample_set):
+        msg = "disc._input_sample_set must be of type bet.sample.voronoi"
+        msg += "_sample_set defined with the 2-norm"
+        raise wrong_argument_type(msg)
+    elif disc._input_sample_set._p_norm != 2.0:
+        msg = "disc._input_sample_set must be of type bet.sample.voronoi"
+        msg += "_sample_set defined with the 2-norm"
+        raise wrong_argument_type(msg)
+
+    num = disc.check_nums()
+    # Set up necessary pointers
+    if disc.get_io_ptr() is None:
+        disc.set_io_ptr()
+
+    values = disc._input_sample_set._values
+    if k is None:
+        k = 2*disc._input_sample_set._dim
+    k = min(k, num-1)
+    if k < 1:
+        return cell_connectivity.from_pairs([], [], num, _num_events(disc))
+
+    # the sample itself is one of its k+1 nearest neighbors
+    (dist, ptr) = cKDTree(values).query(values, k+1)
+    cells = np.repeat(np.arange(num), k+1)
+    neighbors = ptr.ravel()
+    edges = neighbors != cells
+    if gabriel:
+        # edge (i, j) is pruned if a neighbor m of i has
+        # d(i, m)^2 + d(j, m)^2 < d(i, j)^2
+        pruned = np.zeros(ptr.shape, dtype=np.bool)
+        for first in xrange(0, num, chunk_size):
+            p = ptr[first:first+chunk_size]
+            d2 = dist[first:first+chunk_size]**2
+            nei_values = values[p]
+            # squared distances between the neighbors of each sample
+            norms = np.sum(nei_values**2, axis=2)
+            nei_d2 = norms[:, :, np.newaxis] + norms[:, np.newaxis, :] - \
+                    2.0*np.einsum('ijl,ikl->ijk', nei_values, nei_values)
+            pruned[first:first+chunk_size] = np.any(d2[:, np.newaxis, :] + \
+                    nei_d2 < d2[:, :, np.newaxis]*(1.0-1e-12), axis=2)
+        pruned = pruned.ravel()
+        # an edge is pruned if the test fails from either side
+        keys = np.minimum(cells, neighbors)*num + np.maximum(cells, neighbors)
+        edges = np.logical_and(edges, np.logical_not(np.in1d(keys,
+            keys[np.logical_and(edges, pruned)])))
+    cells = cells[edges]
+    neighbors = neighbors[edges]
+
+    return cell_connectivity.from_pairs(np.concatenate((cells, neighbors)),
+            disc._io_ptr[np.concatenate((neighbors, cells))], num,
+            _num_events(disc))
+
+def _indicator(rows, cols, shape):
+    """
+    :param rows: row of each nonzero entry
+    :type rows: :class:`numpy.ndarray` of ints
+    :param cols: column of each nonzero entry
+    :type cols: :class:`numpy.ndarray` of ints
+    :param tuple shape: shape of the matrix
+
+    :rtype: :class:`scipy.sparse.csr_matrix`
+    :returns: sparse matrix with ones at ``(rows, cols)``
+    """
+    import scipy.sparse as sparse
+    return sparse.csr_matrix((np.ones((len(rows),)), (rows, cols)),
+            shape=shape)
 
 def boundary_sets(disc, nei_list):
     """
@@ -97,19 +280,20 @@ def boundary_sets(disc, nei_list):
 
     :param disc: An object containing the discretization information.
     :type disc: :class:`bet.sample.discretization`
-    :param nei_list: list of lists defining contour events of neighboring cells.
-    :type nei_list: list
+    :param nei_list: contour events of neighboring cells
+    :type nei_list: :class:`~bet.calculateP.calculateError.cell_connectivity`
+        or list of lists
 
     :rtype: tuple
     :returns: (:math:`B_N, C_N`) where B_N are the cells strictly on the 
         interior of a contour event and C_N are the cells on the boundary 
         of a contour eventas defined in 
-        `Butler et al. 2015. <http://arxiv.org/pdf/1407.3851>`
+        `Butler et al. 2015. <http://arxiv.org/pdf/1407.3851>` as
+        :class:`scipy.sparse.csr_matrix` of shape (num_events, num) with
+        ones for the cells of each contour event
     
 
     """
-    from collections import defaultdict
-
     # Check inputs
     if not isinstance(disc, samp.discretization):
         msg = "The argument must be of type bet.sample.discretization."
@@ -130,15 +314,20 @@ def boundary_sets(disc, nei_list):
     # Form necessary pointers
     if disc.get_io_ptr() is None:
         disc.set_io_ptr()
-    # Define strictly interior and boundary cells for each contour event
-    B_N = defaultdict(list)
-    C_N = defaultdict(list)
-    for i in range(num):
-        contour_event = disc._io_ptr[i]
-        if nei_list[i] == [contour_event]:
-            B_N[contour_event].append(i)
-        for j in nei_list[i]:
-            C_N[j].append(i)
+    if not isinstance(nei_list, cell_connectivity):
+        cells = np.concatenate([[i]*len(nei_list[i]) for i in xrange(num)])
+        events = np.concatenate([list(nei_list[i]) for i in xrange(num)])
+        nei_list = cell_connectivity.from_pairs(cells, events, num,
+                max(_num_events(disc), int(np.max(events))+1))
+    shape = (nei_list.num_events, num)
+    # Define strictly interior cells for each contour event, the cells whose
+    # only neighboring contour event is their own
+    interior = np.nonzero(nei_list.counts() == 1)[0]
+    interior = interior[nei_list.indices[nei_list.indptr[interior]] == \
+            disc._io_ptr[interior]]
+    B_N = _indicator(disc._io_ptr[interior], interior, shape)
+    # Define boundary cells, the cells next to each contour event
+    C_N = _indicator(nei_list.indices, nei_list.cells(), shape)
     
     return (B_N, C_N)
 
@@ -146,16 +335,22 @@ class sampling_error(object):
     """
     A class for calculating the error due to sampling for a discretization.
     """
-    def __init__(self, disc, exact=True):
+    def __init__(self, disc, exact=True, k=None, gabriel=False):
         """
-          
+
         Set things up for a given discretization
-          
+
         :param disc: An object containing the discretization information.
         :type disc: :class:`bet.sample.discretization`
-        :param exact: Whether or not to use exact connectivity
+        :param exact: Whether or not to use exact connectivity, otherwise the
+            connectivity is approximated with
+            :meth:`~bet.calculateP.calculateError.cell_connectivity_knn`
         :type exact: bool
-        
+        :param int k: number of nearest neighbors for approximate
+            connectivity
+        :param bool gabriel: Whether or not to prune approximate connectivity
+            with the empty-ball test
+
         """
         # Check inputs
         if not isinstance(disc, samp.discretization):
@@ -171,9 +366,8 @@ class sampling_error(object):
         if exact:
             nei_list = cell_connectivity_exact(self.disc)
         else:
-            msg = "sampling_error only handles exact connectivity for now."
-            raise NotImplementedError(msg)
-        #: dictionaries of interior and boundary sets
+            nei_list = cell_connectivity_knn(self.disc, k, gabriel)
+        #: sparse indicator matrices of interior and boundary sets
         (self.B_N, self.C_N) = boundary_sets(self.disc, nei_list)
         
     def calculate_for_contour_events(self):
@@ -191,8 +385,6 @@ class sampling_error(object):
             of the lower bounds.
 
         """
-        up_list = []
-        low_list = []
         # Check for and possibly calculate volumes
         if self.disc._input_sample_set._volumes is None:
             if self.disc._emulated_input_sample_set is not None:
@@ -203,41 +395,35 @@ class sampling_error(object):
                 logging.warning("Making MC assumption to estimate volumes.")
                 self.disc._input_sample_set.estimate_volume_mc()
 
-        # Loop over contour events and calculate error bounds
+        # Calculate error bounds for all contour events at once
         ops_num = self.disc._output_probability_set.check_num()
-        for i in range(ops_num):
-            # contour event :math:`\mathcal{A} = A_{i,N}`
-            if self.disc._output_probability_set._probabilities[i] > 0.0:
-                lam_vol = np.zeros((self.num,))
-                indices = np.equal(self.disc._io_ptr, i)
-                lam_vol[indices] = self.disc._input_sample_set._volumes[indices]
-                if i in self.B_N:
-                    # val1 = :math:`\mu_{\Lambda}(B_{i,N})`
-                    val1 = np.sum(self.disc._input_sample_set._volumes[self.\
-                            B_N[i]])
-                    # val2 = :math:`\mu_{\Lambda}(\mathcal{A} \cap B_{i,N})`
-                    val2 = np.sum(lam_vol[self.B_N[i]])
-                    # val3 = :math:`\mu_\Lambda(C_{i,N})`
-                    val3 = np.sum(self.disc._input_sample_set._volumes[self.\
-                            C_N[i]])
-                    # val4 = :math:`\mu_{\Lambda}(\mathcal{A} \cap C_{i,N})`
-                    val4 = np.sum(lam_vol[self.C_N[i]])
-                
-                    term1 = val2/val3 - 1.0
-                    term2 = val4/val1 - 1.0
-                    up_list.append(self.disc._output_probability_set.\
-                            _probabilities[i]*max(term1, term2))
-                    low_list.append(self.disc._output_probability_set.\
-                            _probabilities[i]*min(term1, term2))
-                else:
-                    up_list.append(float('nan'))
-                    low_list.append(float('nan'))
-                
-            else:
-                up_list.append(0.0)
-                low_list.append(0.0)
-
-        return (up_list, low_list)
+        probabilities = self.disc._output_probability_set._probabilities
+        volumes = self.disc._input_sample_set._volumes
+        # contour events :math:`\mathcal{A} = A_{i,N}`
+        A_N = _indicator(self.disc._io_ptr, np.arange(self.num),
+                self.B_N.shape)
+        # val1 = :math:`\mu_{\Lambda}(B_{i,N})`
+        val1 = self.B_N.dot(volumes)[:ops_num]
+        # val2 = :math:`\mu_{\Lambda}(\mathcal{A} \cap B_{i,N})`
+        val2 = self.B_N.multiply(A_N).dot(volumes)[:ops_num]
+        # val3 = :math:`\mu_\Lambda(C_{i,N})`
+        val3 = self.C_N.dot(volumes)[:ops_num]
+        # val4 = :math:`\mu_{\Lambda}(\mathcal{A} \cap C_{i,N})`
+        val4 = self.C_N.multiply(A_N).dot(volumes)[:ops_num]
+        # contour events with strictly interior cells
+        has_B_N = self.B_N.getnnz(axis=1)[:ops_num] > 0
+        up = np.zeros((ops_num,))
+        low = np.zeros((ops_num,))
+        active = probabilities > 0.0
+        up[active] = float('nan')
+        low[active] = float('nan')
+        active = np.logical_and(active, has_B_N)
+        term1 = val2[active]/val3[active] - 1.0
+        term2 = val4[active]/val1[active] - 1.0
+        up[active] = probabilities[active]*np.maximum(term1, term2)
+        low[active] = probabilities[active]*np.minimum(term1, term2)
+
+        return (up.tolist(), low.tolist())
 
     def calculate_for_sample_set_region(self, s_set, 
                                      region, emulated_set=None):
@@ -305,58 +491,38 @@ class sampling_error(object):
         # Emulated points in the the region
         in_A = marker[disc_new._emulated_ii_ptr_local]
         
-        upper_bound = 0.0
-        lower_bound = 0.0
-        # Loop over contour intervals and add error contributions
+        # Emulated points in each cell and in the region in each cell
+        ptr = disc._emulated_ii_ptr_local
+        in_cell = np.bincount(ptr, minlength=self.num)
+        in_A_cell = np.bincount(ptr[in_A], minlength=self.num)
+        A_N = _indicator(disc._io_ptr, np.arange(self.num), self.B_N.shape)
         ops_num = self.disc._output_probability_set.check_num()
-        for i in range(ops_num):
-            # Contribution from contour event :math:`A_{i,N}`
-            if self.disc._output_probability_set._probabilities[i] > 0.0:
-                indices = np.equal(disc._io_ptr, i)
-                in_Ai = indices[disc._emulated_ii_ptr_local]
-                # sum1 :math:`\mu_{\Lambda}(A \cap A_{i,N})`
-                sum1 = np.sum(np.logical_and(in_A, in_Ai))
-                # sum2 :math:`\mu_{\Lambda}(A_{i,N})`
-                sum2 = np.sum(in_Ai)
-                sum1 = comm.allreduce(sum1, op=MPI.SUM)
-                sum2 = comm.allreduce(sum2, op=MPI.SUM)
-                if sum2 == 0.0:
-                    return (float('nan'), float('nan'))
-                E = float(sum1)/float(sum2)
-
-                in_B_N = np.zeros(in_A.shape, dtype=np.bool)
-                for j in self.B_N[i]:
-                    in_B_N = np.logical_or(np.equal(disc.\
-                            _emulated_ii_ptr_local, j), in_B_N)
-
-                in_C_N = np.zeros(in_A.shape, dtype=np.bool)
-                for j in self.C_N[i]:
-                    in_C_N = np.logical_or(np.equal(disc.\
-                            _emulated_ii_ptr_local, j), in_C_N)
-                # sum3 :math:`\mu_{\Lambda}(A \cap B_N)`
-                sum3 = np.sum(np.logical_and(in_A, in_B_N))
-                # sum4 :math:`\mu_{\Lambda}(C_N)`
-                sum4 = np.sum(in_C_N)
-                sum3 = comm.allreduce(sum3, op=MPI.SUM)
-                sum4 = comm.allreduce(sum4, op=MPI.SUM)
-                if sum4 == 0.0:
-                    return (float('nan'), float('nan'))
-                term1 = float(sum3)/float(sum4) - E
-
-                # sum5 :math:`\mu_{\Lambda}(A \cap C_N)`
-                sum5 = np.sum(np.logical_and(in_A, in_C_N))
-                # sum6 :math:`\mu_{\Lambda}(B_N)`
-                sum6 = np.sum(in_B_N)
-                sum5 = comm.allreduce(sum5, op=MPI.SUM)
-                sum6 = comm.allreduce(sum6, op=MPI.SUM)
-                if sum6 == 0.0:
-                    return (float('nan'), float('nan'))
-                term2 = float(sum5)/float(sum6) - E
-
-                upper_bound += self.disc._output_probability_set.\
-                        _probabilities[i]*max(term1, term2)
-                lower_bound += self.disc._output_probability_set.\
-                        _probabilities[i]*min(term1, term2)
+        # sum1 :math:`\mu_{\Lambda}(A \cap A_{i,N})`
+        # sum2 :math:`\mu_{\Lambda}(A_{i,N})`
+        # sum3 :math:`\mu_{\Lambda}(A \cap B_N)`
+        # sum4 :math:`\mu_{\Lambda}(C_N)`
+        # sum5 :math:`\mu_{\Lambda}(A \cap C_N)`
+        # sum6 :math:`\mu_{\Lambda}(B_N)`
+        sums_local = np.array([A_N.dot(in_A_cell), A_N.dot(in_cell),
+            self.B_N.dot(in_A_cell), self.C_N.dot(in_cell),
+            self.C_N.dot(in_A_cell), self.B_N.dot(in_cell)],
+            dtype=np.float64)[:, :ops_num]
+        sums = np.empty(sums_local.shape)
+        comm.Allreduce([sums_local, MPI.DOUBLE], [sums, MPI.DOUBLE],
+                op=MPI.SUM)
+        (sum1, sum2, sum3, sum4, sum5, sum6) = sums
+
+        # Add error contributions of contour events :math:`A_{i,N}`
+        probabilities = self.disc._output_probability_set._probabilities
+        active = probabilities > 0.0
+        if np.any(sum2[active] == 0.0) or np.any(sum4[active] == 0.0) or \
+                np.any(sum6[active] == 0.0):
+            return (float('nan'), float('nan'))
+        E = sum1[active]/sum2[active]
+        term1 = sum3[active]/sum4[active] - E
+        term2 = sum5[active]/sum6[active] - E
+        upper_bound = np.sum(probabilities[active]*np.maximum(term1, term2))
+        lower_bound = np.sum(probabilities[active]*np.minimum(term1, term2))
         return (upper_bound, lower_bound)
                                        
 
@@ -78,11 +78,32 @@ def check_inputs_no_reference(data_set):
     return (num, dim, values)
 
 
+def qmc_emulate_local(num_d_emulate, dim, sample_type, seed=None):
+    """
+    Generates the local samples of ``num_d_emulate`` scrambled quasi-Monte
+    Carlo samples of the unit hypercube used to emulate
+    :math:`\rho_{\mathcal{D}}`.
+
+    :param int num_d_emulate: Number of samples used to emulate
+    :param int dim: dimension of the data space
+    :param string sample_type: ``'sobol'`` or ``'halton'``, see
+        :mod:`~bet.sampling.quasiMonteCarlo`
+    :param int seed: seed of the scramble
+
+    :rtype: :class:`~numpy.ndarray` of shape (num_d_emulate_local, dim)
+    :returns: local samples in [0, 1)^dim
+    """
+    import bet.sampling.quasiMonteCarlo as quasiMonteCarlo
+    return quasiMonteCarlo.qmc_local(sample_type, dim, int(num_d_emulate),
+            seed=seed)
+
 def uniform_partition_uniform_distribution_rectangle_size(data_set, 
                                                           Q_ref=None,
                                                           rect_size=None, 
                                                           M=50,
-                                                          num_d_emulate=1E6):
+                                                          num_d_emulate=1E6,
+                                                          sample_type='random',
+                                                          seed=None):
     r"""
     Creates a simple function approximation of :math:`\rho_{\mathcal{D}}`
     where :math:`\rho_{\mathcal{D}}` is a uniform probability density on
@@ -116,6 +137,10 @@ def uniform_partition_uniform_distribution_rectangle_size(data_set,
     :type rect_size: double or list
     :param int num_d_emulate: Number of samples used to emulate using an MC
         assumption
+    :param string sample_type: ``'random'`` emulates with Monte Carlo
+        samples, ``'sobol'`` or ``'halton'`` with scrambled quasi-Monte Carlo
+        samples
+    :param int seed: seed of the scramble of the quasi-Monte Carlo samples
     :param data_set: Sample set that the probability measure is defined for.
     :type data_set: :class:`~bet.sample.discretization` 
         or :class:`~bet.sample.sample_set` or :class:`~numpy.ndarray`
@@ -179,10 +204,14 @@ def uniform_partition_uniform_distribution_rectangle_size(data_set,
     :math:`\rho_{\mathcal{D}}`.
     '''
     # Generate the samples from :math:`\rho_{\mathcal{D}}`
-    num_d_emulate_local = int((num_d_emulate/comm.size) + \
-                        (comm.rank < num_d_emulate%comm.size))
-    d_distr_emulate = rect_size * (np.random.random((num_d_emulate_local,
-                                                     dim)) - 0.5) + Q_ref
+    if sample_type in ['random', 'r']:
+        num_d_emulate_local = int((num_d_emulate/comm.size) + \
+                            (comm.rank < num_d_emulate%comm.size))
+        d_distr_emulate = rect_size * (np.random.random((num_d_emulate_local,
+                                                         dim)) - 0.5) + Q_ref
+    else:
+        d_distr_emulate = rect_size * (qmc_emulate_local(num_d_emulate, dim,
+            sample_type, seed) - 0.5) + Q_ref
 
     # Bin these samples using nearest neighbor searches
     (_, k) = s_set.query(d_distr_emulate)
@@ -214,7 +243,9 @@ def uniform_partition_uniform_distribution_rectangle_scaled(data_set,
                                                             Q_ref=None,
                                                             rect_scale=0.2, 
                                                             M=50,
-                                                            num_d_emulate=1E6):
+                                                            num_d_emulate=1E6,
+                                                            sample_type='random',
+                                                            seed=None):
     r"""
     Creates a simple function approximation of :math:`\rho_{\mathcal{D}}`
     where :math:`\rho_{\mathcal{D}}` is a uniform probability density on
@@ -244,7 +275,11 @@ def uniform_partition_uniform_distribution_rectangle_scaled(data_set,
         uniform distribution as ``rect_size = (data_max-data_min)*rect_scale``
     :type rect_scale: double or list
     :param int num_d_emulate: Number of samples used to emulate using an MC
-        assumption 
+        assumption
+    :param string sample_type: ``'random'`` emulates with Monte Carlo
+        samples, ``'sobol'`` or ``'halton'`` with scrambled quasi-Monte Carlo
+        samples
+    :param int seed: seed of the scramble of the quasi-Monte Carlo samples 
     :param data_set: Sample set that the probability measure is defined for.
     :type data_set: :class:`~bet.sample.discretization` or
         :class:`~bet.sample.sample_set` or :class:`~numpy.ndarray`
@@ -258,10 +293,10 @@ def uniform_partition_uniform_distribution_rectangle_scaled(data_set,
     rect_size = (np.max(values, 0) - np.min(values, 0))*rect_scale
 
     return uniform_partition_uniform_distribution_rectangle_size(data_set,
-            Q_ref, rect_size, M, num_d_emulate)
+            Q_ref, rect_size, M, num_d_emulate, sample_type, seed)
 
 def uniform_partition_uniform_distribution_rectangle_domain(data_set,
-        rect_domain, M=50, num_d_emulate=1E6):
+        rect_domain, M=50, num_d_emulate=1E6, sample_type='random', seed=None):
     r"""
     Creates a simple function approximation of :math:`\rho_{\mathcal{D}}`
     where :math:`\rho_{\mathcal{D}}` is a uniform probability density on
@@ -287,6 +322,10 @@ def uniform_partition_uniform_distribution_rectangle_domain(data_set,
     :type rect_domain: double or list
     :param int num_d_emulate: Number of samples used to emulate using an MC
         assumption
+    :param string sample_type: ``'random'`` emulates with Monte Carlo
+        samples, ``'sobol'`` or ``'halton'`` with scrambled quasi-Monte Carlo
+        samples
+    :param int seed: seed of the scramble of the quasi-Monte Carlo samples
     :param data_set: Sample set that the probability measure is defined for.
     :type data_set: :class:`~bet.sample.discretization` or
         :class:`~bet.sample.sample_set` or :class:`~numpy.ndarray`
@@ -306,7 +345,8 @@ def uniform_partition_uniform_distribution_rectangle_domain(data_set,
 
 
     return uniform_partition_uniform_distribution_rectangle_size(data_set,
-                        domain_center, domain_lengths, M, num_d_emulate)
+                        domain_center, domain_lengths, M, num_d_emulate,
+                        sample_type, seed)
 
 
 def regular_partition_uniform_distribution_rectangle_size(data_set, Q_ref=None,
@@ -502,7 +542,7 @@ def uniform_partition_uniform_distribution_data_samples(data_set):
 
 
 def normal_partition_normal_distribution(data_set, Q_ref, std, M,
-        num_d_emulate=1E6): 
+        num_d_emulate=1E6, sample_type='random', seed=None): 
     r"""
     Creates a simple function approximation of :math:`\rho_{\mathcal{D},M}`
     where :math:`\rho_{\mathcal{D},M}` is a multivariate normal probability
@@ -518,6 +558,10 @@ def normal_partition_normal_distribution(data_set, Q_ref, std, M,
         relatively small number here like 50.
     :param int num_d_emulate: Number of samples used to emulate using an MC
         assumption
+    :param string sample_type: ``'random'`` emulates with Monte Carlo
+        samples, ``'sobol'`` or ``'halton'`` with scrambled quasi-Monte Carlo
+        samples
+    :param int seed: seed of the scramble of the quasi-Monte Carlo samples
     :param Q_ref: :math:`Q(\lambda_{reference})`
     :type Q_ref: :class:`~numpy.ndarray` of size (mdim,)
     :param std: The standard deviation of each QoI
@@ -558,10 +602,16 @@ def normal_partition_normal_distribution(data_set, Q_ref, std, M,
     emulation'''
     num_d_emulate_local = int((num_d_emulate/comm.size) + \
                               (comm.rank < num_d_emulate%comm.size))
-    d_distr_emulate = np.zeros((num_d_emulate_local, len(Q_ref)))
-    for i in xrange(len(Q_ref)):
-        d_distr_emulate[:, i] = np.random.normal(Q_ref[i], std[i],
-                                                 num_d_emulate_local)
+    if sample_type in ['random', 'r']:
+        d_distr_emulate = np.zeros((num_d_emulate_local, len(Q_ref)))
+        for i in xrange(len(Q_ref)):
+            d_distr_emulate[:, i] = np.random.normal(Q_ref[i], std[i],
+                                                     num_d_emulate_local)
+    else:
+        # map the quasi-Monte Carlo samples with the inverse normal CDF
+        unit_emulate = np.clip(qmc_emulate_local(num_d_emulate, len(Q_ref),
+            sample_type, seed), 2.0**-53, 1.0-2.0**-53)
+        d_distr_emulate = stats.norm.ppf(unit_emulate)*std + Q_ref
 
         # Now bin samples of rho_D in the M bins of D to compute rho_{D, M}
     if len(d_distr_samples.shape) == 1:
@@ -598,7 +648,7 @@ def normal_partition_normal_distribution(data_set, Q_ref, std, M,
 
 
 def uniform_partition_normal_distribution(data_set, Q_ref, std, M,
-        num_d_emulate=1E6): 
+        num_d_emulate=1E6, sample_type='random', seed=None): 
     r"""
     Creates a simple function approximation of :math:`\rho_{\mathcal{D},M}`
     where :math:`\rho_{\mathcal{D},M}` is a multivariate normal probability
@@ -615,6 +665,10 @@ def uniform_partition_normal_distribution(data_set, Q_ref, std, M,
         relatively small number here like 50.
     :param int num_d_emulate: Number of samples used to emulate using an MC
         assumption
+    :param string sample_type: ``'random'`` emulates with Monte Carlo
+        samples, ``'sobol'`` or ``'halton'`` with scrambled quasi-Monte Carlo
+        samples
+    :param int seed: seed of the scramble of the quasi-Monte Carlo samples
     :param Q_ref: :math:`Q(\lambda_{reference})`
     :type Q_ref: :class:`~numpy.ndarray` of size (mdim,)
     :param std: The standard deviation of each QoI
@@ -649,10 +703,17 @@ def uniform_partition_normal_distribution(data_set, Q_ref, std, M,
     emulation'''
     num_d_emulate_local = int((num_d_emulate/comm.size) + \
             (comm.rank < num_d_emulate%comm.size))
-    d_distr_emulate = np.zeros((num_d_emulate_local, len(Q_ref)))
-    for i in xrange(len(Q_ref)):
-        d_distr_emulate[:, i] = np.random.normal(Q_ref[i], std[i],
-                                                 num_d_emulate_local)
+    if sample_type in ['random', 'r']:
+        d_distr_emulate = np.zeros((num_d_emulate_local, len(Q_ref)))
+        for i in xrange(len(Q_ref)):
+            d_distr_emulate[:, i] = np.random.normal(Q_ref[i], std[i],
+                                                     num_d_emulate_local)
+    else:
+        import scipy.stats as stats
+        # map the quasi-Monte Carlo samples with the inverse normal CDF
+        unit_emulate = np.clip(qmc_emulate_local(num_d_emulate, len(Q_ref),
+            sample_type, seed), 2.0**-53, 1.0-2.0**-53)
+        d_distr_emulate = stats.norm.ppf(unit_emulate)*std + Q_ref
 
         # Now bin samples of rho_D in the M bins of D to compute rho_{D, M}
     if len(d_distr_samples.shape) == 1:
@@ -9,25 +9,34 @@ two-dimensional slices/projections of domains.
 import os
 from itertools import combinations
 import numpy as np
-import matplotlib.tri as tri
-import matplotlib.pyplot as plt
-# plt.rc('text', usetex=True)
-# plt.rc('font', family='serif')
-from matplotlib.lines import Line2D
-from mpl_toolkits.mplot3d import Axes3D
 import bet.util as util
 import bet.sample as sample
 
+#: default markers for :math:`Q_{ref}`, filled by :meth:`default_markers`
+#: the first time they are needed so that importing this module does not
+#: import :mod:`matplotlib`
 markers = []
-for m in Line2D.markers:
-    try:
-        if len(m) == 1 and m != ' ':
-            markers.append(m)
-    except TypeError:
-        pass
 
 colors = ('b', 'g', 'r', 'c', 'm', 'y', 'k')
 
+def default_markers():
+    """
+    Fills :data:`markers` with the single character markers of
+    :class:`matplotlib.lines.Line2D` if it is empty.
+
+    :rtype: list
+    :returns: :data:`markers`
+    """
+    if len(markers) == 0:
+        from matplotlib.lines import Line2D
+        for m in Line2D.markers:
+            try:
+                if len(m) == 1 and m != ' ':
+                    markers.append(m)
+            except TypeError:
+                pass
+    return markers
+
 
 class dim_not_matching(Exception):
     """
@@ -72,6 +81,7 @@ def scatter_2D(sample_obj, sample_nos=None, color=None, ref_sample=None,
     :param string file_extension: file extension
 
     """
+    import matplotlib.pyplot as plt
     if not isinstance(sample_obj, sample.sample_set_base):
         raise bad_object("Improper sample object")
     # check dimension of data to plot
@@ -276,6 +286,8 @@ def scatter_3D(sample_obj, sample_nos=None, color=None, ref_sample=None,
     :param string file_extension: file extension
 
     """
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D
     if not isinstance(sample_obj, sample.sample_set_base):
         raise bad_object("Improper sample object")
     # check dimension of data to plot
@@ -586,12 +598,13 @@ def show_data_domain_multi(sample_disc, Q_ref=None, Q_nums=None,
     :param string file_extension: file extension
 
     """
+    import matplotlib.tri as tri
     if not isinstance(sample_disc, sample.discretization):
         raise bad_object("Improper sample object")
 
     # Set the default marker and colors
     if ref_markers is None:
-        ref_markers = markers
+        ref_markers = default_markers()
     if ref_colors is None:
         ref_colors = colors
 
@@ -710,6 +723,8 @@ def show_data_domain_2D(sample_disc, Q_ref=None, ref_markers=None,
     :param string file_extension: file extension
 
     """
+    import matplotlib.tri as tri
+    import matplotlib.pyplot as plt
     if not isinstance(sample_disc, sample.discretization):
         raise bad_object("Improper sample object")
 
@@ -721,7 +736,7 @@ def show_data_domain_2D(sample_disc, Q_ref=None, ref_markers=None,
 
     # Set the default marker and colors
     if ref_markers is None:
-        ref_markers = markers
+        ref_markers = default_markers()
     if ref_colors is None:
         ref_colors = colors
     # If no specific coordinate numbers are given for the data coordinates
@@ -6,10 +6,6 @@ This module provides methods for plotting probabilities.
 
 import copy, math
 import numpy as np
-import matplotlib
-import matplotlib.pyplot as plt
-#plt.rc('text', usetex=True)
-#plt.rc('font', family='serif')
 from bet.Comm import comm, MPI 
 import bet.sample as sample
 
@@ -191,6 +187,7 @@ def plot_1D_marginal_probs(marginals, bins, sample_set,
     :param string file_extension: file extenstion
 
     """
+    import matplotlib.pyplot as plt
     if isinstance(sample_set, sample.discretization):
         sample_obj = sample_set._input_sample_set
     elif isinstance(sample_set, sample.sample_set_base):
@@ -264,6 +261,7 @@ def plot_2D_marginal_probs(marginals, bins, sample_set,
     :param string file_extension: file extenstion
 
     """
+    import matplotlib.pyplot as plt
     if isinstance(sample_set, sample.discretization):
         sample_obj = sample_set._input_sample_set
     elif isinstance(sample_set, sample.sample_set_base):
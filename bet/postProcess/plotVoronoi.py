@@ -6,10 +6,6 @@ This module provides methods for Voronoi plots.
 
 import copy, math
 import numpy as np
-import matplotlib
-import matplotlib.pyplot as plt
-#plt.rc('text', usetex=True)
-#plt.rc('font', family='serif')
 from bet.Comm import comm, MPI 
 import bet.sample as sample
 
@@ -58,6 +54,7 @@ def plot_1D_voronoi(sample_set, density=True, filename="file",
     :param string file_extension: file extenstion
 
     """
+    import matplotlib.pyplot as plt
 
     # Check inputs
     if isinstance(sample_set, sample.discretization):
@@ -146,6 +143,8 @@ def plot_2D_voronoi(sample_set, density=True, colormap_type='BuGn',
     :param string file_extension: file extenstion
 
     """
+    import matplotlib
+    import matplotlib.pyplot as plt
 
     from scipy.spatial import Voronoi, voronoi_plot_2d
 
@@ -3,22 +3,46 @@
 """
 This module contains data structure/storage classes for BET. Notably:
     :class:`bet.sample.sample_set`
+    :class:`bet.sample.regular_grid_sample_set`
     :class:`bet.sample.discretization`
     :class:`bet.sample.length_not_matching`
     :class:`bet.sample.dim_not_matching`
 """
 
-import os, logging, glob, warnings
+import os, re, logging, glob
 import numpy as np
 import math as math
 import numpy.linalg as linalg
-import scipy.spatial as spatial
-import scipy.io as sio
-import scipy.stats
 import bet
 from bet.Comm import comm, MPI
 import bet.util as util
-import bet.sampling.LpGeneralizedSamples as lp
+
+def mc_points_local(domain, n_mc_points, sample_type='random', seed=None):
+    """
+    Generates the local points of ``n_mc_points`` uniformly distributed
+    points in ``domain`` for Monte Carlo integration.
+
+    :param domain: domain of the points
+    :type domain: :class:`numpy.ndarray` of shape (dim, 2)
+    :param int n_mc_points: total number of points
+    :param string sample_type: ``'random'`` for Monte Carlo points,
+        ``'sobol'`` or ``'halton'`` for scrambled quasi-Monte Carlo points,
+        see :mod:`~bet.sampling.quasiMonteCarlo`
+    :param int seed: seed of the scramble of the quasi-Monte Carlo points
+
+    :rtype: :class:`numpy.ndarray` of shape (n_mc_points_local, dim)
+    :returns: local points
+    """
+    width = domain[:, 1] - domain[:, 0]
+    if sample_type in ['random', 'r']:
+        n_mc_points_local = (n_mc_points/comm.size) + \
+                (comm.rank < n_mc_points%comm.size)
+        unit_points = np.random.random((n_mc_points_local, domain.shape[0]))
+    else:
+        import bet.sampling.quasiMonteCarlo as quasiMonteCarlo
+        unit_points = quasiMonteCarlo.qmc_local(sample_type, domain.shape[0],
+                n_mc_points, seed=seed)
+    return width*unit_points + domain[:, 0]
 
 class length_not_matching(Exception):
     """
@@ -63,6 +87,7 @@ def save_sample_set(save_set, file_name, sample_set_name=None, globalize=False):
     :returns: local file name
 
     """
+    import scipy.io as sio
     # create processor specific file name
     if comm.size > 1 and not globalize:
         local_file_name = os.path.join(os.path.dirname(file_name),
@@ -125,12 +150,12 @@ def load_sample_set(file_name, sample_set_name=None, localize=True):
     :returns: the ``sample_set`` that matches the ``sample_set_name``
     
     """
+    import scipy.io as sio
     # check to see if parallel file name
-    if file_name.startswith('proc_'):
+    if re.match(r"proc\d+_", os.path.basename(file_name)):
         localize = False
-    elif not os.path.exists(file_name) and os.path.exists(os.path.join(\
-            os.path.dirname(file_name), "proc{}_0".format(\
-                os.path.basename(file_name)))):
+    elif not os.path.exists(file_name) and not os.path.exists(file_name+\
+            '.mat') and len(parallel_file_names(file_name)) > 0:
         return load_sample_set_parallel(file_name, sample_set_name)
 
     mdat = sio.loadmat(file_name)
@@ -160,6 +185,71 @@ def load_sample_set(file_name, sample_set_name=None, localize=True):
     
     return loaded_set
 
+def parallel_file_names(file_name):
+    """
+    Finds the ``proc{rank}_`` files that were saved in parallel for
+    ``file_name``.
+
+    :param string file_name: Name of the ``.mat`` file, no extension is
+        needed.
+
+    :rtype: list
+    :returns: names of the files ordered by the rank that saved them
+    """
+    save_dir = os.path.dirname(file_name)
+    base_name = os.path.basename(file_name)
+    suffixes = [base_name]
+    if not base_name.endswith('.mat'):
+        suffixes.append(base_name+'.mat')
+    mdat_files = dict()
+    for mdat_file in glob.glob(os.path.join(save_dir, "proc*_*")):
+        match = re.match(r"proc(\d+)_(.*)$", os.path.basename(mdat_file))
+        if match is not None and match.group(2) in suffixes:
+            mdat_files[int(match.group(1))] = mdat_file
+    return [mdat_files[rank] for rank in sorted(mdat_files.iterkeys())]
+
+def load_distributed_arrays(mdat_files, names, vector_names=()):
+    """
+    Loads arrays that were saved in parallel to ``mdat_files``. The global
+    array is the concatenation of the arrays of all files in order. Each
+    processor reads only a contiguous block of the files and the rows are
+    sent to the processors that own them with typed buffers (see
+    :meth:`bet.util.redistribute`), so no processor holds the global arrays.
+
+    :param list mdat_files: names of the files ordered by rank, see
+        :meth:`parallel_file_names`
+    :param list names: names of the arrays
+    :param list vector_names: names of the arrays that are vectors
+
+    :rtype: dict
+    :returns: the local rows of each array in the :meth:`np.array_split`
+        layout of the global array, arrays missing from the files are
+        omitted
+    """
+    import scipy.io as sio
+    blocks = dict([(name, []) for name in names])
+    for mdat_file in np.array_split(mdat_files, comm.size)[comm.rank]:
+        mdat = sio.loadmat(mdat_file, variable_names=names)
+        for name in names:
+            if name in mdat:
+                if name in vector_names:
+                    blocks[name].append(np.ravel(mdat[name]))
+                else:
+                    blocks[name].append(mdat[name])
+    arrays = dict()
+    for name in names:
+        block = None
+        if len(blocks[name]) > 0:
+            block = np.concatenate(blocks[name])
+        counts = comm.allgather(0 if block is None else block.shape[0])
+        offset = int(np.sum(counts[:comm.rank]))
+        dest = util.split_owners(np.arange(offset, offset+counts[comm.rank]),
+                int(np.sum(counts)))
+        block = util.redistribute(block, dest)
+        if block is not None:
+            arrays[name] = block
+    return arrays
+
 def load_sample_set_parallel(file_name, sample_set_name=None):
     """
     Loads a :class:`~bet.sample.sample_set` from a ``.mat`` file in parallel
@@ -168,6 +258,11 @@ def load_sample_set_parallel(file_name, sample_set_name=None):
     distinguish which between different :class:`~bet.sample.sample_set`
     objects.
 
+    If the files were saved by a different number of processors each
+    processor only reads a block of the files and receives its local arrays
+    from the other processors, see :meth:`load_distributed_arrays`. The
+    global arrays are not created.
+
     :param string file_name: Name of the ``.mat`` file, no extension is
         needed.
     :param string sample_set_name: String to prepend to attribute names when
@@ -177,78 +272,67 @@ def load_sample_set_parallel(file_name, sample_set_name=None):
     :rtype: :class:`~bet.sample.sample_set`
     :returns: the ``sample_set`` that matches the ``sample_set_name``
     """
+    import scipy.io as sio
    
     if sample_set_name is None:
         sample_set_name = 'default'
     # Find and open save files
-    save_dir = os.path.dirname(file_name)
-    base_name = os.path.basename(file_name)
-    mdat_files = glob.glob(os.path.join(save_dir,
-            "proc*_{}".format(base_name)))
+    mdat_files = parallel_file_names(file_name)
     
     if len(mdat_files) == comm.size:
         logging.info("Loading {} sample set using parallel files (same nproc)"\
                 .format(sample_set_name))
         # if the number of processors is the same then set mdat to
-        # be the one with the matching processor number (doesn't
-        # really matter)
-        local_file_name = os.path.join(os.path.dirname(file_name),
-                "proc{}_{}".format(comm.rank, os.path.basename(file_name)))
-        return load_sample_set(local_file_name, sample_set_name)
+        # be the one with the matching processor number
+        return load_sample_set(mdat_files[comm.rank], sample_set_name)
     else:
         logging.info("Loading {} sample set using parallel files (diff nproc)"\
             .format(sample_set_name))        
-                # Determine how many processors the previous data used
-        # otherwise gather the data from mdat and then scatter
-        # among the processors and update mdat
-        mdat_files_local = comm.scatter(mdat_files)
-        mdat_local = [sio.loadmat(m) for m in mdat_files_local]
-        mdat_list = comm.allgather(mdat_local)
-        mdat_global = []
-        # instead of a list of lists, create a list of mdat
-        for mlist in mdat_list: 
-            mdat_global.extend(mlist)
-        
-        if sample_set_name+"_dim" in mdat_global[0].keys():
-            loaded_set = eval(mdat_global[0][sample_set_name + \
-                    '_sample_set_type'][0])(
-                    np.squeeze(mdat_global[0][sample_set_name+"_dim"]))
-        else:
+        # the attributes that are not split among the processors are the same
+        # in every file
+        saved_names = [name for (name, _, _) in sio.whosmat(mdat_files[0])]
+        if sample_set_name+"_dim" not in saved_names:
             logging.info("No sample_set named {} with _dim in file".\
                     format(sample_set_name))
             return None
+        mdat = sio.loadmat(mdat_files[0], variable_names=[sample_set_name+\
+                '_sample_set_type', sample_set_name+'_dim'])
+        loaded_set = eval(mdat[sample_set_name + '_sample_set_type'][0])(
+                np.squeeze(mdat[sample_set_name+"_dim"]))
+        local_names = []
+        shared_names = []
+        for attrname in loaded_set.vector_names+loaded_set.all_ndarray_names:
+            if attrname.endswith('_local'):
+                local_names.append(attrname)
+            elif attrname not in loaded_set.array_names+local_names+\
+                    shared_names+['_dim', '_local_index']:
+                shared_names.append(attrname)
+        mdat = sio.loadmat(mdat_files[0], variable_names=[sample_set_name+\
+                attrname for attrname in shared_names])
 
         # load attributes
-        for attrname in loaded_set.vector_names:
-            if attrname is not '_dim':
-                if sample_set_name+attrname in mdat_global[0].keys():
-                    # create lists of local data
-                    if attrname.endswith('_local'): 
-                        temp_input = []
-                        for mdat in mdat_global:
-                            temp_input.append(np.squeeze(\
-                                    mdat[sample_set_name+attrname]))
-                        # turn into arrays
-                        temp_input = np.concatenate(temp_input)
-                    else:
-                        temp_input = np.squeeze(mdat_global[0]\
-                                [sample_set_name+attrname])
-                    setattr(loaded_set, attrname, temp_input) 
-        for attrname in loaded_set.all_ndarray_names:
-            if sample_set_name+attrname in mdat_global[0].keys():
-                if attrname.endswith('_local'): 
-                    # create lists of local data
-                    temp_input = []
-                    for mdat in mdat_global:
-                        temp_input.append(mdat[sample_set_name+attrname])
-                    # turn into arrays
-                    temp_input = np.concatenate(temp_input)
+        for attrname in shared_names:
+            if sample_set_name+attrname in mdat:
+                if attrname in loaded_set.vector_names:
+                    setattr(loaded_set, attrname,
+                            np.squeeze(mdat[sample_set_name+attrname]))
                 else:
-                    temp_input = mdat_global[0][sample_set_name+attrname]
-                setattr(loaded_set, attrname, temp_input)
-
-        # re-localize if necessary
-        loaded_set.local_to_global()
+                    setattr(loaded_set, attrname,
+                            mdat[sample_set_name+attrname])
+        # load local arrays
+        arrays = load_distributed_arrays(mdat_files, [sample_set_name+name \
+                for name in local_names], [sample_set_name+name for name in \
+                    local_names if name in loaded_set.vector_names])
+        for attrname in local_names:
+            if sample_set_name+attrname in arrays:
+                setattr(loaded_set, attrname,
+                        arrays[sample_set_name+attrname])
+        if loaded_set._values_local is not None:
+            num = comm.allreduce(loaded_set._values_local.shape[0],
+                    op=MPI.SUM)
+            loaded_set._local_index = np.array_split(np.arange(num),
+                    comm.size)[comm.rank]
+        return loaded_set
 
 
 class sample_set_base(object):
@@ -330,6 +414,8 @@ class sample_set_base(object):
         self._kdtree = None
         #: Values defining kd tree, :class:`numpy.ndarray` of shape (num, dim)
         self._kdtree_values = None
+        #: :class:`~bet.sampling.distributedIndex.distributed_kdtree`
+        self._distributed_kdtree = None
         #: Local values defining kd tree, :class:`numpy.ndarray` of 
         #: shape (num, dim)
         self._kdtree_values_local = None
@@ -880,6 +966,7 @@ class sample_set_base(object):
         """
         Creates a :class:`scipy.spatial.KDTree` for this set of samples.
         """
+        import scipy.spatial as spatial
         self._kdtree = spatial.KDTree(self._values)
         self._kdtree_values = self._kdtree.data
 
@@ -892,6 +979,29 @@ class sample_set_base(object):
         
         """
         return self._kdtree
+
+    def set_distributed_kdtree(self):
+        """
+        Creates a
+        :class:`~bet.sampling.distributedIndex.distributed_kdtree` of the
+        local values of this set of samples, so that no processor needs the
+        global values. This is a collective operation.
+        """
+        import bet.sampling.distributedIndex as distributedIndex
+        if self._values_local is None:
+            self.global_to_local()
+        self._distributed_kdtree = distributedIndex.distributed_kdtree(
+                self._values_local, self._domain, self._p_norm)
+
+    def get_distributed_kdtree(self):
+        """
+        Returns the distributed kd tree for this set of samples.
+
+        :rtype: :class:`~bet.sampling.distributedIndex.distributed_kdtree`
+        :returns: distributed kd tree for this set of samples
+
+        """
+        return self._distributed_kdtree
         
     def get_values_local(self):
         """
@@ -1010,19 +1120,21 @@ class sample_set_base(object):
         """
         pass
 
-    def estimate_volume(self, n_mc_points=int(1E4)):
+    def estimate_volume(self, n_mc_points=int(1E4), sample_type='random',
+            seed=None):
         """
         Calculate the volume faction of cells approximately using Monte
         Carlo integration. 
 
         :param int n_mc_points: If estimate is True, number of MC points to use
+        :param string sample_type: ``'random'``, ``'sobol'``, or ``'halton'``
+            MC points, see :meth:`mc_points_local`
+        :param int seed: seed of the scramble of ``'sobol'`` and ``'halton'``
+            points
         """
         num = self.check_num()
-        n_mc_points_local = (n_mc_points/comm.size) + \
-                            (comm.rank < n_mc_points%comm.size)
-        width = self._domain[:, 1] - self._domain[:, 0]
-        mc_points = width*np.random.random((n_mc_points_local,
-            self._domain.shape[0])) + self._domain[:, 0]
+        mc_points = mc_points_local(self._domain, n_mc_points, sample_type,
+                seed)
         (_, emulate_ptr) = self.query(mc_points)
         vol = np.zeros((num,))
         for i in xrange(num):
@@ -1095,6 +1207,43 @@ class sample_set_base(object):
                         np.array_split(current_array, comm.size)[comm.rank])
         comm.barrier()
 
+    def permute(self, order):
+        """
+        Reorders the samples so that the i-th sample is the ``order[i]``-th
+        sample before reordering and redistributes the local arrays.
+
+        :param order: permutation of the samples
+        :type order: :class:`numpy.ndarray` of ints of shape (num,)
+
+        """
+        if self._values is None:
+            self.local_to_global()
+        num = self.check_num()
+        for array_name in self.array_names:
+            current_array = getattr(self, array_name)
+            if current_array is not None and current_array.shape[0] == num:
+                setattr(self, array_name, current_array[order])
+        if self._kdtree is not None:
+            self.set_kdtree()
+        self.global_to_local()
+        if self._distributed_kdtree is not None:
+            self.set_distributed_kdtree()
+
+    def reorder(self, curve='hilbert', bits=16):
+        """
+        Only :class:`~bet.sample.voronoi_sample_set` objects can be reordered
+        along a space-filling curve, see
+        :meth:`~bet.sample.voronoi_sample_set.reorder`.
+
+        :param string curve: ``'hilbert'`` or ``'morton'``
+        :param int bits: number of bits of the curve per dimension
+
+        :raises NotImplementedError: for other types of sample sets
+        """
+        raise NotImplementedError("{} cannot be reordered along a "
+                "space-filling curve, only voronoi_sample_set objects "
+                "can".format(type(self).__name__))
+
     def copy(self):
         """
         Makes a copy using :meth:`numpy.copy`.
@@ -1169,6 +1318,7 @@ def save_discretization(save_disc, file_name, discretization_name=None,
     :returns: local file name
 
     """
+    import scipy.io as sio
     # create temporary dictionary
     new_mdat = dict()
 
@@ -1222,6 +1372,11 @@ def load_discretization_parallel(file_name, discretization_name=None):
     ``discretization_name`` is used to distinguish which between different
     :class:`~bet.sample.discretization` objects.
 
+    If the files were saved by a different number of processors the sample
+    sets and local pointers are loaded with :meth:`load_sample_set_parallel`
+    and :meth:`load_distributed_arrays`, the global pointers are not
+    created.
+
     :param string file_name: Name of the ``.mat`` file, no extension is
         needed.
     :param string discretization_name: String to prepend to attribute names when
@@ -1233,17 +1388,13 @@ def load_discretization_parallel(file_name, discretization_name=None):
     
     """
     # Find and open save files
-    save_dir = os.path.dirname(file_name)
-    base_name = os.path.basename(file_name)
-    mdat_files = glob.glob(os.path.join(save_dir,
-            "proc*_{}".format(base_name)))
+    mdat_files = parallel_file_names(file_name)
 
     if len(mdat_files) == comm.size:
         logging.info("Loading {} sample set using parallel files (same nproc)"\
                 .format(discretization_name))
         # if the number of processors is the same then set mdat to
-        # be the one with the matching processor number (doesn't
-        # really matter)
+        # be the one with the matching processor number
         return load_discretization(mdat_files[comm.rank], discretization_name)
     else:
         logging.info("Loading {} sample set using parallel files (diff nproc)"\
@@ -1252,53 +1403,32 @@ def load_discretization_parallel(file_name, discretization_name=None):
         if discretization_name is None:
             discretization_name = 'default'
 
-        input_sample_set = load_sample_set(file_name,
+        input_sample_set = load_sample_set_parallel(file_name,
                 discretization_name+'_input_sample_set')
 
-        output_sample_set = load_sample_set(file_name,
+        output_sample_set = load_sample_set_parallel(file_name,
                 discretization_name+'_output_sample_set')
 
         loaded_disc = discretization(input_sample_set, output_sample_set)
        
-        # Determine how many processors the previous data used
-        # otherwise gather the data from mdat and then scatter
-        # among the processors and update mdat
-        mdat_files_local = comm.scatter(mdat_files)
-        mdat_local = [sio.loadmat(m) for m in mdat_files_local]
-        mdat_list = comm.allgather(mdat_local)
-        mdat_global = []
-        # instead of a list of lists, create a list of mdat
-        for mlist in mdat_list: 
-            mdat_global.extend(mlist)
-        
-        # load attributes
-        for attrname in discretization.vector_names:
-            if discretization_name+attrname in mdat_global[0].keys():
-                if attrname.endswith('_local') and comm.size != \
-                        len(mdat_list): 
-                    # create lists of local data
-                    temp_input = None 
-                else:
-                    temp_input = np.squeeze(mdat_global[0][\
-                                discretization_name+attrname])
-                setattr(loaded_disc, attrname, temp_input) 
+        # load the local pointers, each is split like the sample set it
+        # belongs to
+        local_names = [attrname for attrname in discretization.vector_names \
+                if attrname.endswith('_local')]
+        arrays = load_distributed_arrays(mdat_files, [discretization_name+\
+                attrname for attrname in local_names], [discretization_name+\
+                    attrname for attrname in local_names])
+        for attrname in local_names:
+            if discretization_name+attrname in arrays:
+                setattr(loaded_disc, attrname,
+                        arrays[discretization_name+attrname])
         
         # load sample sets
         for attrname in discretization.sample_set_names:
-            if attrname is not '_input_sample_set' and \
-                    attrname is not '_output_sample_set':
-                setattr(loaded_disc, attrname, load_sample_set(file_name,
-                        discretization_name+attrname))
-        
-        # re-localize if necessary
-        if file_name.startswith('proc_') and comm.size > 1 \
-                and comm.size != len(mdat_list):
-            warn_string = "Local pointers have been removed and will be"
-            warn_string += " re-created as necessary)"
-            warnings.warn(warn_string)
-            #loaded_disc._io_ptr_local = None
-            #loaded_disc._emulated_ii_ptr_local = None
-            #loaded_disc._emulated_oo_ptr_local = None
+            if attrname != '_input_sample_set' and \
+                    attrname != '_output_sample_set':
+                setattr(loaded_disc, attrname, load_sample_set_parallel(\
+                        file_name, discretization_name+attrname))
     return loaded_disc
 
 def load_discretization(file_name, discretization_name=None):
@@ -1318,13 +1448,13 @@ def load_discretization(file_name, discretization_name=None):
     :returns: the ``discretization`` that matches the ``discretization_name``
     
     """
+    import scipy.io as sio
 
     # check to see if parallel file name
-    if file_name.startswith('proc_'):
+    if re.match(r"proc\d+_", os.path.basename(file_name)):
         pass
-    elif not os.path.exists(file_name) and os.path.exists(os.path.join(\
-            os.path.dirname(file_name), "proc{}_{}".format(comm.rank,
-                os.path.basename(file_name)))):
+    elif not os.path.exists(file_name) and not os.path.exists(file_name+\
+            '.mat') and len(parallel_file_names(file_name)) > 0:
         return load_discretization_parallel(file_name, discretization_name)
 
     mdat = sio.loadmat(file_name)
@@ -1378,6 +1508,15 @@ class voronoi_sample_set(sample_set_base):
         :rtype: tuple
         :returns: (dist, ptr)
         """
+        if self._distributed_kdtree is None and self._values is None and \
+                self._values_local is not None:
+            # only local values, query collectively
+            self.set_distributed_kdtree()
+        if self._distributed_kdtree is not None:
+            if self._distributed_kdtree.num != self.check_num():
+                self.set_distributed_kdtree()
+            return self._distributed_kdtree.query(x, k, self._p_norm)
+
         if self._kdtree is None:
             self.set_kdtree()
         else:
@@ -1426,6 +1565,7 @@ class voronoi_sample_set(sample_set_base):
         :param float side_ratio: ratio of width to reflect across boundary
         
         """
+        import scipy.spatial as spatial
         # Check inputs
         num = self.check_num()
         if self._dim != 2:
@@ -1480,7 +1620,8 @@ class voronoi_sample_set(sample_set_base):
         self._volumes[global_index] = lam_vol_global[:]
         self.global_to_local()
 
-    def estimate_radii(self, n_mc_points=int(1E4), normalize=True):
+    def estimate_radii(self, n_mc_points=int(1E4), normalize=True,
+            sample_type='random', seed=None):
         """
         Calculate the radii of cells approximately using Monte
         Carlo integration. 
@@ -1494,13 +1635,15 @@ class voronoi_sample_set(sample_set_base):
 
         :param int n_mc_points: If estimate is True, number of MC points to use
         :param bool normalize: estimate normalized radius
+        :param string sample_type: ``'random'``, ``'sobol'``, or ``'halton'``
+            MC points, see :meth:`mc_points_local`
+        :param int seed: seed of the scramble of ``'sobol'`` and ``'halton'``
+            points
 
         """
         num = self.check_num()
 
         samples = np.copy(self.get_values())
-        n_mc_points_local = (n_mc_points/comm.size) + \
-                            (comm.rank < n_mc_points%comm.size)
 
         # normalize the samples
         if normalize:
@@ -1511,9 +1654,9 @@ class voronoi_sample_set(sample_set_base):
             self._right = None
             self._width = None
 
-        width = self._domain[:, 1] - self._domain[:, 0]
-        mc_points = width*np.random.random((n_mc_points_local,
-                self._domain.shape[0])) + self._domain[:, 0]
+        mc_points = mc_points_local(self._domain, n_mc_points, sample_type,
+                seed)
+        n_mc_points_local = mc_points.shape[0]
 
         (_, emulate_ptr) = self.query(mc_points)
 
@@ -1542,7 +1685,8 @@ class voronoi_sample_set(sample_set_base):
         
         self.global_to_local()
 
-    def estimate_radii_and_volume(self, n_mc_points=int(1E4), normalize=True):
+    def estimate_radii_and_volume(self, n_mc_points=int(1E4), normalize=True,
+            sample_type='random', seed=None):
         """
         Calculate the radii and volume faction of cells approximately using
         Monte Carlo integration. 
@@ -1556,13 +1700,15 @@ class voronoi_sample_set(sample_set_base):
 
         :param int n_mc_points: If estimate is True, number of MC points to use
         :param bool normalize: estimate normalized radius
+        :param string sample_type: ``'random'``, ``'sobol'``, or ``'halton'``
+            MC points, see :meth:`mc_points_local`
+        :param int seed: seed of the scramble of ``'sobol'`` and ``'halton'``
+            points
 
         """
         num = self.check_num()
 
         samples = np.copy(self.get_values())
-        n_mc_points_local = (n_mc_points/comm.size) + \
-                            (comm.rank < n_mc_points%comm.size)
 
         # normalize the samples
         if normalize:
@@ -1570,9 +1716,9 @@ class voronoi_sample_set(sample_set_base):
             samples = samples - self._left
             samples = samples/self._width
         
-        width = self._domain[:, 1] - self._domain[:, 0]
-        mc_points = width*np.random.random((n_mc_points_local,
-                self._domain.shape[0])) + self._domain[:, 0]
+        mc_points = mc_points_local(self._domain, n_mc_points, sample_type,
+                seed)
+        n_mc_points_local = mc_points.shape[0]
 
         (_, emulate_ptr) = self.query(mc_points)
 
@@ -1641,6 +1787,9 @@ class voronoi_sample_set(sample_set_base):
         :param int max_num_emulate: Maximum number of local emulated samples
         
         """
+        import scipy.spatial as spatial
+        import scipy.special
+        import bet.sampling.LpGeneralizedSamples as lp
         self.check_num()
         # normalize the samples
         samples = np.copy(self.get_values())
@@ -1733,6 +1882,31 @@ class voronoi_sample_set(sample_set_base):
         self.set_volumes(self._volumes / domain_vol)
         self.set_volumes_local(self._volumes_local / domain_vol)
 
+    def reorder(self, curve='hilbert', bits=16):
+        """
+        Reorders the samples along a space-filling curve through
+        ``self._domain`` (see :mod:`~bet.sampling.spaceFillingCurve`) so that
+        samples close in space are close in memory and
+        :meth:`global_to_local` assigns compact regions to each processor.
+        Pointers into this sample set are not updated, use
+        :meth:`~bet.sample.discretization.reorder` to reorder a
+        discretization.
+
+        :param string curve: ``'hilbert'`` or ``'morton'``
+        :param int bits: number of bits of the curve per dimension
+
+        :rtype: :class:`numpy.ndarray` of ints of shape (num,)
+        :returns: ``order`` such that the i-th sample is the ``order[i]``-th
+            sample before reordering
+        """
+        import bet.sampling.spaceFillingCurve as spaceFillingCurve
+        if self._values is None:
+            self.local_to_global()
+        order = spaceFillingCurve.curve_order(self._values, self._domain,
+                curve, bits)
+        self.permute(order)
+        return order
+
     def merge(self, sset):
         """
         Merges a given sample set with this one by merging the values.
@@ -1777,6 +1951,321 @@ class sample_set(voronoi_sample_set):
     Set Voronoi cells as the default for now.
     """
 
+class regular_grid_sample_set(sample_set):
+    """
+    A data structure for the Voronoi tesselation generated by a regular
+    (tensor product) grid. Only the coordinates of the grid along each axis
+    are stored, the samples are ordered as the flattened ``indexing='ij'``
+    :meth:`numpy.meshgrid` of the axes. Nearest neighbors and exact cell
+    volumes (including the partial cells at the boundary of the domain) are
+    computed in closed form and ``_values`` is only created when it is
+    requested.
+
+    Setting or appending values makes this a general Voronoi sample set.
+
+    """
+    #: List of attribute names for attributes which are vectors or 1D
+    #: :class:`numpy.ndarray` or int/float
+    vector_names = sample_set.vector_names + ['_axes_values', '_axes_sizes']
+
+    def __init__(self, dim):
+        """
+
+        Initialization
+        
+        :param int dim: Dimension of the space in which these samples reside.
+
+        """
+        super(regular_grid_sample_set, self).__init__(dim)
+        #: coordinates of the grid along all axes, concatenated
+        self._axes_values = None
+        #: number of coordinates along each axis
+        self._axes_sizes = None
+
+    def setup(self, axes):
+        """
+        Initialize.
+
+        :param axes: x1, x2,..., xn, 1-D arrays representing the coordinates
+            of the grid along each axis
+        :type axes: array_like
+
+        .. seealso::
+
+            :meth:`numpy.meshgrid`
+
+        """
+        if len(axes) != self._dim:
+            raise dim_not_matching("dimension of values incorrect")
+        axes = [np.unique(np.asarray(axis, dtype=np.float64)) for axis in axes]
+        self._axes_values = np.concatenate(axes)
+        self._axes_sizes = np.array([axis.shape[0] for axis in axes])
+        self._values = None
+        self._values_local = None
+        self._kdtree = None
+        self._distributed_kdtree = None
+
+    def get_axes(self):
+        """
+        Returns the coordinates of the grid along each axis.
+
+        :rtype: list
+        :returns: a :class:`numpy.ndarray` for each axis
+
+        """
+        if self._axes_sizes is None:
+            return None
+        sizes = np.atleast_1d(self._axes_sizes).astype(np.int64)
+        return np.split(np.atleast_1d(self._axes_values),
+                np.cumsum(sizes)[:-1])
+
+    def _grid_shape(self):
+        """
+        :rtype: tuple
+        :returns: number of coordinates along each axis
+        """
+        return tuple(int(size) for size in np.atleast_1d(self._axes_sizes))
+
+    def _grid_points(self, indices):
+        """
+        Computes the samples with global ``indices``.
+
+        :param indices: global indices of samples
+        :type indices: :class:`numpy.ndarray` of ints
+
+        :rtype: :class:`numpy.ndarray` of shape (len(indices), dim)
+        :returns: samples
+        """
+        return util.grid_index_to_point(self.get_axes(), indices)
+
+    def check_num(self):
+        """
+        
+        Checks that the number of entries of all arrays matches the number of
+        grid points.
+        
+        :rtype: int
+        :returns: num
+
+        """
+        if self._axes_sizes is None:
+            return super(regular_grid_sample_set, self).check_num()
+        num = int(np.prod(self._grid_shape()))
+        for array_name in self.array_names:
+            current_array = getattr(self, array_name)
+            if current_array is not None and current_array.shape[0] != num:
+                errortxt = "length of {} inconsistent with the grid"
+                raise length_not_matching(errortxt.format(array_name))
+        return num
+
+    def set_values(self, values):
+        """
+        Sets the sample values, the set is no longer a regular grid.
+
+        :param values: sample values
+        :type values: :class:`numpy.ndarray` of shape (num, dim)
+
+        """
+        self._axes_values = None
+        self._axes_sizes = None
+        super(regular_grid_sample_set, self).set_values(values)
+
+    def get_values(self):
+        """
+        Returns sample values, creating them from the grid if necessary.
+
+        :rtype: :class:`numpy.ndarray`
+        :returns: sample values
+
+        """
+        if self._values is None and self._axes_sizes is not None:
+            self._values = self._grid_points(np.arange(self.check_num()))
+        return self._values
+
+    def get_values_local(self):
+        """
+        Returns sample local values, creating them from the grid if
+        necessary.
+
+        :rtype: :class:`numpy.ndarray`
+        :returns: sample local values
+
+        """
+        if self._values_local is None and self._axes_sizes is not None:
+            self._local_index = np.array_split(np.arange(self.check_num()),
+                    comm.size)[comm.rank]
+            self._values_local = self._grid_points(self._local_index)
+        return self._values_local
+
+    def append_values(self, values):
+        """
+        Appends the values in ``value`` to the values of the grid, the set is
+        no longer a regular grid.
+
+        :param values: values to append
+        :type values: :class:`numpy.ndarray` of shape (some_num, dim)
+
+        """
+        self.get_values()
+        self._axes_values = None
+        self._axes_sizes = None
+        super(regular_grid_sample_set, self).append_values(values)
+
+    def append_values_local(self, values_local):
+        """
+        Appends the values in ``values_local`` to the local values of the
+        grid, the set is no longer a regular grid.
+
+        :param values_local: values to append
+        :type values_local: :class:`numpy.ndarray` of shape (some_num, dim)
+
+        """
+        self.get_values_local()
+        self._axes_values = None
+        self._axes_sizes = None
+        super(regular_grid_sample_set, self).append_values_local(values_local)
+
+    def global_to_local(self):
+        """
+        Makes local arrays from available global ones and the local values
+        from the grid.
+        """
+        super(regular_grid_sample_set, self).global_to_local()
+        if self._values is None and self._axes_sizes is not None:
+            self._values_local = self._grid_points(self._local_index)
+
+    def set_kdtree(self):
+        """
+        Creates a :class:`scipy.spatial.KDTree` for this set of samples.
+        """
+        self.get_values()
+        super(regular_grid_sample_set, self).set_kdtree()
+
+    def permute(self, order):
+        """
+        Reorders the samples, the set is no longer a regular grid.
+
+        :param order: permutation of the samples
+        :type order: :class:`numpy.ndarray` of ints of shape (num,)
+
+        """
+        self.get_values()
+        self._axes_values = None
+        self._axes_sizes = None
+        super(regular_grid_sample_set, self).permute(order)
+
+    def query(self, x, k=1):
+        """
+        Identify which value points x are associated with for discretization.
+        The nearest grid point is the nearest coordinate along each axis for
+        every p-norm.
+
+        :param x: points for query
+        :type x: :class:`numpy.ndarray` of shape ``(*, dim)``
+        :param int k: number of nearest neighbors to return
+
+        :rtype: tuple
+        :returns: (dist, ptr)
+        """
+        if self._axes_sizes is None or k != 1:
+            return super(regular_grid_sample_set, self).query(x, k)
+        x = util.fix_dimensions_data(x, self._dim)
+        multi_index = []
+        for (d, axis) in enumerate(self.get_axes()):
+            edges = 0.5*(axis[1:] + axis[:-1])
+            multi_index.append(np.searchsorted(edges, x[:, d]))
+        ptr = np.ravel_multi_index(multi_index, self._grid_shape())
+        dist = np.linalg.norm(x - self._grid_points(ptr), ord=self._p_norm,
+                axis=1)
+        return (dist, ptr)
+
+    def _axes_volumes(self):
+        """
+        Computes the lengths of the one dimensional Voronoi cells along each
+        axis bounded by the domain relative to the width of the domain.
+
+        :rtype: list
+        :returns: a :class:`numpy.ndarray` for each axis
+        """
+        axes = self.get_axes()
+        domain = self._domain
+        if domain is None:
+            domain = np.array([[axis[0], axis[-1]] for axis in axes])
+        lengths = []
+        for (d, axis) in enumerate(axes):
+            edges = np.concatenate(([domain[d, 0]], 0.5*(axis[1:] +
+                axis[:-1]), [domain[d, 1]]))
+            edges = np.clip(edges, domain[d, 0], domain[d, 1])
+            width = domain[d, 1] - domain[d, 0]
+            if width > 0:
+                lengths.append(np.diff(edges)/width)
+            else:
+                lengths.append(np.ones(axis.shape))
+        return lengths
+
+    def _cell_volumes(self, indices):
+        """
+        Computes the volume fractions of the cells with global ``indices``.
+
+        :param indices: global indices of samples
+        :type indices: :class:`numpy.ndarray` of ints
+
+        :rtype: :class:`numpy.ndarray` of shape (len(indices),)
+        :returns: volume fractions
+        """
+        multi_index = np.unravel_index(np.asarray(indices, dtype=np.int64),
+                self._grid_shape())
+        volumes = np.ones((len(indices),))
+        for (lengths, i) in zip(self._axes_volumes(), multi_index):
+            volumes *= lengths[i]
+        return volumes
+
+    def exact_volume(self):
+        r"""
+        
+        Exactly calculates the volume fraction of the Voronoi cells
+        :math:`\mu_\Lambda(\mathcal(V)_{i,N} \cap \Lambda)/\mu_\Lambda(\Lambda)`
+        as the product of the lengths of the cells along each axis.
+        
+        """
+        if self._axes_sizes is None:
+            raise dim_not_matching("The sample set is not a regular grid.")
+        self._volumes = self._cell_volumes(np.arange(self.check_num()))
+        self.global_to_local()
+
+    def estimate_volume(self, n_mc_points=int(1E4), sample_type='random',
+            seed=None):
+        """
+        Calculates the exact volume fractions of the cells of the grid, see
+        :meth:`exact_volume`. The arguments are ignored.
+
+        :param int n_mc_points: ignored
+        :param string sample_type: ignored
+        :param int seed: ignored
+        """
+        if self._axes_sizes is None:
+            return super(regular_grid_sample_set, self).estimate_volume(
+                    n_mc_points, sample_type, seed)
+        self.exact_volume()
+
+    def estimate_volume_mc(self, globalize=True):
+        """
+        Calculates the exact volume fractions of the cells of the grid, see
+        :meth:`exact_volume`.
+
+        :param bool globalize: flag whether or not to compute the global
+            volumes, otherwise only the local volumes are computed
+        """
+        if self._axes_sizes is None:
+            return super(regular_grid_sample_set, self).estimate_volume_mc(
+                    globalize)
+        if globalize:
+            self.exact_volume()
+        else:
+            local_index = np.array_split(np.arange(self.check_num()),
+                    comm.size)[comm.rank]
+            self._volumes_local = self._cell_volumes(local_index)
+
 class rectangle_sample_set(sample_set_base):
     r"""
     A data structure containing arrays specific to a set of samples defining a
@@ -1811,10 +2300,10 @@ class rectangle_sample_set(sample_set_base):
         values = np.zeros((len(maxes)+1, self._dim))
         self._right = np.zeros((len(maxes)+1, self._dim))
         self._left = np.zeros((len(mins)+1, self._dim))
-        for i in xrange(len(maxes)):
-            values[i, :] = 0.5*(np.array(maxes[i]) + np.array(mins[i]))
-            self._right[i, :] = maxes[i]
-            self._left[i, :] = mins[i]
+        if len(maxes) > 0:
+            self._right[:-1, :] = maxes
+            self._left[:-1, :] = mins
+            values[:-1, :] = 0.5*(self._right[:-1, :] + self._left[:-1, :])
         values[-1, :] = np.inf
         self._right[-1, :] = np.inf
         self._left[-1, :] = -np.inf
@@ -2120,6 +2609,7 @@ class ball_sample_set(sample_set_base):
         
          
         """
+        import scipy.special
         num = self.check_num()
         self._volumes = np.zeros((num, ))
         domain_vol = np.product(self._domain[:, 1] - self._domain[:, 0])
@@ -2157,18 +2647,21 @@ class cartesian_sample_set(rectangle_sample_set):
         xmin = []
         xmax = []
         for xv in xi:
-            xmin.append(xv[0:-1])
-            xmax.append(xv[1::])
-        if len(xmax) == 1:
-            maxes = np.transpose(np.array([xmax]))
-            mins = np.transpose(np.array([xmin]))
-        else:
-            maxes = np.vstack(np.array(np.meshgrid(*xmax)).T)
-            mins = np.vstack(np.array(np.meshgrid(*xmin)).T)
-        shp = np.array(maxes.shape)
-        pd = np.product(shp[0:-1])
-        maxes = maxes.reshape((pd, shp[-1]))
-        mins = mins.reshape((pd, shp[-1]))
+            xmin.append(np.asarray(xv)[0:-1])
+            xmax.append(np.asarray(xv)[1::])
+        # the rectangles are ordered with the last coordinates varying
+        # slowest followed by the first and the second coordinate
+        order = range(self._dim-1, 1, -1) + range(min(self._dim, 2))
+        columns = np.argsort(order)
+        xmax = [xmax[i] for i in order]
+        xmin = [xmin[i] for i in order]
+        pd = int(np.prod(util.grid_shape(xmax)))
+        maxes = np.empty((pd, self._dim))
+        mins = np.empty((pd, self._dim))
+        for (first, block) in util.grid_chunks(xmax):
+            maxes[first:first+block.shape[0]] = block[:, columns]
+        for (first, block) in util.grid_chunks(xmin):
+            mins[first:first+block.shape[0]] = block[:, columns]
                           
         rectangle_sample_set.setup(self, maxes, mins)
         
@@ -2686,6 +3179,38 @@ class discretization(object):
                               output_sample_set=output_ss)
         return disc
 
+    def reorder(self, curve='hilbert', bits=16):
+        """
+        Reorders the input and output samples along a space-filling curve
+        through the input domain and updates the pointers, see
+        :meth:`~bet.sample.voronoi_sample_set.reorder`.
+
+        :param string curve: ``'hilbert'`` or ``'morton'``
+        :param int bits: number of bits of the curve per dimension
+
+        :rtype: :class:`numpy.ndarray` of ints of shape (num,)
+        :returns: ``order`` such that the i-th sample is the ``order[i]``-th
+            sample before reordering
+        """
+        order = self._input_sample_set.reorder(curve, bits)
+        if self._output_sample_set is not None and \
+                self._output_sample_set.check_num() is not None:
+            self._output_sample_set.permute(order)
+        self.globalize_ptrs()
+        if self._io_ptr is not None:
+            self._io_ptr = self._io_ptr[order]
+            self._io_ptr_local = np.array_split(self._io_ptr,
+                    comm.size)[comm.rank]
+        if self._emulated_ii_ptr is not None:
+            # the emulated samples point to the new indices of their cells
+            new_index = np.empty_like(order)
+            new_index[order] = np.arange(order.shape[0])
+            self._emulated_ii_ptr = new_index[self._emulated_ii_ptr]
+            if self._emulated_ii_ptr_local is not None:
+                self._emulated_ii_ptr_local = \
+                        new_index[self._emulated_ii_ptr_local]
+        return order
+
     def local_to_global(self):
         """
         Call local_to_global for ``input_sample_set`` and
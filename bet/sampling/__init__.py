@@ -9,5 +9,20 @@ This subpackage contains
     specified set of parameter samples.
 * :class:`bet.sampling.adaptiveSampling` inherits from
     :class:`~bet.sampling.basicSampling` adaptively generates samples.
+* :class:`~bet.sampling.launcher.file_launcher` runs file based external
+    models concurrently and can be used as the model of a sampler.
+* :class:`~bet.sampling.evaluationCache.evaluation_cache` is a persistent
+    cache of model evaluations used by a sampler.
+* :mod:`~bet.sampling.latinHypercube` generates the local rows of Latin
+    hypercube designs in parallel.
+* :mod:`~bet.sampling.quasiMonteCarlo` generates scrambled Sobol' and Halton
+    samples in parallel.
+* :mod:`~bet.sampling.spaceFillingCurve` orders samples along Hilbert and
+    Morton curves.
+* :class:`~bet.sampling.distributedIndex.distributed_kdtree` is a nearest
+    neighbor index of samples distributed over all processors.
 """
-__all__ = ['basicSampling', 'adaptiveSampling', 'LpGeneralizedSamples']
+__all__ = ['basicSampling', 'adaptiveSampling', 'LpGeneralizedSamples',
+        'launcher', 'evaluationCache', 'latinHypercube',
+        'quasiMonteCarlo', 'spaceFillingCurve',
+        'distributedIndex']
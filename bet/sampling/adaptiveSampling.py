@@ -12,12 +12,11 @@ coordinate pairing. We assume the measure of both spaces is Lebesgue.
 We employ an approach based on using multiple sample chains.
 """
 
-import math, os, glob, logging
+import math, logging, threading, copy
 import numpy as np
-import scipy.io as sio
 import bet.sampling.basicSampling as bsam
 import bet.util as util
-from bet.Comm import comm 
+from bet.Comm import comm, MPI, use_comm
 import bet.sample as sample
 
 def loadmat(save_file, lb_model=None, hot_start=None, num_chains=None):
@@ -44,6 +43,7 @@ def loadmat(save_file, lb_model=None, hot_start=None, num_chains=None):
         ``kern_old``)
     
     """
+    import scipy.io as sio
     print hot_start
     if hot_start is None:
         hot_start = 1
@@ -52,14 +52,12 @@ def loadmat(save_file, lb_model=None, hot_start=None, num_chains=None):
         if comm.rank == 0:
             logging.info("HOT START from partial run")
         # Find and open save files
-        save_dir = os.path.dirname(save_file)
-        base_name = os.path.basename(save_file)
-        mdat_files = glob.glob(os.path.join(save_dir,
-                "proc*_{}".format(base_name)))
+        mdat_files = sample.parallel_file_names(save_file)
         if len(mdat_files) > 0:
-            tmp_mdat = sio.loadmat(mdat_files[0])
+            tmp_mdat = sio.loadmat(mdat_files[0],
+                    variable_names=['num_chains'])
         else:
-            tmp_mdat = sio.loadmat(save_file)
+            tmp_mdat = sio.loadmat(save_file, variable_names=['num_chains'])
         if num_chains is None: 
             num_chains = np.squeeze(tmp_mdat['num_chains'])
         num_chains_pproc = num_chains / comm.size
@@ -91,57 +89,46 @@ def loadmat(save_file, lb_model=None, hot_start=None, num_chains=None):
         elif hot_start == 1 and len(mdat_files) == comm.size:
             logging.info("HOT START using parallel files (same nproc)")
             # if the number of processors is the same then set mdat to
-            # be the one with the matching processor number (doesn't
-            # really matter)
+            # be the one with the matching processor number
+            mdat = sio.loadmat(mdat_files[comm.rank])
             disc = sample.load_discretization(mdat_files[comm.rank])
-            kern_old = np.squeeze(tmp_mdat['kern_old'])
-            all_step_ratios = np.squeeze(tmp_mdat['step_ratios'])
+            kern_old = np.squeeze(mdat['kern_old'])
+            all_step_ratios = np.squeeze(mdat['step_ratios'])
+            chain_length = all_step_ratios.shape[0]/num_chains_pproc
         elif hot_start == 1 and len(mdat_files) != comm.size:
             logging.info("HOT START using parallel files (diff nproc)")
-            # Determine how many processors the previous data used
-            # otherwise gather the data from mdat and then scatter
-            # among the processors and update mdat
-            mdat_files_local = comm.scatter(mdat_files)
-            mdat_local = [sio.loadmat(m) for m in mdat_files_local]
-            disc_local = [sample.load_discretization(m) for m in\
-                    mdat_files_local]
-            mdat_list = comm.allgather(mdat_local)
-            disc_list = comm.allgather(disc_local)
-            mdat_global = []
-            disc_global = []
-            # instead of a list of lists, create a list of mdat
-            for mlist, dlist in zip(mdat_list, disc_list): 
-                mdat_global.extend(mlist)
-                disc_global.extend(dlist)
-            # get num_proc and num_chains_pproc for previous run
-            old_num_proc = max((len(mdat_list), 1))
-            old_num_chains_pproc = num_chains/old_num_proc
-            # get batch size and/or number of dimensions
-            chain_length = disc_global[0].check_nums()/\
-                    old_num_chains_pproc
-            disc = disc_global[0].copy()
-            # create lists of local data
-            temp_input = []
-            temp_output = []
-            all_step_ratios = []
-            kern_old = []
-            # RESHAPE old_num_chains_pproc, chain_length(or batch), dim
-            for mdat, disc_local in zip(mdat_global, disc_local):
-                temp_input.append(np.reshape(disc_local.\
-                        _input_sample_set.get_values_local(),
-                        (old_num_chains_pproc, chain_length, -1), 'F'))
-                temp_output.append(np.reshape(disc_local.\
-                        _output_sample_set.get_values_local(),
-                        (old_num_chains_pproc, chain_length, -1), 'F'))
-                all_step_ratios.append(np.reshape(mdat['step_ratios'],
-                    (old_num_chains_pproc, chain_length, -1), 'F'))
-                kern_old.append(np.reshape(mdat['kern_old'],
-                    (old_num_chains_pproc,), 'F'))
-            # turn into arrays
-            temp_input = np.concatenate(temp_input)
-            temp_output = np.concatenate(temp_output)
-            all_step_ratios = np.concatenate(all_step_ratios)
-            kern_old = np.concatenate(kern_old)
+            # Each processor reads a block of the files of the previous run
+            # and sends every chain to the processor that owns it now
+            old_num_chains_pproc = num_chains/len(mdat_files)
+            disc = sample.load_discretization_parallel(save_file)
+            arrays = sample.load_distributed_arrays(mdat_files,
+                    ['step_ratios', 'kern_old'], ['step_ratios', 'kern_old'])
+            # the chains are split evenly, so kern_old is already local
+            kern_old = arrays['kern_old']
+            # global index of the local samples in the files of the previous
+            # run, where each processor stored old_num_chains_pproc chains
+            index = disc._input_sample_set._local_index
+            num_samples = comm.allreduce(index.shape[0])
+            chain_length = num_samples/num_chains
+            (old_rank, old_row) = np.divmod(index,
+                    old_num_chains_pproc*chain_length)
+            chain = old_rank*old_num_chains_pproc + \
+                    old_row%old_num_chains_pproc
+            batch = old_row/old_num_chains_pproc
+            dest = chain/num_chains_pproc
+            # position in the batch-major local layout of the new owner
+            position = util.redistribute(batch*num_chains_pproc + \
+                    chain%num_chains_pproc, dest)
+            order = np.empty(position.shape, dtype=np.int64)
+            order[position] = np.arange(position.shape[0])
+            disc._input_sample_set.set_values_local(util.redistribute(\
+                    disc._input_sample_set.get_values_local(), dest)[order])
+            disc._output_sample_set.set_values_local(util.redistribute(\
+                    disc._output_sample_set.get_values_local(), dest)[order])
+            all_step_ratios = util.redistribute(arrays['step_ratios'],
+                    dest)[order]
+            disc._input_sample_set._local_index = None
+            disc._output_sample_set._local_index = None
     if hot_start == 2: # HOT START FROM COMPLETED RUN:
         if comm.rank == 0:
             logging.info("HOT START from completed run")
@@ -165,7 +152,7 @@ def loadmat(save_file, lb_model=None, hot_start=None, num_chains=None):
                     (num_chains, chain_length), 'F')
     # SPLIT DATA IF NECESSARY
     if comm.size > 1 and (hot_start == 2 or (hot_start == 1 and \
-            len(mdat_files) != comm.size)):
+            len(mdat_files) == 0)):
         # Use split to split along num_chains and set *._values_local
         disc._input_sample_set.set_values_local(np.reshape(np.split(\
                 temp_input, comm.size, 0)[comm.rank],
@@ -184,6 +171,648 @@ def loadmat(save_file, lb_model=None, hot_start=None, num_chains=None):
     new_sampler = sampler(chain_length*num_chains, chain_length, lb_model) 
     return (new_sampler, disc, all_step_ratios, kern_old)
 
+class chain_engine(object):
+    """
+    Stores the local chains of
+    :meth:`~bet.sampling.adaptiveSampling.sampler.generalized_chains` in
+    preallocated chain-major arrays of shape ``(num_chains_pproc,
+    chain_length, dim)``. New proposals are written in place into the next
+    column of the arrays so no sample sets are copied or concatenated while
+    the chains advance. The chains are converted to the batch-major local
+    layout of :class:`~bet.sample.discretization` (sample ``k`` of batch
+    ``b`` is row ``b*num_chains_pproc+k``) only at checkpoints and at the
+    end.
+
+    The chains are either advanced in lockstep (:meth:`propose`,
+    :meth:`accept`) or each on its own (:meth:`propose_chain`,
+    :meth:`accept_chain`), in which case they can have different lengths.
+
+    """
+    def __init__(self, num_chains_pproc, chain_length, input_dim,
+            output_dim):
+        """
+        Initialization
+
+        :param int num_chains_pproc: number of local chains
+        :param int chain_length: number of samples per chain
+        :param int input_dim: dimension of the input space
+        :param int output_dim: dimension of the output space
+
+        """
+        #: int, number of local chains
+        self.num_chains_pproc = num_chains_pproc
+        #: int, number of samples per chain
+        self.chain_length = chain_length
+        #: :class:`numpy.ndarray` of shape (num_chains_pproc, chain_length,
+        #: input_dim), input samples of the chains
+        self.inputs = np.empty((num_chains_pproc, chain_length, input_dim))
+        #: :class:`numpy.ndarray` of shape (num_chains_pproc, chain_length,
+        #: output_dim), output samples of the chains
+        self.outputs = np.empty((num_chains_pproc, chain_length,
+            output_dim))
+        #: :class:`numpy.ndarray` of shape (num_chains_pproc, chain_length),
+        #: step ratios of the chains
+        self.step_ratios = np.empty((num_chains_pproc, chain_length))
+        #: kernel evaluated at the last sample of each chain
+        self.kern_old = None
+        #: :class:`numpy.ndarray` of ints of shape (num_chains_pproc,),
+        #: number of samples of each chain computed so far
+        self.lengths = np.zeros((num_chains_pproc,), dtype=np.int64)
+        #: :class:`numpy.ndarray` of bools of shape (num_chains_pproc,
+        #: chain_length), ``True`` for samples that restart a chain
+        self.restarts = np.zeros((num_chains_pproc, chain_length),
+                dtype=bool)
+
+    @property
+    def length(self):
+        """
+        :rtype: int
+        :returns: number of samples computed so far by all chains
+        """
+        return int(np.min(self.lengths))
+
+    def load(self, input_values, output_values, step_ratios, kern_old):
+        """
+        Loads the first batches of the chains from arrays in the batch-major
+        local layout.
+
+        :param input_values: local input samples
+        :type input_values: :class:`numpy.ndarray` of shape
+            (num_batches*num_chains_pproc, input_dim)
+        :param output_values: local output samples
+        :type output_values: :class:`numpy.ndarray` of shape
+            (num_batches*num_chains_pproc, output_dim)
+        :param step_ratios: local step ratios
+        :type step_ratios: :class:`numpy.ndarray` of shape
+            (num_batches*num_chains_pproc,)
+        :param kern_old: kernel evaluated at the last sample of each chain
+
+        """
+        num_batches = np.size(step_ratios)/self.num_chains_pproc
+        self.inputs[:, :num_batches] = np.swapaxes(np.reshape(input_values,
+            (num_batches, self.num_chains_pproc, -1)), 0, 1)
+        self.outputs[:, :num_batches] = np.swapaxes(np.reshape(output_values,
+            (num_batches, self.num_chains_pproc, -1)), 0, 1)
+        self.step_ratios[:, :num_batches] = np.reshape(step_ratios,
+                (num_batches, self.num_chains_pproc)).transpose()
+        if kern_old is not None:
+            kern_old = np.reshape(np.array(kern_old, dtype=np.float64),
+                    (self.num_chains_pproc,))
+        self.kern_old = kern_old
+        self.lengths[:] = num_batches
+        self.restarts[:] = False
+
+    def propose(self, t_set, domain):
+        """
+        Writes a new proposal for each chain into the next column of
+        :attr:`inputs` using
+        :meth:`~bet.sampling.adaptiveSampling.transition_set.step_values`.
+
+        :param t_set: method for creating new parameter steps
+        :type t_set: :class:`bet.sampling.adaptiveSampling.transition_set`
+        :param domain: min, max value for each input dimension
+        :type domain: :class:`numpy.ndarray` of shape (input_dim, 2)
+
+        :rtype: :class:`numpy.ndarray` of shape (num_chains_pproc, input_dim)
+        :returns: a view of the proposals
+        """
+        n = self.length
+        return t_set.step_values(self.step_ratios[:, n-1],
+                self.inputs[:, n-1], domain[:, 0], domain[:, 1],
+                out=self.inputs[:, n])
+
+    def accept(self, output_values, kern, min_ratio, max_ratio):
+        """
+        Stores the outputs of the last proposals and the new step ratios
+        determined by ``kern``.
+
+        :param output_values: outputs of the proposals
+        :type output_values: :class:`numpy.ndarray` of shape
+            (num_chains_pproc, output_dim)
+        :param kern: functional that acts on the data used to determine the
+            proposed change to the ``step_size``
+        :type kern: :class:`bet.sampling.adaptiveSampling.kernel`
+        :param float min_ratio: minimum step ratio
+        :param float max_ratio: maximum step ratio
+
+        """
+        n = self.length
+        self.outputs[:, n] = np.reshape(output_values,
+                (self.num_chains_pproc, -1))
+        (self.kern_old, proposal) = kern.delta_step(self.outputs[:, n],
+                self.kern_old)
+        np.clip(proposal*self.step_ratios[:, n-1], min_ratio, max_ratio,
+                out=self.step_ratios[:, n])
+        self.lengths[:] = n + 1
+
+    def propose_chain(self, k, t_set, domain):
+        """
+        Writes a new proposal for chain ``k`` into the next column of
+        :attr:`inputs`.
+
+        :param int k: local index of the chain
+        :param t_set: method for creating new parameter steps
+        :type t_set: :class:`bet.sampling.adaptiveSampling.transition_set`
+        :param domain: min, max value for each input dimension
+        :type domain: :class:`numpy.ndarray` of shape (input_dim, 2)
+
+        :rtype: :class:`numpy.ndarray` of shape (1, input_dim)
+        :returns: a view of the proposal
+        """
+        n = self.lengths[k]
+        return t_set.step_values(self.step_ratios[k:k+1, n-1],
+                self.inputs[k:k+1, n-1], domain[:, 0], domain[:, 1],
+                out=self.inputs[k:k+1, n])
+
+    def accept_chain(self, k, output_values, kern, min_ratio, max_ratio):
+        """
+        Stores the output of the last proposal of chain ``k`` and its new
+        step ratio determined by ``kern``. Only the kernel value and the step
+        ratio of chain ``k`` are updated.
+
+        :param int k: local index of the chain
+        :param output_values: output of the proposal
+        :type output_values: :class:`numpy.ndarray` of shape (1, output_dim)
+        :param kern: functional that acts on the data used to determine the
+            proposed change to the ``step_size``
+        :type kern: :class:`bet.sampling.adaptiveSampling.kernel`
+        :param float min_ratio: minimum step ratio
+        :param float max_ratio: maximum step ratio
+
+        """
+        n = self.lengths[k]
+        self.outputs[k, n] = np.ravel(output_values)
+        kern_old = None
+        if self.kern_old is not None:
+            kern_old = self.kern_old[k:k+1]
+        (kern_new, proposal) = kern.delta_step(self.outputs[k:k+1, n],
+                kern_old)
+        if kern_new is not None:
+            if self.kern_old is None:
+                self.kern_old = np.empty((self.num_chains_pproc,))
+                self.kern_old.fill(np.nan)
+            self.kern_old[k] = np.ravel(kern_new)[0]
+        self.step_ratios[k, n] = min(max(np.ravel(proposal)[0]*\
+                self.step_ratios[k, n-1], min_ratio), max_ratio)
+        self.lengths[k] = n + 1
+
+    def get_step_ratios_local(self):
+        """
+        :rtype: :class:`numpy.ndarray` of shape (length*num_chains_pproc,)
+        :returns: the step ratios computed so far in the batch-major local
+            layout
+        """
+        return np.ravel(self.step_ratios[:, :self.length].transpose())
+
+    def get_restarts_local(self):
+        """
+        :rtype: :class:`numpy.ndarray` of bools of shape
+            (length*num_chains_pproc,)
+        :returns: the restarts so far in the batch-major local layout
+        """
+        return np.ravel(self.restarts[:, :self.length].transpose())
+
+    def to_discretization(self, disc):
+        """
+        Sets the local values of the input and output sample sets of
+        ``disc`` to the samples computed so far in the batch-major local
+        layout.
+
+        :param disc: discretization to update
+        :type disc: :class:`~bet.sample.discretization`
+
+        :rtype: :class:`~bet.sample.discretization`
+        :returns: ``disc``
+        """
+        n = self.length
+        disc._input_sample_set.set_values_local(np.reshape(np.swapaxes(
+            self.inputs[:, :n], 0, 1), (-1, self.inputs.shape[2])))
+        disc._output_sample_set.set_values_local(np.reshape(np.swapaxes(
+            self.outputs[:, :n], 0, 1), (-1, self.outputs.shape[2])))
+        if disc._input_sample_set._right_local is not None:
+            # saved files need bounds that match the samples
+            disc._input_sample_set.update_bounds_local()
+        return disc
+
+class budget_controller(object):
+    """
+    Retires stagnated chains and restarts them in under-explored regions of
+    the input space. A chain is stagnated if its step ratio has not changed
+    for ``window`` steps: either the kernel keeps decreasing it, so it is
+    pinned at the minimum while the chain resamples the same region of high
+    probability, or the kernel values do not change, e.g. while the chain
+    wanders through a region of zero probability.
+
+    The next sample of a stagnated chain is the candidate of a random Latin
+    hypercube of ``num_candidates`` samples farthest from the samples the
+    local chains have evaluated so far. The new chain starts with the initial
+    step ratio and continues in the same chain, so the total number of model
+    evaluations and the layout of the samples and step ratios do not change.
+
+    """
+    def __init__(self, window=5, num_candidates=16, tolerance=1E-08):
+        """
+        Initialization
+
+        :param int window: number of steps without a change of the step ratio
+            after which a chain is stagnated
+        :param int num_candidates: number of candidates per restart
+        :param float tolerance: relative tolerance for comparing step ratios
+
+        """
+        #: int, number of steps without a change of the step ratio after
+        #: which a chain is stagnated
+        self.window = window
+        #: int, number of candidates per restart
+        self.num_candidates = num_candidates
+        #: float, relative tolerance for comparing step ratios
+        self.TOL = tolerance
+        #: int, number of local chains retired so far
+        self.num_retired = 0
+        #: :class:`numpy.ndarray` of bools of shape (num_chains,
+        #: chain_length), ``True`` for samples that restart a chain, set at
+        #: the end of
+        #: :meth:`~bet.sampling.adaptiveSampling.sampler.generalized_chains`
+        self.restarts = None
+        #: :class:`numpy.ndarray` of bools of shape (num_chains,), ``True``
+        #: for chains that were stagnated at the end
+        self.stagnated_chains = None
+
+    def stagnated(self, engine, chains):
+        """
+        Determines which of ``chains`` are stagnated before their next
+        sample.
+
+        :param engine: the local chains
+        :type engine: :class:`~bet.sampling.adaptiveSampling.chain_engine`
+        :param chains: local indices of the chains
+        :type chains: list or :class:`numpy.ndarray` of ints
+
+        :rtype: :class:`numpy.ndarray` of bools of shape (len(chains),)
+        :returns: ``True`` for stagnated chains
+        """
+        chains = np.asarray(chains, dtype=np.int64)
+        columns = engine.lengths[chains]
+        stagnated = columns > self.window
+        chains = chains[stagnated]
+        # the last window+1 step ratios of each chain
+        window = columns[stagnated, np.newaxis] - 1 - \
+                np.arange(self.window+1)
+        ratios = engine.step_ratios[chains[:, np.newaxis], window]
+        constant = np.all(np.isclose(ratios, ratios[:, :1], rtol=self.TOL,
+            atol=0.0), axis=1)
+        restarted = np.any(engine.restarts[chains[:, np.newaxis],
+            window[:, :-1]], axis=1)
+        stagnated[stagnated] = constant & np.logical_not(restarted)
+        return stagnated
+
+    def candidates(self, engine, num, domain):
+        """
+        Chooses ``num`` samples from a random Latin hypercube that are
+        farthest from the samples evaluated by the local chains.
+
+        :param engine: the local chains
+        :type engine: :class:`~bet.sampling.adaptiveSampling.chain_engine`
+        :param int num: number of samples
+        :param domain: min, max value for each input dimension
+        :type domain: :class:`numpy.ndarray` of shape (ndim, 2)
+
+        :rtype: :class:`numpy.ndarray` of shape (num, ndim)
+        :returns: samples in under-explored regions
+        """
+        import scipy.spatial as spatial
+        import bet.sampling.latinHypercube as latinHypercube
+        num_candidates = max(num*self.num_candidates, num)
+        candidates = latinHypercube.lhs(domain.shape[0], num_candidates,
+                'random', np.random.randint(0, 2**31-1))
+        candidates = candidates*(domain[:, 1]-domain[:, 0]) + domain[:, 0]
+        evaluated = np.arange(engine.chain_length) < \
+                engine.lengths[:, np.newaxis]
+        (dist, _) = spatial.cKDTree(engine.inputs[evaluated]).query(
+                candidates)
+        return candidates[np.argsort(dist)[::-1][:num]]
+
+    def restart(self, engine, chains, domain):
+        """
+        Replaces the last proposals of the stagnated ``chains`` with samples
+        in under-explored regions.
+
+        :param engine: the local chains
+        :type engine: :class:`~bet.sampling.adaptiveSampling.chain_engine`
+        :param chains: local indices of the chains with new proposals
+        :type chains: list or :class:`numpy.ndarray` of ints
+        :param domain: min, max value for each input dimension
+        :type domain: :class:`numpy.ndarray` of shape (ndim, 2)
+
+        """
+        chains = np.asarray(chains, dtype=np.int64)
+        chains = chains[self.stagnated(engine, chains)]
+        if chains.shape[0] == 0:
+            return
+        columns = engine.lengths[chains]
+        engine.inputs[chains, columns] = self.candidates(engine,
+                chains.shape[0], domain)
+        engine.restarts[chains, columns] = True
+        self.num_retired += chains.shape[0]
+
+    def accepted(self, engine, chains, kern, t_set):
+        """
+        Starts the kernel values and step ratios of chains whose last sample
+        was a restart afresh.
+
+        :param engine: the local chains
+        :type engine: :class:`~bet.sampling.adaptiveSampling.chain_engine`
+        :param chains: local indices of the chains with new samples
+        :type chains: list or :class:`numpy.ndarray` of ints
+        :param kern: functional that acts on the data used to determine the
+            proposed change to the ``step_size``
+        :type kern: :class:`bet.sampling.adaptiveSampling.kernel`
+        :param t_set: method for creating new parameter steps
+        :type t_set: :class:`bet.sampling.adaptiveSampling.transition_set`
+
+        """
+        chains = np.asarray(chains, dtype=np.int64)
+        columns = engine.lengths[chains] - 1
+        restarted = engine.restarts[chains, columns]
+        chains = chains[restarted]
+        columns = columns[restarted]
+        if chains.shape[0] == 0:
+            return
+        engine.step_ratios[chains, columns] = t_set.init_ratio
+        if engine.kern_old is not None:
+            engine.kern_old[chains] = np.ravel(kern.evaluate(
+                engine.outputs[chains, columns]))
+
+class surrogate_screen(object):
+    """
+    Screens the proposals of the chains of a
+    :class:`~bet.sampling.adaptiveSampling.chain_engine` before the model is
+    solved for them. The QoI of a proposal are predicted by a nearest
+    neighbor surrogate of the model built from the samples the local chains
+    have evaluated so far (for ``num_neighbors=1`` this is the piecewise
+    constant surrogate of
+    :class:`~bet.surrogates.piecewise_polynomial_surrogate` on the Voronoi
+    cells of the evaluated samples). A proposal whose predicted kernel value
+    is worse than ``threshold`` (below it if larger kernel values are better,
+    above it if smaller values are better) is irrelevant and is replaced by a
+    new proposal from the same sample, at most ``max_retries`` times.
+
+    With probability ``verify_rate`` an irrelevant proposal is kept and
+    solved with the true model anyway so that regions the surrogate
+    misjudges are still explored by the chains.
+
+    """
+    def __init__(self, threshold, verify_rate=0.1, max_retries=5,
+            num_neighbors=1):
+        """
+        Initialization
+
+        :param float threshold: kernel value that separates relevant from
+            irrelevant proposals
+        :param float verify_rate: probability of solving the true model for
+            an irrelevant proposal
+        :param int max_retries: maximum number of times a proposal is
+            replaced
+        :param int num_neighbors: number of evaluated samples the QoI of a
+            proposal are averaged over
+
+        """
+        #: float, kernel value that separates relevant from irrelevant
+        #: proposals
+        self.threshold = threshold
+        #: float, probability of solving the true model for an irrelevant
+        #: proposal
+        self.verify_rate = verify_rate
+        #: int, maximum number of times a proposal is replaced
+        self.max_retries = max_retries
+        #: int, number of evaluated samples used for a prediction
+        self.num_neighbors = num_neighbors
+        #: int, number of screened proposals
+        self.num_screened = 0
+        #: int, number of rejected proposals (model solves saved)
+        self.num_rejected = 0
+        #: int, number of irrelevant proposals solved with the true model
+        self.num_verified = 0
+        self._tree = None
+        self._outputs = None
+        self._num = 0
+
+    def reset(self):
+        """
+        Resets the counters and the surrogate.
+        """
+        self.num_screened = 0
+        self.num_rejected = 0
+        self.num_verified = 0
+        self._tree = None
+        self._outputs = None
+        self._num = 0
+
+    def update(self, engine):
+        """
+        Rebuilds the surrogate from the samples evaluated by the chains of
+        ``engine`` if they have grown by at least one sample per chain.
+
+        :param engine: the local chains
+        :type engine: :class:`~bet.sampling.adaptiveSampling.chain_engine`
+
+        """
+        num = int(np.sum(engine.lengths))
+        if self._tree is not None and num < self._num + \
+                engine.num_chains_pproc:
+            return
+        import scipy.spatial as spatial
+        evaluated = np.arange(engine.chain_length) < \
+                engine.lengths[:, np.newaxis]
+        self._tree = spatial.cKDTree(engine.inputs[evaluated])
+        self._outputs = engine.outputs[evaluated]
+        self._num = num
+
+    def predict(self, input_values):
+        """
+        Predicts the QoI of samples with the surrogate.
+
+        :param input_values: samples
+        :type input_values: :class:`numpy.ndarray` of shape (num, ndim)
+
+        :rtype: :class:`numpy.ndarray` of shape (num, mdim)
+        :returns: predicted QoI
+        """
+        num_neighbors = min(self.num_neighbors, self._outputs.shape[0])
+        (_, ptr) = self._tree.query(input_values, num_neighbors)
+        ptr = np.reshape(ptr, (-1, num_neighbors))
+        return np.mean(self._outputs[ptr], 1)
+
+    def irrelevant(self, kern, output_values):
+        """
+        Determines which QoI have kernel values worse than
+        :attr:`threshold`.
+
+        :param kern: functional that acts on the data used to determine the
+            proposed change to the ``step_size``
+        :type kern: :class:`bet.sampling.adaptiveSampling.kernel`
+        :param output_values: QoI
+        :type output_values: :class:`numpy.ndarray` of shape (num, mdim)
+
+        :rtype: :class:`numpy.ndarray` of bools of shape (num,)
+        :returns: ``True`` for irrelevant QoI
+        """
+        kern_values = kern.evaluate(output_values)
+        if kern_values is None:
+            return np.zeros((output_values.shape[0],), dtype=bool)
+        if kern.sort_ascending:
+            return np.ravel(kern_values) >= self.threshold
+        return np.ravel(kern_values) <= self.threshold
+
+    def screen(self, engine, chains, t_set, kern, domain):
+        """
+        Screens the last proposals of ``chains`` and replaces irrelevant
+        proposals in place.
+
+        :param engine: the local chains
+        :type engine: :class:`~bet.sampling.adaptiveSampling.chain_engine`
+        :param chains: local indices of the chains with new proposals
+        :type chains: list or :class:`numpy.ndarray` of ints
+        :param t_set: method for creating new parameter steps
+        :type t_set: :class:`bet.sampling.adaptiveSampling.transition_set`
+        :param kern: functional that acts on the data used to determine the
+            proposed change to the ``step_size``
+        :type kern: :class:`bet.sampling.adaptiveSampling.kernel`
+        :param domain: min, max value for each input dimension
+        :type domain: :class:`numpy.ndarray` of shape (ndim, 2)
+
+        """
+        chains = np.asarray(chains, dtype=np.int64)
+        columns = engine.lengths[chains]
+        # restarts are not steps from the previous sample
+        fresh = np.logical_not(engine.restarts[chains, columns])
+        chains = chains[fresh]
+        columns = columns[fresh]
+        self.num_screened += chains.shape[0]
+        self.update(engine)
+        for _ in xrange(self.max_retries):
+            irrelevant = self.irrelevant(kern, self.predict(
+                engine.inputs[chains, columns]))
+            verify = np.random.random(chains.shape) < self.verify_rate
+            self.num_verified += int(np.sum(irrelevant & verify))
+            rejected = irrelevant & ~verify
+            chains = chains[rejected]
+            columns = columns[rejected]
+            if chains.shape[0] == 0:
+                break
+            self.num_rejected += chains.shape[0]
+            engine.inputs[chains, columns] = t_set.step_values(
+                    engine.step_ratios[chains, columns-1],
+                    engine.inputs[chains, columns-1], domain[:, 0],
+                    domain[:, 1])
+
+class memoized_model(object):
+    """
+    Wraps a model so that it is solved at most once for each input sample.
+    The outputs are kept in memory by the values of the sample, so
+    configurations of a sweep (see
+    :meth:`~bet.sampling.adaptiveSampling.sampler.run_sweep`) that propose
+    identical samples, e.g. the same initial Latin hypercube, share one model
+    solve. Calls from several threads may share the cache: a call waits for
+    the samples that another call is solving instead of solving them again.
+
+    """
+    def __init__(self, lb_model):
+        """
+        Initialization
+
+        :param callable lb_model: runs the model at a given set of parameter
+            samples, (N, ndim), and returns data (N, mdim)
+
+        """
+        #: callable, the model
+        self.lb_model = lb_model
+        #: int, number of samples found in the cache or being solved
+        self.hits = 0
+        #: int, number of samples the model was solved at
+        self.misses = 0
+        self._outputs = dict()
+        # events of the samples being solved by a call
+        self._pending = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._outputs)
+
+    def _keys(self, input_values):
+        """
+        :rtype: tuple
+        :returns: (input_values, keys) where input_values has shape (N, ndim)
+            and keys has a key for each sample
+        """
+        input_values = np.ascontiguousarray(input_values, dtype=np.float64)
+        input_values = np.reshape(input_values, (input_values.shape[0], -1))
+        return (input_values, [row.tobytes() for row in input_values])
+
+    def store(self, input_values, output):
+        """
+        Adds model outputs solved elsewhere, e.g. on another processor, to
+        the cache.
+
+        :param input_values: samples
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+        :param output: model output at ``input_values``
+        :type output: :class:`numpy.ndarray` of shape (N, mdim)
+
+        """
+        (input_values, keys) = self._keys(input_values)
+        output = np.reshape(np.asarray(output), (len(keys), -1))
+        with self._lock:
+            for key, row in zip(keys, output):
+                self._outputs.setdefault(key, row)
+
+    def __call__(self, input_values):
+        """
+        Solves the model at the samples that are neither in the cache nor
+        being solved by another call.
+
+        :param input_values: samples
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+
+        :rtype: :class:`numpy.ndarray` of shape (N, mdim)
+        :returns: model output
+        """
+        (input_values, keys) = self._keys(input_values)
+        while True:
+            with self._lock:
+                solve = dict()
+                waits = dict()
+                for i, key in enumerate(keys):
+                    if key in self._outputs or key in solve or key in waits:
+                        continue
+                    elif key in self._pending:
+                        waits[key] = self._pending[key]
+                    else:
+                        solve[key] = i
+                        self._pending[key] = threading.Event()
+                self.misses += len(solve)
+                self.hits += len(keys) - len(solve)
+            if len(solve) > 0:
+                rows = sorted(solve.values())
+                try:
+                    output = np.asarray(self.lb_model(input_values[rows]))
+                    output = np.reshape(output, (len(rows), -1))
+                    with self._lock:
+                        for j, i in enumerate(rows):
+                            self._outputs[keys[i]] = output[j]
+                finally:
+                    with self._lock:
+                        for key in solve:
+                            self._pending.pop(key).set()
+            for event in waits.itervalues():
+                event.wait()
+            with self._lock:
+                # samples of a failed call of another thread are solved
+                # again
+                if all(key in self._outputs for key in keys):
+                    return np.array([self._outputs[key] for key in keys])
+                self.hits -= len(keys)
+
 class sampler(bsam.sampler):
     """
     This class provides methods for adaptive sampling of parameter space to
@@ -231,8 +860,148 @@ class sampler(bsam.sampler):
         mdict['num_chains'] = self.num_chains
         mdict['sample_batch_no'] = self.sample_batch_no
         
+    def _sweep_sampler(self, lb_model):
+        """
+        Creates a sampler with the settings of this sampler for one
+        configuration of a sweep. Its chains are laid out over the processors
+        of ``comm``, which may be the communicator of a group of processors.
+
+        :param callable lb_model: runs the model at a given set of parameter
+            samples, (N, ndim), and returns data (N, mdim)
+
+        :rtype: :class:`~bet.sampling.adaptiveSampling.sampler`
+        :returns: sampler for one configuration
+        """
+        my_sampler = copy.copy(self)
+        my_sampler.lb_model = lb_model
+        my_sampler.num_chains_pproc = int(math.ceil(self.num_samples/\
+                float(self.chain_length*comm.size)))
+        my_sampler.num_chains = comm.size * my_sampler.num_chains_pproc
+        my_sampler.num_samples = self.chain_length * my_sampler.num_chains
+        my_sampler.sample_batch_no = np.repeat(range(my_sampler.num_chains),
+                self.chain_length, 0)
+        return my_sampler
+
+    def run_sweep(self, configurations, rho_D, maximum, input_domain,
+            savefile, initial_sample_type="lhs", criterion='center',
+            num_groups=None, seed=None):
+        """
+        Generates samples using generalized chains for each of a list of
+        configurations of transition sets and kernels and compares how many
+        samples each configuration put in regions of high probability.
+
+        The processors are split into ``num_groups`` groups (with
+        ``comm.Split``) that run the configurations concurrently, the
+        configurations of a group run one after another. Each configuration
+        runs on its own sampler and configuration ``i`` is saved to
+        ``savefile_i``. With more than one group the discretizations are
+        loaded from these files once all groups are done, so their local
+        values are in the ``np.array_split`` layout of all processors.
+
+        The configurations share one :class:`memoized_model` on each
+        processor, so the model is solved only once at samples proposed by
+        several configurations. All configurations start from the same
+        initial samples for the seeded ``initial_sample_type`` (``lhs``,
+        ``sobol``, ``halton``), these are solved by all processors before the
+        groups start and shared with every group.
+
+        :param list configurations: pairs of
+            :class:`~bet.sampling.adaptiveSampling.transition_set` and
+            :class:`~bet.sampling.adaptiveSampling.kernel`
+        :param rho_D: probability density on D
+        :type rho_D: callable function that takes a :class:`numpy.ndarray` and
+            returns a :class:`numpy.ndarray`
+        :param float maximum: maximum value of rho_D
+        :param input_domain: min, max value for each input dimension
+        :type input_domain: :class:`numpy.ndarray` (ndim, 2)
+        :param string savefile: filename to save samples and data
+        :param string initial_sample_type: type of initial sample random (or r),
+            latin hypercube(lhs), or space-filling curve(sfc)
+        :param string criterion: latin hypercube criterion see 
+            `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
+        :param int num_groups: number of groups of processors, defaults to
+            one group per processor or per configuration, whichever is fewer
+        :param int seed: seed of the initial samples, if ``None`` rank 0
+            draws one from :mod:`numpy.random`
+
+        :rtype: tuple
+        :returns: (discretization, , num_high_prob_samples,
+            sorted_incidices_of_num_high_prob_samples, average_step_ratio,
+            table) where table is a :class:`numpy.ndarray` with a record for
+            each configuration sorted by the number of samples in regions of
+            high probability (see :meth:`sweep_table`)
+
+        """
+        import scipy.io as sio
+        from bet.sampling.latinHypercube import shared_seed
+        seed = shared_seed(seed)
+        memo = self.lb_model
+        if not isinstance(memo, memoized_model):
+            memo = memoized_model(memo)
+        if num_groups is None:
+            num_groups = comm.size
+        num_groups = max(1, min(num_groups, comm.size, len(configurations)))
+        savefiles = ["{}_{}".format(savefile, i) for i in \
+                xrange(len(configurations))]
+
+        if num_groups == 1:
+            chains = [self._sweep_sampler(memo).generalized_chains(
+                input_domain, t_set, kern, savefiles[i], initial_sample_type,
+                criterion, seed=seed) for i, (t_set, kern) in \
+                        enumerate(configurations)]
+        else:
+            world = comm
+            color = world.rank*num_groups/world.size
+            group_sizes = np.bincount(np.arange(world.size)*num_groups/\
+                    world.size)
+            if initial_sample_type in ["lhs", "sobol", "halton"]:
+                # solve the initial samples of every group size once
+                for group_size in np.unique(group_sizes):
+                    num_chains = group_size*int(math.ceil(self.num_samples/\
+                            float(self.chain_length*group_size)))
+                    initial = bsam.random_sample_set(initial_sample_type,
+                            input_domain, num_chains, criterion,
+                            globalize=False, seed=seed).get_values_local()
+                    solved = world.allgather((initial, memo(initial)))
+                    for (initial, output) in solved:
+                        if initial.shape[0] > 0:
+                            memo.store(initial, output)
+            group_comm = world.Split(color, world.rank)
+            with use_comm(group_comm):
+                for i in xrange(color, len(configurations), num_groups):
+                    (t_set, kern) = configurations[i]
+                    self._sweep_sampler(memo).generalized_chains(input_domain,
+                            t_set, kern, savefiles[i], initial_sample_type,
+                            criterion, seed=seed)
+            group_comm.Free()
+            world.barrier()
+            chains = [(sample.load_discretization(f), sio.loadmat(f,
+                variable_names=['step_ratios'])['step_ratios']) for f in \
+                        savefiles]
+        results = list()
+        r_step_size = list()
+        results_rD = list()
+        mean_ss = list()
+        for (discretization, step_sizes) in chains:
+            results.append(discretization)
+            r_step_size.append(step_sizes)
+            results_rD.append(int(sum(rho_D(discretization._output_sample_set.\
+                    get_values())/maximum)))
+            mean_ss.append(np.mean(step_sizes))
+        sort_ind = np.argsort(results_rD)
+        table = sweep_table(configurations, results_rD, mean_ss)
+        hits = comm.allreduce(memo.hits, op=MPI.SUM)
+        misses = comm.allreduce(memo.misses, op=MPI.SUM)
+        if comm.rank == 0:
+            logging.info("{} of {} samples of the sweep found in the "
+                    "cache".format(hits, hits+misses))
+            for row in table:
+                logging.info(str(row))
+        return (results, r_step_size, results_rD, sort_ind, mean_ss, table)
+
     def run_gen(self, kern_list, rho_D, maximum, input_domain,
-            t_set, savefile, initial_sample_type="lhs", criterion='center'):
+            t_set, savefile, initial_sample_type="lhs", criterion='center',
+            num_groups=None):
         """
         Generates samples using generalized chains and a list of different
         kernels.
@@ -250,9 +1019,11 @@ class sampler(bsam.sampler):
         :type t_set: :class:`bet.sampling.adaptiveSampling.transition_set`
         :param string savefile: filename to save samples and data
         :param string initial_sample_type: type of initial sample random (or r),
-            latin hypercube(lhs), or space-filling curve(TBD)
+            latin hypercube(lhs), or space-filling curve(sfc)
         :param string criterion: latin hypercube criterion see 
             `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
+        :param int num_groups: number of groups of processors that run the
+            configurations concurrently, see :meth:`run_sweep`
         
         :rtype: tuple
         :returns: (discretization, , num_high_prob_samples,
@@ -260,25 +1031,13 @@ class sampler(bsam.sampler):
         
         """
         # generalized chains
-        results = list()
-        r_step_size = list()
-        results_rD = list()
-        mean_ss = list()
-        for kern in kern_list:
-            (discretization, step_sizes) = self.generalized_chains(
-                    input_domain, t_set, kern, savefile,
-                    initial_sample_type, criterion)
-            results.append(discretization)
-            r_step_size.append(step_sizes)
-            results_rD.append(int(sum(rho_D(discretization._output_sample_set.\
-                    get_values())/maximum)))
-            mean_ss.append(np.mean(step_sizes))
-        sort_ind = np.argsort(results_rD)
-        return (results, r_step_size, results_rD, sort_ind, mean_ss)
+        configurations = [(t_set, kern) for kern in kern_list]
+        return self.run_sweep(configurations, rho_D, maximum, input_domain,
+                savefile, initial_sample_type, criterion, num_groups)[:5]
 
     def run_tk(self, init_ratio, min_ratio, max_ratio, rho_D, maximum,
             input_domain, kernel, savefile,
-            initial_sample_type="lhs", criterion='center'):
+            initial_sample_type="lhs", criterion='center', num_groups=None):
         """
         Generates samples using generalized chains and
         :class:`~bet.sampling.transition_set` created using
@@ -301,35 +1060,25 @@ class sampler(bsam.sampler):
         :type kernel: :class:`bet.sampling.adaptiveSampling.kernel` object.
         :param string savefile: filename to save samples and data
         :param string initial_sample_type: type of initial sample random (or r),
-            latin hypercube(lhs), or space-filling curve(TBD)
+            latin hypercube(lhs), or space-filling curve(sfc)
         :param string criterion: latin hypercube criterion see 
             `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
+        :param int num_groups: number of groups of processors that run the
+            configurations concurrently, see :meth:`run_sweep`
         
         :rtype: tuple
         :returns: (discretization, , num_high_prob_samples,
             sorted_incidices_of_num_high_prob_samples, average_step_ratio)
         
         """
-        results = list()
-        r_step_size = list()
-        results_rD = list()
-        mean_ss = list()
-        for i, j, k  in zip(init_ratio, min_ratio, max_ratio):
-            ts = transition_set(i, j, k)
-            (discretization, step_sizes) = self.generalized_chains(
-                   input_domain, ts, kernel, savefile,
-                    initial_sample_type, criterion)
-            results.append(discretization)
-            r_step_size.append(step_sizes)
-            results_rD.append(int(sum(rho_D(discretization._output_sample_set.\
-                    get_values())/maximum)))
-            mean_ss.append(np.mean(step_sizes))
-        sort_ind = np.argsort(results_rD)
-        return (results, r_step_size, results_rD, sort_ind, mean_ss)
+        configurations = [(transition_set(i, j, k), kernel) for i, j, k in \
+                zip(init_ratio, min_ratio, max_ratio)]
+        return self.run_sweep(configurations, rho_D, maximum, input_domain,
+                savefile, initial_sample_type, criterion, num_groups)[:5]
 
     def run_inc_dec(self, increase, decrease, tolerance, rho_D, maximum,
             input_domain, t_set, savefile,
-            initial_sample_type="lhs", criterion='center'):
+            initial_sample_type="lhs", criterion='center', num_groups=None):
         """
         Generates samples using generalized chains and
         :class:`~bet.sampling.adaptiveSampling.rhoD_kernel` created using
@@ -350,9 +1099,11 @@ class sampler(bsam.sampler):
         :type t_set: :class:`bet.sampling.adaptiveSampling.transition_set`
         :param string savefile: filename to save samples and data
         :param string initial_sample_type: type of initial sample random (or r),
-            latin hypercube(lhs), or space-filling curve(TBD)
+            latin hypercube(lhs), or space-filling curve(sfc)
         :param string criterion: latin hypercube criterion see 
             `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
+        :param int num_groups: number of groups of processors that run the
+            configurations concurrently, see :meth:`run_sweep`
         
         :rtype: tuple
         :returns: (discretization, , num_high_prob_samples,
@@ -363,20 +1114,132 @@ class sampler(bsam.sampler):
         for i, j, z in zip(increase, decrease, tolerance):
             kern_list.append(rhoD_kernel(maximum, rho_D, i, j, z)) 
         return self.run_gen(kern_list, rho_D, maximum, input_domain,
-                t_set, savefile, initial_sample_type, criterion)
+                t_set, savefile, initial_sample_type, criterion, num_groups)
+
+    def _completed_batch(self, length, engine, savefile, disc, mdat,
+            checkpoint, controller=None):
+        """
+        Logs the progress of the chains and saves them to ``savefile`` if
+        ``length`` is a checkpoint. Called on all processors once for each
+        batch.
+
+        :param int length: number of batches completed by all local chains
+        :param engine: the chains
+        :type engine: :class:`~bet.sampling.adaptiveSampling.chain_engine`
+        :param string savefile: filename to save samples and data
+        :param disc: discretization to save the chains in
+        :type disc: :class:`~bet.sample.discretization`
+        :param dict mdat: dictonary of sampler parameters
+        :param int checkpoint: save the chains every ``checkpoint`` batches
+        :param controller: retires and restarts stagnated chains
+        :type controller:
+            :class:`~bet.sampling.adaptiveSampling.budget_controller`
+
+        """
+        if self.chain_length < 4:
+            pass
+        elif comm.rank == 0 and length%(self.chain_length/4) == 0:
+            logging.info("Current chain length: "+\
+                        str(length)+"/"+str(self.chain_length))
+        if checkpoint and (length%checkpoint == 0 or \
+                length == self.chain_length):
+            engine.to_discretization(disc)
+            mdat['step_ratios'] = engine.get_step_ratios_local()
+            mdat['kern_old'] = engine.kern_old
+            if controller is not None:
+                mdat['restarts'] = engine.get_restarts_local()
+            super(sampler, self).save(mdat, savefile, disc, globalize=False)
+
+    def async_chains(self, engine, t_set, kern, domain, executor, savefile,
+            disc, mdat, checkpoint=1, screen=None, controller=None):
+        """
+        Advances the chains of ``engine`` asynchronously until they have
+        ``chain_length`` samples. The chains do not wait for each other: the
+        next proposal of a chain is submitted to ``executor`` as soon as the
+        model evaluation of its previous proposal returns and the kernel
+        value and step ratio of each chain are updated on their own. With
+        variable model run times no chain waits for the slowest sample of a
+        batch.
+
+        The chains are saved when all of them have completed a checkpoint,
+        samples of the chains beyond the shortest chain are not saved until
+        the shortest chain catches up.
+
+        :param engine: the local chains
+        :type engine: :class:`~bet.sampling.adaptiveSampling.chain_engine`
+        :param t_set: method for creating new parameter steps
+        :type t_set: :class:`bet.sampling.adaptiveSampling.transition_set`
+        :param kern: functional that acts on the data used to
+            determine the proposed change to the ``step_size``
+        :type kern: :class:`bet.sampling.adaptiveSampling.kernel`
+        :param domain: min, max value for each input dimension
+        :type domain: :class:`numpy.ndarray` of shape (ndim, 2)
+        :param executor: executor to evaluate ``lb_model``
+        :type executor: :class:`concurrent.futures.Executor`
+        :param string savefile: filename to save samples and data
+        :param disc: discretization to save the chains in
+        :type disc: :class:`~bet.sample.discretization`
+        :param dict mdat: dictonary of sampler parameters
+        :param int checkpoint: save the chains every ``checkpoint`` batches
+        :param screen: screens the proposals with a surrogate before the
+            model is solved
+        :type screen: :class:`~bet.sampling.adaptiveSampling.surrogate_screen`
+        :param controller: retires and restarts stagnated chains
+        :type controller:
+            :class:`~bet.sampling.adaptiveSampling.budget_controller`
+
+        """
+        import concurrent.futures as futures
+        running = dict()
+
+        def submit(k):
+            """
+            Submits the next proposal of chain ``k``.
+            """
+            proposal = engine.propose_chain(k, t_set, domain)
+            if controller is not None:
+                controller.restart(engine, [k], domain)
+            if screen is not None:
+                screen.screen(engine, [k], t_set, kern, domain)
+            running[executor.submit(self.lb_model, proposal)] = k
+
+        for k in xrange(self.num_chains_pproc):
+            if engine.lengths[k] < self.chain_length:
+                submit(k)
+        length = engine.length
+        while len(running) > 0:
+            (done, _) = futures.wait(running.keys(),
+                    return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                k = running.pop(future)
+                engine.accept_chain(k, future.result(), kern,
+                        t_set.min_ratio, t_set.max_ratio)
+                if controller is not None:
+                    controller.accepted(engine, [k], kern, t_set)
+                if engine.lengths[k] < self.chain_length:
+                    submit(k)
+            while length < engine.length:
+                length += 1
+                self._completed_batch(length, engine, savefile, disc, mdat,
+                        checkpoint, controller)
 
     def generalized_chains(self, input_obj, t_set, kern,
             savefile, initial_sample_type="random", criterion='center',
-            hot_start=0): 
+            hot_start=0, checkpoint=1, executor=None, screen=None,
+            controller=None, seed=None): 
         """
-        Basic adaptive sampling algorithm using generalized chains.
+        Basic adaptive sampling algorithm using generalized chains. The
+        chains are advanced in the preallocated arrays of a
+        :class:`~bet.sampling.adaptiveSampling.chain_engine`, in lockstep
+        or, if an ``executor`` is given, asynchronously (see
+        :meth:`async_chains`).
 
         .. todo::
 
             Test HOTSTART from parallel files using different num proc
 
         :param string initial_sample_type: type of initial sample random (or r),
-            latin hypercube(lhs), or space-filling curve(TBD)
+            latin hypercube(lhs), or space-filling curve(sfc)
         :param input_obj: Either a :class:`bet.sample.sample_set` object for an
             input space, an array of min and max bounds for the input values
             with ``min = input_domain[:, 0]`` and ``max = input_domain[:, 1]``,
@@ -397,6 +1260,24 @@ class sampler(bsam.sampler):
             start from finished run
         :param string criterion: latin hypercube criterion see 
             `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
+        :param int checkpoint: save the chains to ``savefile`` every
+            ``checkpoint`` batches (needed for a hot start from an
+            uncompleted run), if 0 they are only saved at the end
+        :param executor: executor to evaluate ``lb_model`` for each chain
+            asynchronously, e.g. a
+            :class:`concurrent.futures.ThreadPoolExecutor` or a
+            :class:`mpi4py.futures.MPIPoolExecutor`
+        :type executor: :class:`concurrent.futures.Executor`
+        :param screen: screens the proposals with a surrogate before the
+            model is solved
+        :type screen: :class:`~bet.sampling.adaptiveSampling.surrogate_screen`
+        :param controller: retires stagnated chains and restarts them within
+            the same number of samples, the restarts are stored in
+            ``controller`` and ``savefile``
+        :type controller:
+            :class:`~bet.sampling.adaptiveSampling.budget_controller`
+        :param int seed: seed of the latin hypercube or the scramble of the
+            quasi-Monte Carlo initial samples
         
         :rtype: tuple
         :returns: (``discretization``, ``all_step_ratios``) where
@@ -417,25 +1298,17 @@ class sampler(bsam.sampler):
             # Initiative first batch of N samples (maybe taken from latin
             # hypercube/space-filling curve to fully explore parameter space -
             # not necessarily random). Call these Samples_old.
-            disc_old = super(sampler, self).create_random_discretization(
+            disc = super(sampler, self).create_random_discretization(
                     initial_sample_type, input_obj, savefile,
-                    self.num_chains, criterion, globalize=False)
+                    self.num_chains, criterion, globalize=False, seed=seed)
             self.num_samples = self.chain_length * self.num_chains
             comm.Barrier()
             
-            # populate local values 
-            #disc_old._input_sample_set.global_to_local()
-            #disc_old._output_sample_set.global_to_local()
-            input_old = disc_old._input_sample_set.copy()
-            
-            disc = disc_old.copy()
             all_step_ratios = step_ratio 
 
-            (kern_old, proposal) = kern.delta_step(disc_old.\
+            (kern_old, proposal) = kern.delta_step(disc.\
                     _output_sample_set.get_values_local(), None)
 
-            start_ind = 1
-
         if hot_start:
             # LOAD FILES
             _, disc, all_step_ratios, kern_old = loadmat(savefile,
@@ -443,61 +1316,62 @@ class sampler(bsam.sampler):
                     num_chains=self.num_chains)
             # MAKE SURE ARRAYS ARE LOCALIZED FROM HERE ON OUT WILL ONLY
             # OPERATE ON _local_values
-            # Set mdat, step_ratio, input_old, start_ind appropriately
-            step_ratio = all_step_ratios[-self.num_chains_pproc:]
-            input_old = sample.sample_set(disc._input_sample_set.get_dim())
-            input_old.set_domain(disc._input_sample_set.get_domain())
-            input_old.set_values_local(disc._input_sample_set.\
-                    get_values_local()[-self.num_chains_pproc:, :])
-
-            # Determine how many batches have been run
-            start_ind = disc._input_sample_set.get_values_local().\
-                    shape[0]/self.num_chains_pproc
         
+        # Store the chains in preallocated chain-major arrays, from here on
+        # ``disc`` is only updated at checkpoints
+        engine = chain_engine(self.num_chains_pproc, self.chain_length,
+                disc._input_sample_set.get_dim(),
+                disc._output_sample_set.get_dim())
+        engine.load(disc._input_sample_set.get_values_local(),
+                disc._output_sample_set.get_values_local(), all_step_ratios,
+                kern_old)
+        domain = disc._input_sample_set.get_domain()
+
         mdat = dict()
         self.update_mdict(mdat)
-        input_old.update_bounds_local()
 
-        for batch in xrange(start_ind, self.chain_length):
+        if executor is not None:
+            self.async_chains(engine, t_set, kern, domain, executor,
+                    savefile, disc, mdat, checkpoint, screen, controller)
+
+        for batch in xrange(engine.length, self.chain_length):
             # For each of N samples_old, create N new parameter samples using
             # transition set and step_ratio. Call these samples input_new.
-            input_new = t_set.step(step_ratio, input_old)
+            input_new_values = engine.propose(t_set, domain)
+            if controller is not None:
+                controller.restart(engine, np.arange(self.num_chains_pproc),
+                        domain)
+            if screen is not None:
+                screen.screen(engine, np.arange(self.num_chains_pproc), t_set,
+                        kern, domain)
         
             # Solve the model for the input_new.
-            output_new_values = self.lb_model(input_new.get_values_local())
+            output_new_values = self.lb_model(input_new_values)
             
             # Make some decision about changing step_size(k).  There are
             # multiple ways to do this.
             # Determine step size
-            (kern_old, proposal) = kern.delta_step(output_new_values, kern_old)
-            step_ratio = proposal*step_ratio
-            # Is the ratio greater than max?
-            step_ratio[step_ratio > max_ratio] = max_ratio
-            # Is the ratio less than min?
-            step_ratio[step_ratio < min_ratio] = min_ratio
+            engine.accept(output_new_values, kern, min_ratio, max_ratio)
+            if controller is not None:
+                controller.accepted(engine, np.arange(self.num_chains_pproc),
+                        kern, t_set)
 
             # Save and export concatentated arrays
-            if self.chain_length < 4:
-                pass
-            elif comm.rank == 0 and (batch+1)%(self.chain_length/4) == 0:
-                logging.info("Current chain length: "+\
-                            str(batch+1)+"/"+str(self.chain_length))
-            disc._input_sample_set.append_values_local(input_new.\
-                    get_values_local())
-            disc._output_sample_set.append_values_local(output_new_values)
-            all_step_ratios = np.concatenate((all_step_ratios, step_ratio))
-            mdat['step_ratios'] = all_step_ratios
-            mdat['kern_old'] = kern_old
-            
-            super(sampler, self).save(mdat, savefile, disc, globalize=False)
-            input_old = input_new
+            self._completed_batch(batch+1, engine, savefile, disc, mdat,
+                    checkpoint, controller)
+
+        if screen is not None:
+            logging.info("rank {}: {} of {} proposals rejected by the "
+                    "surrogate, {} verified".format(comm.rank,
+                        screen.num_rejected, screen.num_screened,
+                        screen.num_verified))
 
         # collect everything
+        engine.to_discretization(disc)
+        kern_old = engine.kern_old
         disc._input_sample_set.update_bounds_local() 
-        #disc._input_sample_set.local_to_global()
-        #disc._output_sample_set.local_to_global()
 
-        MYall_step_ratios = np.copy(all_step_ratios) 
+        MYall_step_ratios = engine.get_step_ratios_local()
         # ``all_step_ratios`` is np.ndarray of shape (num_chains,
         # chain_length)
         all_step_ratios = util.get_global_values(MYall_step_ratios,
@@ -509,10 +1383,47 @@ class sampler(bsam.sampler):
         mdat['step_ratios'] = all_step_ratios
         mdat['kern_old'] = util.get_global_values(kern_old,
                 shape=(self.num_chains,))
+        if controller is not None:
+            controller.restarts = np.reshape(util.get_global_values(
+                engine.get_restarts_local(), shape=(self.num_samples,)),
+                (self.num_chains, self.chain_length), 'F')
+            controller.stagnated_chains = util.get_global_values(
+                    controller.stagnated(engine,
+                        np.arange(self.num_chains_pproc)),
+                    shape=(self.num_chains,))
+            mdat['restarts'] = controller.restarts
+            mdat['stagnated_chains'] = controller.stagnated_chains
         super(sampler, self).save(mdat, savefile, disc, globalize=True)
 
         return (disc, all_step_ratios)
         
+def sweep_table(configurations, results_rD, mean_ss):
+    """
+    Creates a table comparing the configurations of a sweep.
+
+    :param list configurations: pairs of
+        :class:`~bet.sampling.adaptiveSampling.transition_set` and
+        :class:`~bet.sampling.adaptiveSampling.kernel`
+    :param list results_rD: number of samples of each configuration in
+        regions of high probability
+    :param list mean_ss: average step ratio of each configuration
+
+    :rtype: :class:`numpy.ndarray` of records with fields ``configuration``,
+        ``kernel``, ``init_ratio``, ``min_ratio``, ``max_ratio``,
+        ``num_high_prob_samples``, and ``mean_step_ratio``
+    :returns: a row for each configuration, the configuration with the most
+        samples in regions of high probability first
+    """
+    dtype = [('configuration', int), ('kernel', 'S32'),
+            ('init_ratio', float), ('min_ratio', float), ('max_ratio', float),
+            ('num_high_prob_samples', int), ('mean_step_ratio', float)]
+    table = np.array([(i, type(kern).__name__, t_set.init_ratio,
+        t_set.min_ratio, t_set.max_ratio, num, mean) for i, ((t_set, kern),
+            num, mean) in enumerate(zip(configurations, results_rD,
+                mean_ss))], dtype=dtype)
+    order = np.argsort(-table['num_high_prob_samples'], kind='mergesort')
+    return table[order]
+
 def kernels(Q_ref, rho_D, maximum):
     """
     Generates a list of kernstic objects.
@@ -534,6 +1445,15 @@ def kernels(Q_ref, rho_D, maximum):
     kern_list.append(maxima_kernel(np.array([Q_ref]), rho_D))
     return kern_list
 
+#: boundary handling of :class:`transition_set`
+boundary_types = ['truncate', 'reflect']
+
+class wrong_boundary(Exception):
+    """
+    Exception for when the boundary handling of a transition set is not
+    supported.
+    """
+
 class transition_set(object):
     """
     Basic class that is used to create a step to move from samples_old to
@@ -542,30 +1462,52 @@ class transition_set(object):
     different implementations of the
     :meth:~`polysim.run_framework.apdative_sampling.step` method.
     This basic transition set is designed without a preferential direction.
+
+    Steps that could leave the domain are handled in one of two ways:
+
+        * ``'truncate'`` the box around the old sample is truncated at the
+            boundary of the domain and the new sample is drawn from the
+            truncated box,
+        * ``'reflect'`` the new sample is drawn from the whole box and
+            reflected back into the domain at its boundary, so the proposal
+            is symmetric.
     
     """
 
-    def __init__(self, init_ratio, min_ratio, max_ratio):
+    def __init__(self, init_ratio, min_ratio, max_ratio,
+            boundary='truncate'):
         """
         Initialization
 
         :param float init_ratio: initial step ratio
         :param float min_ratio: minimum step_ratio
         :param float max_ratio: maximum step_ratio
+        :param string boundary: handling of steps that could leave the
+            domain, ``'truncate'`` or ``'reflect'``
 
         """
+        if boundary not in boundary_types:
+            raise wrong_boundary("boundary must be one of "
+                    "{}".format(boundary_types))
         #: float, initial step ratio
         self.init_ratio = init_ratio
         #: float,  minimum step_ratio
         self.min_ratio = min_ratio
         #: float, maximum step_ratio
         self.max_ratio = max_ratio
+        #: string, handling of steps that could leave the domain
+        self.boundary = boundary
     
     def step(self, step_ratio, input_old): 
         """
         Generate ``num_samples`` new steps using ``step_ratio`` and
         ``input_width`` to calculate the ``step size``. Each step will have a
         random direction.
+
+        The new sample set shares the domain, local bounds, ``p_norm`` and
+        reference value of ``input_old``, no other attributes are copied. Use
+        :meth:`step_values` to take several steps without creating sample
+        sets.
         
         :param step_ratio: define maximum step_size = ``step_ratio*input_width``
         :type step_ratio: :class:`numpy.ndarray` of shape (num_samples,)
@@ -577,28 +1519,81 @@ class transition_set(object):
         :returns: input_new
         
         """
-        # calculate maximum step size
-        step_size = np.repeat([step_ratio], input_old.get_dim(),
-                0).transpose()*input_old._width_local
-        # check to see if step will take you out of parameter space
-        # calculate maximum proposed step
-        my_right = input_old.get_values_local() + 0.5*step_size
-        my_left = input_old.get_values_local() - 0.5*step_size
-        # Is the new sample greaters than the right limit?
-        far_right = my_right >= input_old._right_local
-        far_left = my_left <= input_old._left_local
-        # If the input could leave the domain then truncate the box defining
-        # the step_size
-        my_right[far_right] = input_old._right_local[far_right]
-        my_left[far_left] = input_old._left_local[far_left]
-        my_width = my_right-my_left
-        #input_center = (input_right+input_left)/2.0
-        input_new_values = my_width * np.random.random(input_old.shape_local())
-        input_new_values = input_new_values + my_left
-        input_new = input_old.copy()
-        input_new.set_values_local(input_new_values)
+        if input_old._domain is not None:
+            (left, right) = (input_old._domain[:, 0], input_old._domain[:, 1])
+        else:
+            (left, right) = (input_old._left_local, input_old._right_local)
+        input_new = type(input_old)(input_old.get_dim())
+        input_new._domain = input_old._domain
+        input_new._left_local = input_old._left_local
+        input_new._right_local = input_old._right_local
+        input_new._width_local = input_old._width_local
+        input_new._p_norm = input_old._p_norm
+        input_new._reference_value = input_old._reference_value
+        input_new.set_values_local(self.step_values(step_ratio,
+            input_old.get_values_local(), left, right))
+        if input_old._values is not None:
+            input_new.set_values(util.get_global_values(\
+                    input_new.get_values_local()))
         return input_new
 
+    def step_values(self, step_ratio, values, left, right, out=None):
+        """
+        Generate a new step from each row of ``values`` using ``step_ratio``
+        and the width of the box ``[left, right]`` to calculate the ``step
+        size``. This is :meth:`step` on arrays: no sample sets are created,
+        all chains are stepped at once and the steps can be written into a
+        preallocated array.
+
+        :param step_ratio: define maximum step_size = ``step_ratio*width``
+        :type step_ratio: :class:`numpy.ndarray` of shape (num_samples,)
+        :param values: samples from the previous step
+        :type values: :class:`numpy.ndarray` of shape (num_samples, ndim)
+        :param left: lower bounds of the input space
+        :type left: :class:`numpy.ndarray` of shape (ndim,) or (num_samples,
+            ndim)
+        :param right: upper bounds of the input space
+        :type right: :class:`numpy.ndarray` of shape (ndim,) or
+            (num_samples, ndim)
+        :param out: array to store the new samples in
+        :type out: :class:`numpy.ndarray` of shape (num_samples, ndim)
+
+        :rtype: :class:`numpy.ndarray` of shape (num_samples, ndim)
+        :returns: the new samples (``out`` if given)
+
+        """
+        # calculate maximum step size
+        width = right - left
+        half_step = 0.5*np.expand_dims(step_ratio, 1)*width
+        if out is None:
+            out = np.empty(np.shape(values))
+        if self.boundary == 'reflect':
+            # draw from the whole box and fold the step back into the domain,
+            # dimensions without width stay at the bound
+            fixed = np.equal(width, 0)
+            if np.any(fixed):
+                width = np.where(fixed, 1.0, width)
+            out[:] = np.random.random(np.shape(values))
+            out -= 0.5
+            out *= 2.0*half_step
+            out += values
+            out -= left
+            np.mod(out, 2.0*width, out=out)
+            np.minimum(out, 2.0*width-out, out=out)
+            out += left
+            if np.any(fixed):
+                np.copyto(out, left, where=fixed)
+            return out
+        # truncate the box defining the step_size if the input could leave
+        # the domain
+        my_left = np.maximum(values - half_step, left)
+        my_width = np.minimum(values + half_step, right)
+        my_width -= my_left
+        out[:] = np.random.random(np.shape(values))
+        out *= my_width
+        out += my_left
+        return out
+
 class kernel(object):
     """
     Parent class for kernels to determine change in step size. This class
@@ -624,6 +1619,19 @@ class kernel(object):
         #: float, The multiple to decrease the step size by
         self.decrease = decrease
 
+    def evaluate(self, output_new):
+        """
+        Evaluates the kernel for a batch of QoI. This kernel has no values.
+
+        :param output_new: QoI for a given batch of samples 
+        :type output_new: :class:`numpy.ndarray` of shape (num_chains, mdim)
+
+        :rtype: :class:`numpy.ndarray` of shape (num_chains,) or ``None``
+        :returns: kernel values
+
+        """
+        return None
+
     def delta_step(self, output_new, kern_old=None):
         """
         This method determines the proposed change in step size. 
@@ -671,6 +1679,19 @@ class rhoD_kernel(kernel):
         self.sort_ascending = False
         super(rhoD_kernel, self).__init__(tolerance, increase, decrease)
 
+    def evaluate(self, output_new):
+        """
+        Evaluates the kernel, ``rho_D``, for a batch of QoI.
+
+        :param output_new: QoI for a given batch of samples 
+        :type output_new: :class:`numpy.ndarray` of shape (num_chains, mdim)
+
+        :rtype: :class:`numpy.ndarray` of shape (num_chains,)
+        :returns: kernel values
+
+        """
+        return self.rho_D(output_new)
+
     def delta_step(self, output_new, kern_old=None):
         """
         This method determines the proposed change in step size. 
@@ -684,7 +1705,7 @@ class rhoD_kernel(kernel):
         
         """
         # Evaluate kernel for new data.
-        kern_new = self.rho_D(output_new)
+        kern_new = self.evaluate(output_new)
         
         if kern_old is None:
             return (kern_new, None)
@@ -707,6 +1728,12 @@ class rhoD_kernel(kernel):
             return (kern_new, proposal.transpose())
 
 
+#: number of maxima above which :class:`maxima_kernel` uses a kd-tree
+kdtree_min_maxima = 64
+#: maximum number of entries of the temporary arrays of
+#: :meth:`maxima_kernel.weighted_distance`
+_max_chunk_entries = 2**20
+
 class maxima_kernel(kernel):
     """
     We assume we know the maxima of the distribution rho_D on the QoI and that
@@ -743,6 +1770,58 @@ class maxima_kernel(kernel):
         super(maxima_kernel, self).__init__(tolerance, increase, decrease)
         #: bool, flag sort order
         self.sort_ascending = True
+        #: :class:`scipy.spatial.cKDTree` of the maxima, only used if there
+        #: are many maxima with the same value of rho_D
+        self._kdtree = None
+        rho_max = np.ravel(self.rho_max)
+        if self.num_maxima > kdtree_min_maxima and np.all(rho_max ==
+                rho_max[0]):
+            import scipy.spatial as spatial
+            self._kdtree = spatial.cKDTree(np.reshape(maxima,
+                (self.num_maxima, -1)))
+
+    def weighted_distance(self, output_new):
+        """
+        Computes the minimum distance of each QoI to the maxima weighted by
+        ``1/rho_D(maxima)`` for the whole batch at once.
+
+        :param output_new: QoI for a given batch of samples 
+        :type output_new: :class:`numpy.ndarray` of shape (num_chains, mdim)
+
+        :rtype: :class:`numpy.ndarray` of shape (num_chains,)
+        :returns: minimum weighted distance from the maxima
+        """
+        output_new = np.reshape(output_new, (-1, self.MAXIMA.shape[-1]))
+        rho_max = np.ravel(self.rho_max)
+        if self._kdtree is not None:
+            return self._kdtree.query(output_new)[0]/rho_max[0]
+        kern_new = np.empty((output_new.shape[0],))
+        # bound the size of the (chunk, num_maxima, mdim) differences
+        chunk = max(1, _max_chunk_entries/(self.num_maxima*\
+                output_new.shape[1]))
+        for first in xrange(0, output_new.shape[0], chunk):
+            # calculate distance from each of the maxima
+            vec_from_maxima = output_new[first:first+chunk, np.newaxis, :] -\
+                    self.MAXIMA
+            # weight distances by 1/rho_D(maxima)
+            dist_from_maxima = np.linalg.norm(vec_from_maxima, 2, 2)/rho_max
+            # set kern_new to be the minimum of weighted distances from maxima
+            kern_new[first:first+chunk] = np.min(dist_from_maxima, 1)
+        return kern_new
+
+    def evaluate(self, output_new):
+        """
+        Evaluates the kernel, the weighted distance to the nearest maximum,
+        for a batch of QoI.
+
+        :param output_new: QoI for a given batch of samples 
+        :type output_new: :class:`numpy.ndarray` of shape (num_chains, mdim)
+
+        :rtype: :class:`numpy.ndarray` of shape (num_chains,)
+        :returns: kernel values
+
+        """
+        return self.weighted_distance(output_new)
 
     def delta_step(self, output_new, kern_old=None):
         """
@@ -757,17 +1836,7 @@ class maxima_kernel(kernel):
         
         """
         # Evaluate kernel for new data.
-        kern_new = np.zeros((output_new.shape[0]))
-
-        for i in xrange(output_new.shape[0]):
-            # calculate distance from each of the maxima
-            vec_from_maxima = np.repeat([output_new[i, :]], self.num_maxima, 0)
-            vec_from_maxima = vec_from_maxima - self.MAXIMA
-            # weight distances by 1/rho_D(maxima)
-            dist_from_maxima = np.linalg.norm(vec_from_maxima, 2,
-                1)/self.rho_max
-            # set kern_new to be the minimum of weighted distances from maxima
-            kern_new[i] = np.min(dist_from_maxima)
+        kern_new = self.evaluate(output_new)
         
         if kern_old is None:
             return (kern_new, None)
@@ -847,24 +1916,13 @@ class maxima_mean_kernel(maxima_kernel):
         
         """
         # Evaluate kernel for new data.
-        kern_new = np.zeros((output_new.shape[0]))
+        kern_new = self.evaluate(output_new)
         self.current_clength = self.current_clength + 1
-
-        for i in xrange(output_new.shape[0]):
-            # calculate distance from each of the maxima
-            vec_from_maxima = np.repeat([output_new[i, :]], self.num_maxima, 0)
-            vec_from_maxima = vec_from_maxima - self.MAXIMA
-            # weight distances by 1/rho_D(maxima)
-            dist_from_maxima = np.linalg.norm(vec_from_maxima, 2,
-                1)/self.rho_max
-            # set kern_new to be the minimum of weighted distances from maxima
-            kern_new[i] = np.min(dist_from_maxima)
         if kern_old is None:
             # calculate the mean
             self.mean = np.mean(output_new, 0)
             # calculate the distance from the mean
-            vec_from_mean = output_new - np.repeat([self.mean],
-                    output_new.shape[0], 0)
+            vec_from_mean = output_new - self.mean
             # estimate the radius of D
             self.radius = np.max(np.linalg.norm(vec_from_mean, 2, 1))
             return (kern_new, None)
@@ -874,8 +1932,7 @@ class maxima_mean_kernel(maxima_kernel):
                     0) 
             self.mean = self.mean / self.current_clength
             # calculate the distance from the mean
-            vec_from_mean = output_new - np.repeat([self.mean],
-                    output_new.shape[0], 0)
+            vec_from_mean = output_new - self.mean
             # esitmate the radius of D
             self.radius = max(np.max(np.linalg.norm(vec_from_mean, 2, 1)),
                     self.radius)
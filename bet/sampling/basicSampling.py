@@ -12,12 +12,12 @@ assume the measure on both spaces in Lebesgue.
 
 import collections
 import os
+import math
 import warnings
 import glob
+import traceback
 import numpy as np
-import scipy.io as sio
-from pyDOE import lhs
-from bet.Comm import comm
+from bet.Comm import comm, MPI
 import bet.sample as sample
 
 class bad_object(Exception):
@@ -41,6 +41,7 @@ def loadmat(save_file, disc_name=None, model=None):
     :returns: (sampler, discretization)
 
     """
+    import scipy.io as sio
     # check to see if parallel save
     if not (os.path.exists(save_file) or os.path.exists(save_file+'.mat')):
         save_dir = os.path.dirname(save_file)
@@ -59,20 +60,24 @@ def loadmat(save_file, disc_name=None, model=None):
     return (loaded_sampler, discretization)
 
 def random_sample_set(sample_type, input_obj, num_samples,
-        criterion='center', globalize=True):
+        criterion='center', globalize=True, seed=None):
     """
     Sampling algorithm with three basic options
 
         * ``random`` (or ``r``) generates ``num_samples`` samples in
             ``lam_domain`` assuming a Lebesgue measure.
         * ``lhs`` generates a latin hyper cube of samples.
+        * ``sobol`` or ``halton`` generates scrambled quasi-Monte Carlo
+            samples, see :mod:`~bet.sampling.quasiMonteCarlo`.
+        * ``sfc`` generates random samples ordered along a Hilbert curve,
+            see :mod:`~bet.sampling.spaceFillingCurve`.
 
     Note: This function is designed only for generalized rectangles and
     assumes a Lebesgue measure on the parameter space.
    
     :param string sample_type: type sampling random (or r),
-        latin hypercube(lhs), regular grid (rg), or space-filling
-        curve(TBD)
+        latin hypercube(lhs), quasi-Monte Carlo (sobol or halton), or
+        space-filling curve(sfc)
     :param input_obj: :class:`~bet.sample.sample_set` object containing
         the dimension/domain to sample from, domain to sample from, or the
         dimension
@@ -84,6 +89,9 @@ def random_sample_set(sample_type, input_obj, num_samples,
         `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
     :param bool globalize: Makes local variables global. Only applies if
         ``parallel==True``.
+    :param int seed: seed of the latin hypercube or the scramble of the
+        quasi-Monte Carlo samples shared by all processors, if ``None`` rank 0
+        draws one from :mod:`numpy.random`
     
     :rtype: :class:`~bet.sample.sample_set`
     :returns: :class:`~bet.sample.sample_set` object which contains
@@ -111,15 +119,26 @@ def random_sample_set(sample_type, input_obj, num_samples,
         input_sample_set.set_domain(input_domain)
      
     if sample_type == "lhs":
-        # update the bounds based on the number of samples
-        input_sample_set.update_bounds(num_samples)
-        input_values = np.copy(input_sample_set._width)
-        input_values = input_values * lhs(dim,
-            num_samples, criterion)
-        input_values = input_values + input_sample_set._left
-        input_sample_set.set_values_local(np.array_split(input_values,
-            comm.size)[comm.rank])
-    elif sample_type == "random" or "r":
+        import bet.sampling.latinHypercube as latinHypercube
+        # each processor only generates its rows of the design
+        input_values_local = latinHypercube.lhs_local(dim, num_samples,
+                criterion, seed)
+        input_sample_set.update_bounds_local(input_values_local.shape[0])
+        input_values_local = input_values_local * \
+                input_sample_set._width_local
+        input_values_local = input_values_local + input_sample_set._left_local
+        input_sample_set.set_values_local(input_values_local)
+    elif sample_type in ["sobol", "halton"]:
+        import bet.sampling.quasiMonteCarlo as quasiMonteCarlo
+        # each processor only generates its block of the sequence
+        input_values_local = quasiMonteCarlo.qmc_local(sample_type, dim,
+                num_samples, seed=seed)
+        input_sample_set.update_bounds_local(input_values_local.shape[0])
+        input_values_local = input_values_local * \
+                input_sample_set._width_local
+        input_values_local = input_values_local + input_sample_set._left_local
+        input_sample_set.set_values_local(input_values_local)
+    elif sample_type in ("random", "r", "sfc"):
         # define local number of samples
         num_samples_local = int((num_samples/comm.size) + \
             (comm.rank < num_samples%comm.size))
@@ -131,6 +150,12 @@ def random_sample_set(sample_type, input_obj, num_samples,
         input_values_local = input_values_local + input_sample_set._left_local
     
         input_sample_set.set_values_local(input_values_local)
+    else:
+        raise bad_object("Unknown sample_type {}".format(sample_type))
+
+    if sample_type == "sfc":
+        # samples close in space are close in memory and on the same processor
+        input_sample_set.reorder()
     
     comm.barrier()
 
@@ -140,7 +165,7 @@ def random_sample_set(sample_type, input_obj, num_samples,
         input_sample_set._values = None
     return input_sample_set
 
-def regular_sample_set(input_obj, num_samples_per_dim=1):
+def regular_sample_set(input_obj, num_samples_per_dim=1, globalize=True):
     """
     Sampling algorithm for generating a regular grid of samples taken
     on the domain present with ``input_obj`` (a default unit hypercube
@@ -154,19 +179,25 @@ def regular_sample_set(input_obj, num_samples_per_dim=1):
     :param num_samples_per_dim: number of samples per dimension
     :type num_samples_per_dim: :class:`~numpy.ndarray` of dimension
         ``(input_sample_set._dim,)``
+    :param bool globalize: Makes the global values, otherwise only the local
+        values are created from the grid
 
-    :rtype: :class:`~bet.sample.sample_set`
-    :returns: :class:`~bet.sample.sample_set` object which contains
-        input ``num_samples``
+    :rtype: :class:`~bet.sample.regular_grid_sample_set`
+    :returns: :class:`~bet.sample.regular_grid_sample_set` object which
+        contains input ``num_samples``
 
     """
     # check to see what the input object is
     if isinstance(input_obj, sample.sample_set):
-        input_sample_set = input_obj.copy()
+        input_sample_set = sample.regular_grid_sample_set(input_obj.get_dim())
+        if input_obj.get_domain() is not None:
+            input_sample_set.set_domain(input_obj.get_domain())
+        input_sample_set.set_p_norm(input_obj.get_p_norm())
+        input_sample_set._reference_value = input_obj._reference_value
     elif isinstance(input_obj, int):
-        input_sample_set = sample.sample_set(input_obj)
+        input_sample_set = sample.regular_grid_sample_set(input_obj)
     elif isinstance(input_obj, np.ndarray):
-        input_sample_set = sample.sample_set(input_obj.shape[0])
+        input_sample_set = sample.regular_grid_sample_set(input_obj.shape[0])
         input_sample_set.set_domain(input_obj)
     else:
         raise bad_object("Improper sample object")
@@ -179,46 +210,91 @@ def regular_sample_set(input_obj, num_samples_per_dim=1):
     if np.any(np.less_equal(num_samples_per_dim, 0)):
         warnings.warn('Warning: num_samples_per_dim must be greater than 0')
 
-    num_samples = np.product(num_samples_per_dim)
-
     if input_sample_set.get_domain() is None:
         # create the domain
         input_domain = np.array([[0., 1.]] * dim)
         input_sample_set.set_domain(input_domain)
     else:
         input_domain = input_sample_set.get_domain()
-    # update the bounds based on the number of samples
-    input_values = np.zeros((num_samples, dim))
 
-    vec_samples_dimension = np.empty((dim), dtype=object)
+    # the samples are the centers of num_samples_per_dim bins per dimension
+    vec_samples_dimension = []
     for i in np.arange(0, dim):
         bin_width = (input_domain[i, 1] - input_domain[i, 0]) / \
                     np.float(num_samples_per_dim[i])
-        vec_samples_dimension[i] = list(np.linspace(
+        vec_samples_dimension.append(np.linspace(
             input_domain[i, 0] - 0.5 * bin_width,
             input_domain[i, 1] + 0.5 * bin_width,
-            num_samples_per_dim[i] + 2))[1:num_samples_per_dim[i] + 1]
+            num_samples_per_dim[i] + 2)[1:int(num_samples_per_dim[i]) + 1])
 
-    if np.equal(dim, 1):
-        arrays_samples_dimension = np.array([vec_samples_dimension])
-    else:
-        arrays_samples_dimension = np.meshgrid(
-            *[vec_samples_dimension[i] for i in np.arange(0, dim)],
-            indexing='ij')
-
-    if np.equal(dim, 1):
-        input_values = arrays_samples_dimension.transpose()
-    else:
-        for i in np.arange(0, dim):
-            input_values[:, i:i+1] = np.vstack(arrays_samples_dimension[i]\
-                    .flat[:])
-
-    input_sample_set.set_values(input_values)
+    input_sample_set.setup(vec_samples_dimension)
+    if globalize:
+        input_sample_set.get_values()
     input_sample_set.global_to_local() 
 
     return input_sample_set
 
 
+class worker_failed(Exception):
+    """
+    Exception for when ``lb_model`` fails on a worker during a dynamic
+    schedule.
+    """
+
+class model_failed(Exception):
+    """
+    Exception for when ``lb_model`` fails at every sample.
+    """
+
+#: strings that :class:`sampler` accepts as ``executor``
+executor_types = [None, 'serial', 'threads', 'processes']
+
+#: schedules that :class:`sampler` accepts as ``schedule``
+schedule_types = ['static', 'dynamic']
+
+# message tags of the dynamic schedule
+_READY_TAG = 11
+_WORK_TAG = 12
+
+def _widen(output, width):
+    """
+    Pads the output of chunks at which ``lb_model`` failed at every sample
+    (and whose output dimension is therefore unknown) with ``NaN``.
+
+    :param output: values, error estimates, or Jacobians of a chunk
+    :type output: :class:`numpy.ndarray` or ``None``
+    :param int width: output dimension
+
+    :rtype: :class:`numpy.ndarray` or ``None``
+    :returns: ``output`` with an output dimension of ``width``
+    """
+    if output is None or _output_dim(output) == width:
+        return output
+    widened = np.empty((output.shape[0], width)+output.shape[2:])
+    widened.fill(np.nan)
+    return widened
+
+def _output_dim(output):
+    """
+    :param output: values, error estimates, or Jacobians of a chunk
+    :type output: :class:`numpy.ndarray`
+
+    :rtype: int
+    :returns: output dimension
+    """
+    return 1 if output.ndim < 2 else output.shape[1]
+
+def _cpu_count():
+    """
+    :rtype: int
+    :returns: the number of CPUs or 1 if it cannot be determined
+    """
+    import multiprocessing
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
 class sampler(object):
     """
     This class provides methods for adaptive sampling of parameter space to
@@ -232,7 +308,9 @@ class sampler(object):
         returns output
     """
     def __init__(self, lb_model, num_samples=None,
-                 error_estimates=False, jacobians=False):
+                 error_estimates=False, jacobians=False, executor=None,
+                 batch_size=None, cache=None, schedule='static',
+                 chunk_size=None, checkpoint_dir=None, max_retries=None):
         """
         Initialization
         
@@ -243,6 +321,32 @@ class sampler(object):
         :param bool error_estimates: Whether or not the model returns error
             estimates 
         :param bool jacobians: Whether or not the model returns Jacobians
+        :param executor: How to evaluate ``lb_model`` on the local samples,
+            ``None`` or ``'serial'`` evaluates the batches in this process,
+            ``'threads'`` or ``'processes'`` evaluates them in a
+            :mod:`concurrent.futures` thread or process pool, otherwise
+            ``executor`` is used to evaluate the batches
+        :type executor: string or :class:`concurrent.futures.Executor`
+        :param int batch_size: number of samples passed to ``lb_model`` at a
+            time, defaults to all local samples for a serial executor and
+            one sample otherwise, for ``'processes'`` ``lb_model`` must be
+            picklable
+        :param cache: cache of model evaluations or the name of its file
+        :type cache: :class:`~bet.sampling.evaluationCache.evaluation_cache`
+            or string
+        :param string schedule: ``'static'`` evaluates the local samples on
+            each processor, ``'dynamic'`` lets rank 0 hand out chunks of
+            samples to the other processors on demand
+        :param int chunk_size: number of samples per chunk of the dynamic
+            schedule or the chunked evaluation, defaults to a tenth of the
+            samples per processor
+        :param string checkpoint_dir: directory in which the outputs of each
+            completed chunk are saved, chunks found in this directory are not
+            evaluated again
+        :param int max_retries: number of times a sample at which
+            ``lb_model`` fails is reevaluated before its outputs are set to
+            ``NaN``, ``None`` raises the error unless ``checkpoint_dir`` is
+            set (then 0)
 
         """
         #: int, total number of samples OR list of number of samples per
@@ -255,6 +359,39 @@ class sampler(object):
         self.lb_model = lb_model
         self.error_estimates = error_estimates
         self.jacobians = jacobians
+        if not (executor in executor_types or hasattr(executor, 'submit')):
+            raise bad_object("executor must be one of {} or have a submit "
+                    "method".format(executor_types))
+        #: string or :class:`concurrent.futures.Executor` used to evaluate
+        #: ``lb_model``
+        self.executor = executor
+        #: int, number of samples passed to ``lb_model`` at a time
+        self.batch_size = batch_size
+        if cache is not None:
+            import bet.sampling.evaluationCache as evaluationCache
+            if isinstance(cache, basestring):
+                cache = evaluationCache.evaluation_cache(cache,
+                        evaluationCache.model_identity(lb_model))
+            elif cache.model_id is None:
+                cache.model_id = evaluationCache.model_identity(lb_model)
+        #: :class:`~bet.sampling.evaluationCache.evaluation_cache` of model
+        #: evaluations
+        self.cache = cache
+        if schedule not in schedule_types:
+            raise bad_object("schedule must be one of "
+                    "{}".format(schedule_types))
+        #: string, ``'static'`` or ``'dynamic'`` distribution of the samples
+        self.schedule = schedule
+        #: int, number of samples per chunk of the dynamic schedule or the
+        #: chunked evaluation
+        self.chunk_size = chunk_size
+        #: string, directory in which the outputs of completed chunks are saved
+        self.checkpoint_dir = checkpoint_dir
+        #: int, number of times a failed sample is reevaluated
+        self.max_retries = max_retries
+        #: :class:`numpy.ndarray` of global indices of the samples at which
+        #: ``lb_model`` failed during the last chunked evaluation
+        self.failed_samples = np.zeros((0,), dtype='int')
 
     def save(self, mdict, save_file, discretization=None, globalize=False):
         """
@@ -268,6 +405,7 @@ class sampler(object):
         :param bool globalize: Makes local variables global. 
 
         """
+        import scipy.io as sio
 
         if comm.size > 1 and not globalize:
             local_save_file = os.path.join(os.path.dirname(save_file),
@@ -293,20 +431,24 @@ class sampler(object):
         mdict['num_samples'] = self.num_samples
 
     def random_sample_set(self, sample_type, input_obj,
-            num_samples=None, criterion='center', globalize=True):
+            num_samples=None, criterion='center', globalize=True, seed=None):
         """
         Sampling algorithm with three basic options
 
             * ``random`` (or ``r``) generates ``num_samples`` samples in
                 ``lam_domain`` assuming a Lebesgue measure.
             * ``lhs`` generates a latin hyper cube of samples.
+            * ``sobol`` or ``halton`` generates scrambled quasi-Monte Carlo
+                samples, see :mod:`~bet.sampling.quasiMonteCarlo`.
+            * ``sfc`` generates random samples ordered along a Hilbert curve,
+                see :mod:`~bet.sampling.spaceFillingCurve`.
 
         Note: This function is designed only for generalized rectangles and
         assumes a Lebesgue measure on the parameter space.
        
         :param string sample_type: type sampling random (or r),
-            latin hypercube(lhs), regular grid (rg), or space-filling
-            curve(TBD)
+            latin hypercube(lhs), quasi-Monte Carlo (sobol or halton), or
+            space-filling curve(sfc)
         :param input_obj: :class:`~bet.sample.sample_set` object containing
             the dimension/domain to sample from, domain to sample from, or the
             dimension
@@ -317,6 +459,9 @@ class sampler(object):
         :param string criterion: latin hypercube criterion see 
             `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
         :param bool globalize: Makes local variables global. 
+        :param int seed: seed of the latin hypercube or the scramble of the
+            quasi-Monte Carlo samples shared by all processors, if ``None``
+            rank 0 draws one from :mod:`numpy.random`
         
         :rtype: :class:`~bet.sample.sample_set`
         :returns: :class:`~bet.sample.sample_set` object which contains
@@ -327,9 +472,10 @@ class sampler(object):
             num_samples = self.num_samples
         
         return random_sample_set(sample_type, input_obj, num_samples,
-                criterion, globalize)
+                criterion, globalize, seed)
 
-    def regular_sample_set(self, input_obj, num_samples_per_dim=1):
+    def regular_sample_set(self, input_obj, num_samples_per_dim=1,
+            globalize=True):
         """
         Sampling algorithm for generating a regular grid of samples taken
         on the domain present with ``input_obj`` (a default unit hypercube
@@ -343,15 +489,513 @@ class sampler(object):
         :param num_samples_per_dim: number of samples per dimension
         :type num_samples_per_dim: :class:`~numpy.ndarray` of dimension
             (dim,)
+        :param bool globalize: Makes the global values, otherwise only the
+            local values are created from the grid
 
-        :rtype: :class:`~bet.sample.sample_set`
-        :returns: :class:`~bet.sample.sample_set` object which contains
-            input ``num_samples``
+        :rtype: :class:`~bet.sample.regular_grid_sample_set`
+        :returns: :class:`~bet.sample.regular_grid_sample_set` object which
+            contains input ``num_samples``
         
         """
         self.num_samples = np.product(num_samples_per_dim)
-        return regular_sample_set(input_obj, num_samples_per_dim)
+        return regular_sample_set(input_obj, num_samples_per_dim, globalize)
         
+    def parse_model_output(self, output):
+        """
+        Splits the output of ``lb_model`` into values, error estimates, and
+        Jacobians.
+
+        :param output: output of ``lb_model``
+        :type output: :class:`numpy.ndarray` or tuple
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians) where the error
+            estimates and Jacobians are ``None`` if they are not returned
+        """
+        values, ee, jac = None, None, None
+        if isinstance(output, np.ndarray):
+            values = output
+        elif isinstance(output, tuple):
+            if len(output) == 1:
+                values = output[0]
+            elif len(output) == 2 and self.error_estimates:
+                (values, ee) = output
+            elif len(output) == 2 and self.jacobians:
+                (values, jac) = output
+            elif  len(output) == 3:
+                (values, ee, jac) = output
+        else:
+            raise bad_object("lb_model is not returning the proper type")
+        return (values, ee, jac)
+
+    def evaluate_model(self, input_values):
+        """
+        Evaluates ``lb_model`` at ``input_values`` in batches of
+        ``batch_size`` samples using ``executor``. The outputs of the batches
+        are concatenated in the order of ``input_values``. If the sampler has
+        a ``cache`` the model is only evaluated at the samples that are not
+        in the cache.
+
+        :param input_values: samples to evaluate the model at
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians) where the error
+            estimates and Jacobians are ``None`` if they are not returned
+        """
+        if self.cache is None or input_values.shape[0] == 0:
+            return self._evaluate_batches(input_values)
+
+        keys = self.cache.keys(input_values)
+        found = self.cache.get(keys)
+        # entries missing requested error estimates or Jacobians are misses
+        for key, entry in found.items():
+            if (self.error_estimates and entry[1] is None) or \
+                    (self.jacobians and entry[2] is None):
+                del found[key]
+        miss_rows = dict()
+        for i, key in enumerate(keys):
+            if key not in found and key not in miss_rows:
+                miss_rows[key] = i
+        miss_rows = sorted(miss_rows.values())
+        self.cache.misses += len(miss_rows)
+        self.cache.hits += len(keys)-len(miss_rows)
+
+        if len(miss_rows) > 0:
+            output = self._evaluate_batches(input_values[miss_rows])
+            miss_keys = [keys[i] for i in miss_rows]
+            self.cache.put(miss_keys, *output)
+            for j, key in enumerate(miss_keys):
+                found[key] = tuple(None if part is None else part[j] for \
+                        part in output)
+
+        output = []
+        for i in xrange(3):
+            parts = [found[key][i] for key in keys]
+            if any(part is None for part in parts):
+                output.append(None)
+            else:
+                output.append(np.array(parts))
+        return tuple(output)
+
+    def _evaluate_batches(self, input_values):
+        """
+        Evaluates ``lb_model`` at ``input_values`` in batches of
+        ``batch_size`` samples using ``executor``.
+
+        :param input_values: samples to evaluate the model at
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians) where the error
+            estimates and Jacobians are ``None`` if they are not returned
+        """
+        num = input_values.shape[0]
+        serial = self.executor in (None, 'serial')
+        batch_size = self.batch_size
+        if batch_size is None:
+            batch_size = num if serial else 1
+        batch_size = max(int(batch_size), 1)
+        batches = [input_values[i:i+batch_size] for i in xrange(0, num,
+            batch_size)]
+
+        if num == 0 or (serial and len(batches) == 1):
+            return self.parse_model_output(self.lb_model(input_values))
+        elif serial:
+            outputs = [self.lb_model(batch) for batch in batches]
+        elif self.executor in ('threads', 'processes'):
+            import concurrent.futures as futures
+            if self.executor == 'threads':
+                pool = futures.ThreadPoolExecutor
+            else:
+                # an unpicklable model would never return from the pool
+                import pickle
+                try:
+                    pickle.dumps(self.lb_model, pickle.HIGHEST_PROTOCOL)
+                except (pickle.PicklingError, TypeError, AttributeError):
+                    raise bad_object("lb_model must be picklable to be "
+                            "evaluated in a process pool")
+                pool = futures.ProcessPoolExecutor
+            with pool(max_workers=min(len(batches), _cpu_count())) as \
+                    executor:
+                outputs = list(executor.map(self.lb_model, batches))
+        else:
+            results = [self.executor.submit(self.lb_model, batch) for batch
+                    in batches]
+            outputs = [result.result() for result in results]
+
+        outputs = [self.parse_model_output(output) for output in outputs]
+        return tuple(None if outputs[0][i] is None else \
+                np.concatenate([output[i] for output in outputs]) \
+                for i in xrange(3))
+
+    def evaluate_model_dynamic(self, input_sample_set):
+        """
+        Evaluates ``lb_model`` at the samples of ``input_sample_set`` with a
+        master/worker schedule. Rank 0 hands out chunks of ``chunk_size``
+        samples to the other processors whenever they finish a chunk and
+        collects the outputs. The outputs are then returned in the same
+        local layout as ``input_sample_set._values_local``.
+
+        :param input_sample_set: samples to evaluate the model at
+        :type input_sample_set: :class:`~bet.sample.sample_set`
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians) of the local samples
+            where the error estimates and Jacobians are ``None`` if they are
+            not returned
+        """
+        if input_sample_set._values_local is None:
+            input_sample_set.global_to_local()
+        # the global order is the local samples in the order of the ranks,
+        # only rank 0 holds all samples and sends each chunk to its worker
+        local_nums = comm.allgather(input_sample_set._values_local.shape[0])
+        num = sum(local_nums)
+        if num == 0:
+            self.failed_samples = np.zeros((0,), dtype=np.int64)
+            return self.evaluate_model(input_sample_set._values_local)
+        input_values = comm.gather(input_sample_set._values_local, root=0)
+        if comm.rank == 0:
+            input_values = np.concatenate(input_values)
+        chunk_size = self.chunk_size
+        if chunk_size is None:
+            chunk_size = int(math.ceil(num/(10.0*(comm.size-1))))
+        chunk_size = max(int(chunk_size), 1)
+
+        self._make_checkpoint_dir()
+        (output, error) = (None, None)
+        if comm.rank == 0:
+            (chunks, error) = self._schedule_chunks(input_values, chunk_size)
+            if error is not None:
+                error = worker_failed("lb_model failed on a worker:\n" +
+                        error)
+            else:
+                try:
+                    output = self._assemble_chunks([chunks[i] for i in \
+                            sorted(chunks.keys())])
+                except model_failed as exc:
+                    error = exc
+        else:
+            self._work_on_chunks()
+        error = comm.bcast(error, root=0)
+        if error is not None:
+            raise error
+
+        if comm.rank == 0:
+            failed_samples = np.nonzero(output[3])[0]
+            bounds = np.cumsum([0]+local_nums)
+            local_output = [tuple(None if part is None else \
+                    part[bounds[r]:bounds[r+1]] for part in output[:3]) for r \
+                    in xrange(comm.size)]
+        else:
+            (failed_samples, local_output) = (None, None)
+        self.failed_samples = comm.bcast(failed_samples, root=0)
+        return comm.scatter(local_output, root=0)
+
+    def _schedule_chunks(self, input_values, chunk_size):
+        """
+        Sends chunks of ``input_values`` to the workers on demand until all
+        chunks are evaluated or a worker failed.
+
+        :param input_values: all samples
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+        :param int chunk_size: number of samples per chunk
+
+        :rtype: tuple
+        :returns: (chunks, error) where chunks is a dict of the outputs by
+            chunk number and error is the traceback of a failed worker or
+            ``None``
+        """
+        chunks = dict()
+        error = None
+        num = input_values.shape[0]
+        next_chunk, next_start = 0, 0
+        active_workers = comm.size-1
+        while active_workers > 0:
+            status = MPI.Status()
+            result = comm.recv(source=MPI.ANY_SOURCE, tag=_READY_TAG,
+                    status=status)
+            worker = status.Get_source()
+            if result is not None:
+                (chunk, output) = result
+                if isinstance(output, basestring):
+                    error = output if error is None else error
+                else:
+                    chunks[chunk] = output
+            if error is None and next_start < num:
+                stop = min(next_start+chunk_size, num)
+                comm.send((next_chunk, next_start,
+                    input_values[next_start:stop]), dest=worker,
+                    tag=_WORK_TAG)
+                next_chunk, next_start = next_chunk+1, stop
+            else:
+                comm.send(None, dest=worker, tag=_WORK_TAG)
+                active_workers -= 1
+        return (chunks, error)
+
+    def _work_on_chunks(self):
+        """
+        Requests chunks of samples from rank 0 and evaluates them until rank
+        0 has no more chunks.
+
+        """
+        result = None
+        while True:
+            comm.send(result, dest=0, tag=_READY_TAG)
+            work = comm.recv(source=0, tag=_WORK_TAG)
+            if work is None:
+                break
+            (chunk, start, chunk_values) = work
+            try:
+                result = (chunk, self._evaluate_chunk(chunk_values, start))
+            except Exception:
+                result = (chunk, traceback.format_exc())
+
+    def _fault_tolerant(self):
+        """
+        :rtype: bool
+        :returns: whether failed samples are retried and marked instead of
+            raising the error of ``lb_model``
+        """
+        return self.max_retries is not None or self.checkpoint_dir is not None
+
+    def _make_checkpoint_dir(self):
+        """
+        Creates ``checkpoint_dir`` if it does not exist.
+        """
+        if self.checkpoint_dir is not None:
+            if comm.rank == 0 and not os.path.exists(self.checkpoint_dir):
+                os.makedirs(self.checkpoint_dir)
+            comm.barrier()
+
+    def evaluate_model_chunked(self, input_sample_set):
+        """
+        Evaluates ``lb_model`` at the local samples of ``input_sample_set``
+        in chunks of ``chunk_size`` samples. If the sampler has a
+        ``checkpoint_dir`` the outputs of each chunk are saved as soon as the
+        chunk is evaluated and chunks that were saved by a previous
+        (interrupted) run are loaded instead of evaluated. Samples at which
+        ``lb_model`` fails are retried ``max_retries`` times, after that their
+        outputs are ``NaN`` and their global indices are stored in
+        ``failed_samples``.
+
+        :param input_sample_set: samples to evaluate the model at
+        :type input_sample_set: :class:`~bet.sample.sample_set`
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians) of the local samples
+            where the error estimates and Jacobians are ``None`` if they are
+            not returned
+        """
+        if input_sample_set._values_local is None:
+            input_sample_set.global_to_local()
+        local_values = input_sample_set._values_local
+        local_num = local_values.shape[0]
+        offset = sum(comm.allgather(local_num)[:comm.rank])
+        chunk_size = self.chunk_size
+        if chunk_size is None:
+            chunk_size = int(math.ceil(local_num/10.0))
+        chunk_size = max(int(chunk_size), 1)
+
+        self._make_checkpoint_dir()
+        chunks = [self._evaluate_chunk(local_values[start:start+chunk_size],
+            offset+start) for start in xrange(0, local_num, chunk_size)]
+        width = 0
+        for chunk in chunks:
+            width = max(width, _output_dim(chunk[0]))
+        width = comm.allreduce(width, op=MPI.MAX)
+        if len(chunks) == 0:
+            output = self.evaluate_model(local_values)
+            failed = np.zeros((0,), dtype=bool)
+        else:
+            output = self._assemble_chunks(chunks, width)
+            failed = output[3]
+        self.failed_samples = np.nonzero(np.concatenate(comm.allgather(
+            failed)))[0]
+        return output[:3]
+
+    def _evaluate_chunk(self, input_values, start):
+        """
+        Evaluates ``lb_model`` at a chunk of samples, loading and saving the
+        chunk in ``checkpoint_dir`` and retrying failed samples if the sampler
+        is fault tolerant.
+
+        :param input_values: samples of the chunk
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+        :param int start: global index of the first sample of the chunk
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians, failed) where failed is
+            a boolean array marking the samples at which ``lb_model`` failed
+        """
+        if not self._fault_tolerant():
+            output = self.evaluate_model(input_values)
+            return output + (np.zeros((input_values.shape[0],),
+                dtype=bool),)
+
+        chunk_file = None
+        output = None
+        if self.checkpoint_dir is not None:
+            chunk_file = os.path.join(self.checkpoint_dir,
+                    "chunk_{}_{}.npz".format(start,
+                        start+input_values.shape[0]))
+            output = self._load_chunk(chunk_file, input_values)
+        if output is None:
+            output = self._evaluate_with_retries(input_values)
+        elif np.any(output[3]):
+            # retry the samples that failed during a previous run
+            retry = np.nonzero(output[3])[0]
+            retried = self._evaluate_with_retries(input_values[retry])
+            width = max(_output_dim(output[0]), _output_dim(retried[0]))
+            output = [_widen(part, width) for part in output[:3]] + \
+                    [output[3]]
+            retried = [_widen(part, width) for part in retried[:3]] + \
+                    [retried[3]]
+            for part, retried_part in zip(output, retried):
+                if part is not None:
+                    part[retry] = retried_part
+            output = tuple(output)
+        else:
+            return output
+        if chunk_file is not None:
+            self._save_chunk(chunk_file, input_values, output)
+        return output
+
+    def _evaluate_with_retries(self, input_values):
+        """
+        Evaluates ``lb_model`` at ``input_values``. If this fails each sample
+        is evaluated on its own up to ``max_retries`` + 1 times.
+
+        :param input_values: samples to evaluate the model at
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians, failed) where the
+            outputs of failed samples are ``NaN``
+        """
+        num = input_values.shape[0]
+        try:
+            output = self.evaluate_model(input_values)
+            return (np.reshape(output[0], (num, -1)), None if output[1] is \
+                    None else np.reshape(output[1], (num, -1)), output[2],
+                    np.zeros((num,), dtype=bool))
+        except Exception:
+            rows = [None]*num
+            for i in xrange(num):
+                for _ in xrange(1+max(self.max_retries or 0, 0)):
+                    try:
+                        rows[i] = self.evaluate_model(input_values[i:i+1])
+                        break
+                    except Exception:
+                        pass
+        failed = np.array([row is None for row in rows], dtype=bool)
+        if np.any(failed):
+            warnings.warn("lb_model failed at {} sample(s)".format(
+                np.sum(failed)))
+
+        # use a successful sample to determine the shapes of the outputs
+        template = [row for row in rows if row is not None]
+        template = template[0] if len(template) > 0 else None
+        output = []
+        for i, requested in enumerate([True, self.error_estimates,
+            self.jacobians]):
+            if template is None:
+                if not requested:
+                    output.append(None)
+                    continue
+                shape = (num, 0) if i < 2 else (num, 0, input_values.shape[1])
+            elif template[i] is None:
+                output.append(None)
+                continue
+            else:
+                part = np.asarray(template[i])
+                shape = (num,) + ((1,) if part.ndim == 1 else part.shape[1:])
+            part = np.empty(shape)
+            part.fill(np.nan)
+            for j, row in enumerate(rows):
+                if row is not None:
+                    part[j] = np.reshape(row[i], shape[1:])
+            output.append(part)
+        return tuple(output) + (failed,)
+
+    def _save_chunk(self, chunk_file, input_values, output):
+        """
+        Saves the outputs of a chunk. The file is written under a temporary
+        name first so that an interrupted run does not leave a corrupt chunk.
+
+        :param string chunk_file: name of the ``.npz`` file
+        :param input_values: samples of the chunk
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+        :param tuple output: (values, error_estimates, jacobians, failed)
+
+        """
+        mdat = {'input_values': input_values, 'failed': output[3]}
+        for name, part in zip(['values', 'error_estimates', 'jacobians'],
+                output[:3]):
+            if part is not None:
+                mdat[name] = part
+        temp_file = chunk_file + ".proc{}.tmp".format(comm.rank)
+        with open(temp_file, 'wb') as chunk:
+            np.savez(chunk, **mdat)
+        os.rename(temp_file, chunk_file)
+
+    def _load_chunk(self, chunk_file, input_values):
+        """
+        Loads the outputs of a chunk saved by :meth:`_save_chunk`.
+
+        :param string chunk_file: name of the ``.npz`` file
+        :param input_values: samples of the chunk
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians, failed) or ``None`` if
+            there is no (valid) chunk for ``input_values``
+        """
+        if not os.path.exists(chunk_file):
+            return None
+        try:
+            with np.load(chunk_file) as mdat:
+                if not np.array_equal(mdat['input_values'], input_values):
+                    return None
+                output = tuple(mdat[name] if name in mdat.files else None \
+                        for name in ['values', 'error_estimates',
+                            'jacobians'])
+                failed = mdat['failed']
+        except Exception:
+            return None
+        if (self.error_estimates and output[1] is None) or \
+                (self.jacobians and output[2] is None):
+            return None
+        return output + (failed,)
+
+    def _assemble_chunks(self, chunks, width=None):
+        """
+        Concatenates the outputs of chunks.
+
+        :param list chunks: (values, error_estimates, jacobians, failed) of
+            the chunks in order
+        :param int width: output dimension, defaults to the largest output
+            dimension of the chunks
+
+        :rtype: tuple
+        :returns: (values, error_estimates, jacobians, failed)
+        """
+        if width is None:
+            width = max(_output_dim(chunk[0]) for chunk in chunks)
+        if width == 0 and all(np.all(chunk[3]) for chunk in chunks) and \
+                any(chunk[3].shape[0] > 0 for chunk in chunks):
+            raise model_failed("lb_model failed at every sample")
+        output = []
+        for i in xrange(4):
+            if chunks[0][i] is None:
+                output.append(None)
+            elif i == 3:
+                output.append(np.concatenate([chunk[i] for chunk in chunks]))
+            else:
+                output.append(np.concatenate([_widen(chunk[i], width) for \
+                        chunk in chunks]))
+        return tuple(output)
+
     def compute_QoI_and_create_discretization(self, input_sample_set,
             savefile=None, globalize=True):
         """
@@ -379,23 +1023,15 @@ class sampler(object):
         # Solve the model at the samples
         if input_sample_set._values_local is None: 
             input_sample_set.global_to_local()
-        local_output = self.lb_model(\
-                input_sample_set.get_values_local())
-        if isinstance(local_output, np.ndarray):
-            local_output_values = local_output
-        elif isinstance(local_output, tuple):
-            if len(local_output) == 1:
-                local_output_values = local_output[0]
-            elif len(local_output) == 2 and self.error_estimates:
-                (local_output_values, local_output_ee) = local_output
-            elif len(local_output) == 2 and self.jacobians:
-                (local_output_values, local_output_jac) = local_output
-            elif  len(local_output) == 3:
-                (local_output_values, local_output_ee, local_output_jac) = \
-                        local_output
+        if self.schedule == 'dynamic' and comm.size > 1:
+            (local_output_values, local_output_ee, local_output_jac) = \
+                    self.evaluate_model_dynamic(input_sample_set)
+        elif self._fault_tolerant():
+            (local_output_values, local_output_ee, local_output_jac) = \
+                    self.evaluate_model_chunked(input_sample_set)
         else:
-            raise bad_object("lb_model is not returning the proper type")
-            
+            (local_output_values, local_output_ee, local_output_jac) = \
+                    self.evaluate_model(input_sample_set.get_values_local())
                 
         # figure out the dimension of the output
         if len(local_output_values.shape) <= 1:
@@ -430,13 +1066,17 @@ class sampler(object):
 
     def create_random_discretization(self, sample_type, input_obj,
             savefile=None, num_samples=None, criterion='center',
-            globalize=True):
+            globalize=True, seed=None):
         """
         Sampling algorithm with three basic options
 
             * ``random`` (or ``r``) generates ``num_samples`` samples in
                 ``lam_domain`` assuming a Lebesgue measure.
             * ``lhs`` generates a latin hyper cube of samples.
+            * ``sobol`` or ``halton`` generates scrambled quasi-Monte Carlo
+                samples, see :mod:`~bet.sampling.quasiMonteCarlo`.
+            * ``sfc`` generates random samples ordered along a Hilbert curve,
+                see :mod:`~bet.sampling.spaceFillingCurve`.
 
         .. note:: 
         
@@ -445,8 +1085,8 @@ class sampler(object):
 
 
         :param string sample_type: type sampling random (or r),
-            latin hypercube(lhs), regular grid (rg), or space-filling
-            curve(TBD)
+            latin hypercube(lhs), quasi-Monte Carlo (sobol or halton), or
+            space-filling curve(sfc)
         :param input_obj: Either a :class:`bet.sample.sample_set` object for an
             input space, an array of min and max bounds for the input values
             with ``min = input_domain[:, 0]`` and ``max = input_domain[:, 1]``,
@@ -458,6 +1098,8 @@ class sampler(object):
         :param string criterion: latin hypercube criterion see
             `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
         :param bool globalize: Makes local variables global.
+        :param int seed: seed of the latin hypercube or the scramble of the
+            quasi-Monte Carlo samples
 
         :rtype: :class:`~bet.sample.discretization`
         :returns: :class:`~bet.sample.discretization` object which contains
@@ -469,7 +1111,7 @@ class sampler(object):
             num_samples = self.num_samples
 
         input_sample_set = self.random_sample_set(sample_type, input_obj,
-                num_samples, criterion, globalize)
+                num_samples, criterion, globalize, seed)
 
         return self.compute_QoI_and_create_discretization(input_sample_set, 
                 savefile, globalize)
@@ -0,0 +1,253 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module provides a distributed nearest neighbor index for sample sets
+that are too large to store (or to build a :class:`scipy.spatial.KDTree` of)
+on a single processor.
+
+The generating points are partitioned by spatial locality: they are sorted
+along a Hilbert curve (see :mod:`~bet.sampling.spaceFillingCurve`) with a
+parallel sample sort so that each processor owns a contiguous piece of the
+curve, i.e. a compact region of the domain, and builds a
+:class:`scipy.spatial.cKDTree` of its points. Queries are answered in two
+rounds of all-to-all communication:
+
+    1. each query point is sent to the processor whose bounding box is
+        closest to it (the processor containing it), which returns its
+        ``k`` nearest local neighbors,
+    2. the point is sent to every other processor whose bounding box
+        intersects the ball around the point with the distance to the
+        current ``k``-th neighbor (the halo), and the candidates are merged.
+
+The result is the same as a query of a tree of all points. Pointers are
+global indices into the original (``np.array_split``) layout of the points.
+"""
+
+import numpy as np
+from bet.Comm import comm
+import bet.sampling.spaceFillingCurve as spaceFillingCurve
+
+def _exchange(send):
+    """
+    Sends ``send[r]`` to processor ``r``.
+
+    :param list send: an object for each processor
+
+    :rtype: list
+    :returns: the object received from each processor
+    """
+    if comm.size == 1:
+        return send
+    return comm.alltoall(send)
+
+def box_distances(x, boxes, p_norm=2.0):
+    """
+    Computes the distances of points to boxes.
+
+    :param x: points
+    :type x: :class:`numpy.ndarray` of shape (num, dim)
+    :param list boxes: boxes as :class:`numpy.ndarray` of shape (dim, 2) or
+        ``None`` for empty boxes
+    :param float p_norm: p-norm of the distance
+
+    :rtype: :class:`numpy.ndarray` of shape (num, len(boxes))
+    :returns: distances, ``inf`` for empty boxes
+    """
+    distances = np.empty((x.shape[0], len(boxes)))
+    for r, box in enumerate(boxes):
+        if box is None:
+            distances[:, r] = np.inf
+        else:
+            gap = np.maximum(np.maximum(box[:, 0] - x, x - box[:, 1]), 0.0)
+            distances[:, r] = np.linalg.norm(gap, ord=p_norm, axis=1)
+    return distances
+
+def curve_partition(values_local, domain=None, oversampling=16):
+    """
+    Assigns points to processors so that each processor owns a contiguous
+    piece of a Hilbert curve through ``domain`` with about the same number of
+    points.
+
+    :param values_local: local points
+    :type values_local: :class:`numpy.ndarray` of shape (num_local, dim)
+    :param domain: domain of the curve, defaults to the bounding box of all
+        points
+    :type domain: :class:`numpy.ndarray` of shape (dim, 2)
+    :param int oversampling: number of keys per processor each processor
+        contributes to choose the splitters
+
+    :rtype: :class:`numpy.ndarray` of ints of shape (num_local,)
+    :returns: destination processor of each local point
+    """
+    dim = values_local.shape[1]
+    if comm.size == 1:
+        return np.zeros((values_local.shape[0],), dtype=np.int64)
+    if domain is None:
+        boxes = comm.allgather(_bounding_box(values_local))
+        boxes = [box for box in boxes if box is not None]
+        if len(boxes) == 0:
+            return np.zeros((0,), dtype=np.int64)
+        domain = np.column_stack((np.min([b[:, 0] for b in boxes], 0),
+            np.max([b[:, 1] for b in boxes], 0)))
+    # one word keys
+    bits = max(1, min(16, 64/dim))
+    keys = spaceFillingCurve.curve_keys(values_local, domain, 'hilbert',
+            bits)[:, 0]
+    # regular samples of the local keys weighted by the local count
+    sorted_keys = np.sort(keys)
+    num_picks = min(sorted_keys.shape[0], oversampling*comm.size)
+    picks = np.linspace(0, sorted_keys.shape[0]-1, num_picks).astype(int)
+    weight = sorted_keys.shape[0]/float(max(num_picks, 1))
+    gathered = comm.allgather((sorted_keys[picks], weight))
+    samples = np.concatenate([g[0] for g in gathered])
+    weights = np.concatenate([np.ones(g[0].shape)*g[1] for g in gathered])
+    order = np.argsort(samples, kind='mergesort')
+    cumulative = np.cumsum(weights[order])
+    targets = cumulative[-1]*np.arange(1, comm.size)/float(comm.size)
+    splitters = samples[order][np.minimum(np.searchsorted(cumulative,
+        targets), samples.shape[0]-1)]
+    return np.searchsorted(splitters, keys, side='right')
+
+def _bounding_box(values):
+    """
+    :rtype: :class:`numpy.ndarray` of shape (dim, 2)
+    :returns: bounding box of ``values`` or ``None`` if there are none
+    """
+    if values.shape[0] == 0:
+        return None
+    return np.column_stack((np.min(values, 0), np.max(values, 0)))
+
+class distributed_kdtree(object):
+    """
+    A nearest neighbor index of points distributed over all processors.
+    Creating and querying the index are collective operations.
+
+    values
+        points owned by this processor after partitioning
+    indices
+        global indices of the points owned by this processor
+    boxes
+        bounding boxes of the points of each processor
+    """
+    def __init__(self, values_local, domain=None, p_norm=2.0, leafsize=16):
+        """
+        Initialization
+
+        :param values_local: local points in the ``np.array_split`` layout
+        :type values_local: :class:`numpy.ndarray` of shape (num_local, dim)
+        :param domain: domain used to partition the points
+        :type domain: :class:`numpy.ndarray` of shape (dim, 2)
+        :param float p_norm: p-norm of the distance
+        :param int leafsize: leaf size of the local trees
+
+        """
+        import scipy.spatial as spatial
+        values_local = np.asarray(values_local, dtype=np.float64)
+        if values_local.ndim == 1:
+            values_local = np.expand_dims(values_local, axis=1)
+        #: dimension of the points
+        self.dim = values_local.shape[1]
+        #: p-norm of the distance
+        self.p_norm = p_norm
+        counts = comm.allgather(values_local.shape[0])
+        #: total number of points
+        self.num = int(np.sum(counts))
+        offset = int(np.sum(counts[:comm.rank]))
+        global_index = np.arange(offset, offset+values_local.shape[0])
+
+        dest = curve_partition(values_local, domain)
+        received = _exchange([(values_local[dest == r],
+            global_index[dest == r]) for r in xrange(comm.size)])
+        #: points owned by this processor
+        self.values = np.concatenate([v for (v, _) in received])
+        #: global indices of the points owned by this processor
+        self.indices = np.concatenate([i for (_, i) in received])
+        #: bounding boxes of the points of each processor
+        self.boxes = comm.allgather(_bounding_box(self.values))
+        self._tree = None
+        if self.values.shape[0] > 0:
+            self._tree = spatial.cKDTree(self.values, leafsize=leafsize)
+
+    def _local_query(self, x, k):
+        """
+        Finds the ``k`` nearest neighbors of ``x`` among the points of this
+        processor.
+
+        :rtype: tuple
+        :returns: (dist, ptr) of shape (len(x), k), missing neighbors have
+            distance ``inf`` and pointer ``self.num``
+        """
+        dist = np.empty((x.shape[0], k))
+        dist.fill(np.inf)
+        ptr = np.empty((x.shape[0], k), dtype=np.int64)
+        ptr.fill(self.num)
+        if self._tree is None or x.shape[0] == 0:
+            return (dist, ptr)
+        num_local = self.values.shape[0]
+        (local_dist, local_ptr) = self._tree.query(x, k=min(k, num_local),
+                p=self.p_norm)
+        local_dist = np.reshape(local_dist, (x.shape[0], -1))
+        local_ptr = np.reshape(local_ptr, (x.shape[0], -1))
+        dist[:, :local_dist.shape[1]] = local_dist
+        ptr[:, :local_ptr.shape[1]] = np.append(self.indices,
+                self.num)[local_ptr]
+        return (dist, ptr)
+
+    def _route(self, x, targets, k):
+        """
+        Sends ``x[targets[r]]`` to processor ``r`` and returns the ``k``
+        nearest neighbors found by each processor.
+
+        :rtype: list
+        :returns: (dist, ptr) from each processor
+        """
+        queries = _exchange([x[t] for t in targets])
+        return _exchange([self._local_query(q, k) for q in queries])
+
+    def query(self, x, k=1, p_norm=None):
+        """
+        Finds the ``k`` nearest neighbors of the local query points ``x``
+        among all points.
+
+        :param x: points for query
+        :type x: :class:`numpy.ndarray` of shape ``(*, dim)``
+        :param int k: number of nearest neighbors to return
+        :param float p_norm: p-norm of the distance, defaults to
+            ``self.p_norm``
+
+        :rtype: tuple
+        :returns: (dist, ptr) of shape (len(x),) if ``k == 1`` or
+            (len(x), k), missing neighbors have distance ``inf`` and pointer
+            ``num``
+        """
+        if p_norm is not None:
+            self.p_norm = p_norm
+        x = np.reshape(np.asarray(x, dtype=np.float64), (-1, self.dim))
+        distances = box_distances(x, self.boxes, self.p_norm)
+        home = np.argmin(distances, axis=1)
+        dist = np.empty((x.shape[0], k))
+        ptr = np.empty((x.shape[0], k), dtype=np.int64)
+        targets = [np.nonzero(home == r)[0] for r in xrange(comm.size)]
+        for t, (d, p) in zip(targets, self._route(x, targets, k)):
+            dist[t] = d
+            ptr[t] = p
+
+        # points closer to another box than to the k-th neighbor
+        if comm.size > 1:
+            halo = distances < dist[:, -1:]
+            halo[np.arange(x.shape[0]), home] = False
+            targets = [np.nonzero(halo[:, r])[0] for r in xrange(comm.size)]
+            for t, (d, p) in zip(targets, self._route(x, targets, k)):
+                if t.shape[0] == 0:
+                    continue
+                merged_dist = np.hstack((dist[t], d))
+                merged_ptr = np.hstack((ptr[t], p))
+                order = np.argsort(merged_dist, axis=1,
+                        kind='mergesort')[:, :k]
+                rows = np.arange(t.shape[0])[:, np.newaxis]
+                dist[t] = merged_dist[rows, order]
+                ptr[t] = merged_ptr[rows, order]
+
+        if k == 1:
+            return (dist[:, 0], ptr[:, 0])
+        return (dist, ptr)
@@ -0,0 +1,352 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module provides a persistent, content addressed cache of model
+evaluations. Each input sample (a row of the input values) is identified by
+a hash of its values and the identity of the model. The outputs, error
+estimates, and Jacobians of the sample are stored in a :mod:`sqlite3`
+database so that reruns of a study with overlapping samples only evaluate the
+model at new samples. A cache is used by passing it as ``cache`` to a
+:class:`~bet.sampling.basicSampling.sampler`::
+
+    my_sampler = bsam.sampler(lb_model, cache='model_cache.db')
+
+Processors (and separate runs) may share the same cache file. Writes are
+serialized by the file locking of :mod:`sqlite3`, which requires a file
+system with working POSIX locks. Entries are evicted in least recently used
+order once the cache exceeds ``max_entries`` entries or ``max_bytes`` bytes.
+"""
+
+import io
+import time
+import types
+import hashlib
+import functools
+import sqlite3
+import numpy as np
+
+class wrong_model(Exception):
+    """
+    Exception for when the model identity of a cache is not set or cannot be
+    determined.
+    """
+
+def _update_state(digest, obj, seen):
+    """
+    Adds the state of ``obj`` to ``digest``. Functions contribute their
+    code, defaults, and closure cells, :class:`functools.partial` objects
+    their function and arguments, bound methods their function and instance,
+    and other objects their class and the result of their ``model_state``
+    method.
+
+    :param digest: hash of the state
+    :type digest: :class:`hashlib.sha1`
+    :param obj: object to identify
+    :param set seen: ids of the objects already added (to stop cycles)
+
+    """
+    if obj is None or isinstance(obj, (bool, int, long, float, complex,
+        basestring, np.generic)):
+        digest.update("{}:{!r};".format(type(obj).__name__, obj))
+        return
+    if isinstance(obj, np.ndarray):
+        digest.update("ndarray:{}:{};".format(obj.dtype.str, obj.shape))
+        if obj.dtype.hasobject:
+            _update_state(digest, obj.tolist(), seen)
+        else:
+            digest.update(np.ascontiguousarray(obj).tobytes())
+        return
+    if isinstance(obj, (types.ModuleType, type, types.ClassType)):
+        digest.update("{}:{}.{};".format(type(obj).__name__, getattr(obj,
+            '__module__', ''), obj.__name__))
+        return
+    if isinstance(obj, types.CodeType):
+        digest.update(obj.co_code)
+        _update_state(digest, obj.co_names, seen)
+        _update_state(digest, obj.co_consts, seen)
+        return
+    if id(obj) in seen:
+        digest.update("cycle;")
+        return
+    seen.add(id(obj))
+    if callable(getattr(obj, 'model_state', None)):
+        digest.update("object:{}.{};".format(type(obj).__module__,
+            type(obj).__name__))
+        _update_state(digest, obj.model_state(), seen)
+    elif isinstance(obj, (list, tuple)):
+        digest.update("{}:{};".format(type(obj).__name__, len(obj)))
+        for item in obj:
+            _update_state(digest, item, seen)
+    elif isinstance(obj, dict):
+        digest.update("dict:{};".format(len(obj)))
+        for key in sorted(obj, key=repr):
+            _update_state(digest, key, seen)
+            _update_state(digest, obj[key], seen)
+    elif isinstance(obj, functools.partial):
+        digest.update("partial;")
+        _update_state(digest, obj.func, seen)
+        _update_state(digest, obj.args, seen)
+        _update_state(digest, obj.keywords, seen)
+    elif isinstance(obj, types.MethodType):
+        digest.update("method;")
+        _update_state(digest, obj.__func__, seen)
+        _update_state(digest, obj.__self__, seen)
+    elif isinstance(obj, types.FunctionType):
+        digest.update("function:{}.{};".format(obj.__module__,
+            obj.__name__))
+        _update_state(digest, obj.__code__, seen)
+        _update_state(digest, obj.__defaults__, seen)
+        for cell in obj.__closure__ or ():
+            try:
+                contents = cell.cell_contents
+            except ValueError:
+                digest.update("empty cell;")
+            else:
+                _update_state(digest, contents, seen)
+    elif isinstance(obj, (types.BuiltinFunctionType, np.ufunc)):
+        digest.update("builtin:{}.{};".format(getattr(obj, '__module__',
+            None), obj.__name__))
+    else:
+        raise wrong_model("Cannot identify the model state {!r}, pass a "
+                "model_id to the cache.".format(obj))
+
+def model_identity(lb_model):
+    """
+    Determines an identity for ``lb_model`` that changes when the code or
+    the parameters of the model change. For functions this includes the
+    byte code, constants, defaults, and closure cells, for
+    :class:`functools.partial` objects the function and arguments, and for
+    bound methods the instance. Callable objects (such as
+    :class:`~bet.sampling.launcher.file_launcher`) and the instances of
+    bound methods are identified by their class and the value returned by
+    their ``model_state()`` method, which should contain everything that
+    determines the outputs of the model and nothing that changes while it
+    runs (counters, concurrency settings). Objects without ``model_state``
+    need an explicit ``model_id``.
+
+    .. note::
+
+        Functions contribute the names of the globals they use but not
+        their values. Changing a module level constant or helper function
+        that a model uses does not change its identity, so the cache returns
+        stale outputs; clear the cache or pass a new ``model_id`` in this
+        case.
+
+    :param lb_model: model
+    :type lb_model: callable
+
+    :rtype: string
+    :returns: identity of the model
+    :raises wrong_model: if the state of the model contains objects that
+        cannot be identified (such as objects without ``model_state``), in
+        which case the cache needs an explicit ``model_id``
+    """
+    digest = hashlib.sha1()
+    _update_state(digest, lb_model, set())
+    func = getattr(lb_model, 'func', lb_model)
+    func = getattr(func, '__func__', func)
+    if isinstance(func, (types.FunctionType, types.BuiltinFunctionType,
+        np.ufunc)):
+        name = "{}.{}".format(getattr(func, '__module__', None),
+                func.__name__)
+    else:
+        name = "{}.{}".format(type(lb_model).__module__,
+                type(lb_model).__name__)
+    return "{}:{}".format(name, digest.hexdigest())
+
+def _dumps(values):
+    """
+    Serializes an array (or ``None``).
+    """
+    if values is None:
+        return None
+    buf = io.BytesIO()
+    np.save(buf, np.asarray(values), allow_pickle=False)
+    return sqlite3.Binary(buf.getvalue())
+
+def _loads(blob):
+    """
+    Deserializes an array (or ``None``) serialized by :meth:`_dumps`.
+    """
+    if blob is None:
+        return None
+    return np.load(io.BytesIO(bytes(blob)), allow_pickle=False)
+
+class evaluation_cache(object):
+    """
+    A persistent cache of model evaluations keyed by input samples.
+
+    file_name
+        name of the :mod:`sqlite3` database file
+    model_id
+        identity of the model, see :meth:`model_identity`
+    max_entries
+        maximum number of cached samples
+    max_bytes
+        maximum number of bytes of cached outputs
+    """
+    #: number of keys per ``SELECT`` (below the sqlite parameter limit)
+    chunk_size = 500
+
+    def __init__(self, file_name, model_id=None, max_entries=None,
+            max_bytes=None, timeout=60.0):
+        """
+        Initialization
+
+        :param string file_name: name of the database file
+        :param string model_id: identity of the model, if ``None`` the
+            :class:`~bet.sampling.basicSampling.sampler` using this cache sets
+            it with :meth:`model_identity`
+        :param int max_entries: maximum number of cached samples
+        :param int max_bytes: maximum number of bytes of cached outputs
+        :param float timeout: seconds to wait for a lock held by another
+            processor
+
+        """
+        #: name of the database file
+        self.file_name = file_name
+        #: identity of the model
+        self.model_id = model_id
+        #: maximum number of cached samples
+        self.max_entries = max_entries
+        #: maximum number of bytes of cached outputs
+        self.max_bytes = max_bytes
+        #: number of samples found in the cache
+        self.hits = 0
+        #: number of samples not found in the cache
+        self.misses = 0
+        self._connection = sqlite3.connect(file_name, timeout=timeout)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS entries "
+                    "(key TEXT PRIMARY KEY, model_values BLOB, "
+                    "error_estimates BLOB, jacobians BLOB, "
+                    "size INTEGER, last_used REAL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS "
+                    "entries_last_used ON entries (last_used)")
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM "
+                "entries").fetchone()[0]
+
+    def nbytes(self):
+        """
+        :rtype: int
+        :returns: number of bytes of cached outputs
+        """
+        return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM "
+                "entries").fetchone()[0]
+
+    def keys(self, input_values):
+        """
+        Computes the keys of the rows of ``input_values``.
+
+        :param input_values: input samples
+        :type input_values: :class:`numpy.ndarray` of shape (N, ndim)
+
+        :rtype: list
+        :returns: a key for each row of ``input_values``
+        """
+        if self.model_id is None:
+            raise wrong_model("The model identity of the cache is not set.")
+        input_values = np.ascontiguousarray(input_values, dtype=np.float64)
+        input_values = input_values.reshape((input_values.shape[0], -1))
+        prefix = hashlib.sha1(self.model_id.encode('utf-8'))
+        prefix.update(str(input_values.shape[1]).encode('utf-8'))
+        keys = []
+        for row in input_values:
+            key = prefix.copy()
+            key.update(row.tobytes())
+            keys.append(key.hexdigest())
+        return keys
+
+    def get(self, keys):
+        """
+        Looks up ``keys`` and marks the entries found as recently used.
+
+        :param list keys: keys of the samples
+
+        :rtype: dict
+        :returns: (values, error_estimates, jacobians) by key for the keys
+            in the cache, error estimates and Jacobians are ``None`` if they
+            were not cached
+        """
+        found = dict()
+        unique_keys = list(set(keys))
+        for start in xrange(0, len(unique_keys), self.chunk_size):
+            chunk = unique_keys[start:start+self.chunk_size]
+            rows = self._connection.execute("SELECT key, model_values, "
+                    "error_estimates, jacobians FROM entries WHERE key IN "
+                    "({})".format(','.join('?'*len(chunk))), chunk)
+            for row in rows:
+                found[row[0]] = tuple(_loads(blob) for blob in row[1:])
+        if len(found) > 0:
+            now = time.time()
+            with self._connection:
+                self._connection.executemany("UPDATE entries SET last_used "
+                        "= ? WHERE key = ?", [(now, key) for key in found])
+        return found
+
+    def put(self, keys, values, error_estimates=None, jacobians=None):
+        """
+        Stores the outputs of the samples with ``keys`` and evicts least
+        recently used entries if the cache is too large.
+
+        :param list keys: keys of the samples
+        :param values: model output
+        :type values: :class:`numpy.ndarray` of shape (N, mdim)
+        :param error_estimates: error estimates of the model output
+        :type error_estimates: :class:`numpy.ndarray` of shape (N, mdim)
+        :param jacobians: Jacobians of the model at the samples
+        :type jacobians: :class:`numpy.ndarray` of shape (N, mdim, ndim)
+
+        """
+        now = time.time()
+        entries = []
+        for i, key in enumerate(keys):
+            blobs = [_dumps(values[i])]
+            blobs.append(None if error_estimates is None else \
+                    _dumps(error_estimates[i]))
+            blobs.append(None if jacobians is None else _dumps(jacobians[i]))
+            size = sum(len(blob) for blob in blobs if blob is not None)
+            entries.append(tuple([key]+blobs+[size, now]))
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO entries "
+                    "VALUES (?, ?, ?, ?, ?, ?)", entries)
+            self._evict()
+
+    def _evict(self):
+        """
+        Removes least recently used entries until the cache has at most
+        ``max_entries`` entries and ``max_bytes`` bytes.
+        """
+        if self.max_entries is not None:
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self._connection.execute("DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY last_used ASC "
+                        "LIMIT ?)", (excess,))
+        if self.max_bytes is not None:
+            excess = self.nbytes() - self.max_bytes
+            if excess > 0:
+                evict = []
+                for key, size in self._connection.execute("SELECT key, size "
+                        "FROM entries ORDER BY last_used ASC"):
+                    if excess <= 0:
+                        break
+                    evict.append((key,))
+                    excess -= size
+                self._connection.executemany("DELETE FROM entries WHERE key "
+                        "= ?", evict)
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM entries")
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        self._connection.close()
@@ -0,0 +1,214 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module generates Latin hypercube designs in parallel. Every processor
+computes only its own rows of a globally consistent design: the rows
+``np.array_split(range(num_samples), comm.size)[comm.rank]`` of the design
+that a single processor would generate from the same ``seed``. Each column of
+the design is a pseudorandom permutation of the ``num_samples`` strata that is
+evaluated row by row (a keyed Feistel network with cycle walking), so no
+processor stores or sorts a full permutation.
+
+The ``'center'`` and ``'random'`` (or ``None``) criteria are generated
+natively in O(local rows * dim) time and memory. The optimized criteria of
+`PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_ (``'maximin'``,
+``'centermaximin'``, ``'correlation'``) need the full design, they are
+generated by :mod:`pyDOE` on rank 0 and scattered.
+"""
+
+import numpy as np
+from bet.Comm import comm
+
+#: criteria that are generated natively
+native_criteria = [None, 'random', 'center', 'c']
+
+#: optimized criteria that are generated by :mod:`pyDOE`
+pydoe_criteria = ['maximin', 'm', 'centermaximin', 'cm', 'correlation',
+        'corr']
+
+class wrong_criterion(Exception):
+    """
+    Exception for when the criterion is not supported.
+    """
+
+_GOLDEN = np.uint64(0x9e3779b97f4a7c15)
+_MIX1 = np.uint64(0xbf58476d1ce4e5b9)
+_MIX2 = np.uint64(0x94d049bb133111eb)
+
+def _mix(x):
+    """
+    Mixes the bits of an array of unsigned 64 bit integers (the finalizer of
+    SplitMix64).
+
+    :param x: integers to mix
+    :type x: :class:`numpy.ndarray` of ``uint64``
+
+    :rtype: :class:`numpy.ndarray` of ``uint64``
+    :returns: mixed integers
+    """
+    x = np.asarray(x, dtype=np.uint64)
+    x = (x ^ (x >> np.uint64(30))) * _MIX1
+    x = (x ^ (x >> np.uint64(27))) * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+def _key(seed, *streams):
+    """
+    Derives a key from ``seed`` and stream numbers.
+
+    :param int seed: seed
+    :param streams: stream numbers (e.g. the dimension)
+
+    :rtype: :class:`numpy.uint64`
+    :returns: key
+    """
+    key = _mix(np.array([seed % 2**64], dtype=np.uint64))
+    for stream in streams:
+        key = _mix(key + np.array([stream % 2**64], dtype=np.uint64) *
+                _GOLDEN)
+    return key[0]
+
+def hash_uniform(key, counters):
+    """
+    Counter based uniform random numbers. The same ``key`` and counter always
+    give the same number on every processor.
+
+    :param key: key of the stream, see :meth:`_key`
+    :type key: :class:`numpy.uint64`
+    :param counters: counters (e.g. global sample indices)
+    :type counters: :class:`numpy.ndarray` of ints
+
+    :rtype: :class:`numpy.ndarray` of floats in [0, 1)
+    :returns: a random number for each counter
+    """
+    bits = _mix(np.asarray(counters, dtype=np.uint64) * _GOLDEN ^ key)
+    return (bits >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+def permute(indices, num, key, rounds=4):
+    """
+    Evaluates a pseudorandom permutation of ``range(num)`` at ``indices``.
+    The permutation is a Feistel network on the smallest power of 4 that is
+    at least ``num`` restricted to ``range(num)`` by cycle walking.
+
+    :param indices: indices in ``range(num)``
+    :type indices: :class:`numpy.ndarray` of ints
+    :param int num: size of the permutation
+    :param key: key of the permutation, see :meth:`_key`
+    :type key: :class:`numpy.uint64`
+    :param int rounds: number of Feistel rounds
+
+    :rtype: :class:`numpy.ndarray` of ints
+    :returns: the permuted indices
+    """
+    half_bits = max(1, int(np.ceil(np.log2(max(num, 2))/2.0)))
+    shift = np.uint64(half_bits)
+    mask = np.uint64(2**half_bits-1)
+    round_keys = _mix(np.arange(1, rounds+1, dtype=np.uint64) * _GOLDEN ^
+            key)
+
+    def feistel(x):
+        left = x >> shift
+        right = x & mask
+        for round_key in round_keys:
+            (left, right) = (right, left ^ (_mix(right ^ round_key) & mask))
+        return (left << shift) | right
+
+    values = feistel(np.asarray(indices, dtype=np.uint64))
+    outside = values >= np.uint64(num)
+    while np.any(outside):
+        values[outside] = feistel(values[outside])
+        outside[outside] = values[outside] >= np.uint64(num)
+    return values.astype(np.int64)
+
+def local_rows(num_samples):
+    """
+    :param int num_samples: number of samples
+
+    :rtype: tuple
+    :returns: (start, stop) of the rows of this processor, the same split as
+        :meth:`numpy.array_split`
+    """
+    (base, extra) = divmod(num_samples, comm.size)
+    start = comm.rank*base + min(comm.rank, extra)
+    return (start, start + base + (comm.rank < extra))
+
+def shared_seed(seed=None):
+    """
+    :param int seed: seed, if ``None`` rank 0 draws a seed from
+        :mod:`numpy.random`
+
+    :rtype: int
+    :returns: the same seed on every processor
+    """
+    if seed is None:
+        if comm.rank == 0:
+            seed = int(np.random.randint(0, 2**31-1))
+        seed = comm.bcast(seed, root=0)
+    return seed
+
+def lhs(dim, num_samples, criterion='center', seed=0, rows=None):
+    """
+    Computes rows of a Latin hypercube design on the unit hypercube with the
+    ``'center'`` or ``'random'`` criterion.
+
+    :param int dim: dimension
+    :param int num_samples: number of samples (rows) of the design
+    :param string criterion: ``'center'`` places each sample at the center of
+        its stratum, ``'random'`` (or ``None``) at a random point in it
+    :param int seed: seed of the design
+    :param rows: indices of the rows to compute, defaults to all rows
+    :type rows: :class:`numpy.ndarray` of ints
+
+    :rtype: :class:`numpy.ndarray` of shape (len(rows), dim)
+    :returns: rows of the design
+    """
+    if criterion not in native_criteria:
+        raise wrong_criterion("criterion must be one of "
+                "{}".format(native_criteria))
+    if rows is None:
+        rows = np.arange(num_samples)
+    rows = np.asarray(rows, dtype=np.int64)
+    design = np.empty((rows.shape[0], dim))
+    for d in xrange(dim):
+        design[:, d] = permute(rows, num_samples, _key(seed, d))
+    if criterion in ['center', 'c']:
+        design += 0.5
+    else:
+        for d in xrange(dim):
+            design[:, d] += hash_uniform(_key(seed, dim+d), rows)
+    return design / float(num_samples)
+
+def lhs_local(dim, num_samples, criterion='center', seed=None):
+    """
+    Computes the local rows of a Latin hypercube design on the unit
+    hypercube. Native criteria are computed only for the local rows, the
+    optimized criteria of :mod:`pyDOE` are computed on rank 0 and scattered.
+
+    :param int dim: dimension
+    :param int num_samples: number of samples (rows) of the design
+    :param string criterion: latin hypercube criterion see
+        `PyDOE <http://pythonhosted.org/pyDOE/randomized.html>`_
+    :param int seed: seed shared by all processors, if ``None`` rank 0 draws
+        one from :mod:`numpy.random`
+
+    :rtype: :class:`numpy.ndarray` of shape (num_local, dim)
+    :returns: local rows of the design
+    """
+    if criterion in native_criteria:
+        (start, stop) = local_rows(num_samples)
+        return lhs(dim, num_samples, criterion, shared_seed(seed),
+                np.arange(start, stop))
+    elif criterion not in pydoe_criteria:
+        raise wrong_criterion("criterion must be one of "
+                "{}".format(native_criteria+pydoe_criteria))
+
+    design = None
+    if comm.rank == 0:
+        from pyDOE import lhs as pydoe_lhs
+        if seed is not None:
+            state = np.random.get_state()
+            np.random.seed(seed)
+        design = np.array_split(pydoe_lhs(dim, num_samples, criterion),
+                comm.size)
+        if seed is not None:
+            np.random.set_state(state)
+    return comm.scatter(design, root=0)
@@ -0,0 +1,289 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module provides a launcher for external models that communicate through
+files. The input samples are split into shards and each shard is written to
+an input file in its own scratch directory. Up to ``num_concurrent``
+external commands are run at the same time, failed jobs are retried, and the
+outputs are read back and returned in the order of the input samples. A
+:class:`~bet.sampling.launcher.file_launcher` is callable and can be used as
+the ``lb_model`` of a :class:`~bet.sampling.basicSampling.sampler`::
+
+    model = file_launcher([sys.executable, 'my_model.py', '{input_file}',
+        '{output_file}'], num_concurrent=4)
+    my_sampler = bsam.sampler(model)
+
+The command is formatted with the following fields:
+
+    * ``input_file`` the absolute path of the input file
+    * ``output_file`` the absolute path of the output file
+    * ``job_dir`` the scratch directory of the job (also the working
+        directory of the command)
+    * ``job_id`` the index of the job
+
+Input and output files ending in ``.npy`` are read and written with
+:mod:`numpy`, otherwise they are ``.mat`` files with the variables ``input``
+and ``output``. The input and output file may be the same ``.mat`` file (see
+``examples/parallel_and_serial_sampling/serial_launcher.py``).
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+import numpy as np
+from bet.Comm import comm
+
+class job_failed(Exception):
+    """
+    Exception for when an external model fails more than ``max_retries``
+    times.
+    """
+
+def write_array(file_name, name, values):
+    """
+    Writes ``values`` to ``file_name``.
+
+    :param string file_name: ``.npy`` or ``.mat`` file name
+    :param string name: variable name in a ``.mat`` file
+    :param values: array to write
+    :type values: :class:`numpy.ndarray`
+
+    """
+    if file_name.endswith('.npy'):
+        np.save(file_name, values)
+    else:
+        import scipy.io as sio
+        sio.savemat(file_name, {name: values})
+
+def read_array(file_name, name):
+    """
+    Reads an array from ``file_name``.
+
+    :param string file_name: ``.npy`` or ``.mat`` file name
+    :param string name: variable name in a ``.mat`` file
+
+    :rtype: :class:`numpy.ndarray`
+    :returns: the array stored in ``file_name``
+    """
+    if file_name.endswith('.npy'):
+        return np.load(file_name)
+    else:
+        import scipy.io as sio
+        return sio.loadmat(file_name)[name]
+
+class file_launcher(object):
+    """
+    Runs a file based external model on shards of the input samples with
+    bounded concurrency.
+
+    command
+        list of arguments or a shell command (string) to run the model
+    num_concurrent
+        maximum number of commands that run at the same time
+    samples_per_job
+        number of samples written to each input file
+    max_retries
+        number of times a failed job is rerun before raising
+        :class:`~bet.sampling.launcher.job_failed`
+    """
+    def __init__(self, command, num_concurrent=1, samples_per_job=1,
+            max_retries=0, timeout=None, scratch_dir=None,
+            input_file='input.mat', output_file='output.mat', cleanup=True,
+            poll_interval=0.05, env=None):
+        """
+        Initialization
+
+        :param command: arguments or shell command to run the model, formatted
+            with ``input_file``, ``output_file``, ``job_dir``, and ``job_id``
+        :type command: list of strings or string
+        :param int num_concurrent: maximum number of concurrent commands
+        :param int samples_per_job: number of samples per job
+        :param int max_retries: number of times to rerun a failed job
+        :param float timeout: seconds after which a job is killed and counted
+            as failed, ``None`` for no timeout
+        :param string scratch_dir: directory in which the job directories are
+            created, defaults to a new temporary directory
+        :param string input_file: name of the input file in a job directory
+        :param string output_file: name of the output file in a job directory
+        :param bool cleanup: remove the job directories after all jobs
+            succeeded
+        :param float poll_interval: seconds between checks of the running jobs
+        :param dict env: environment of the commands, defaults to the
+            environment of this process
+
+        """
+        #: arguments or shell command to run the model
+        self.command = command
+        #: maximum number of concurrent commands
+        self.num_concurrent = max(int(num_concurrent), 1)
+        #: number of samples per job
+        self.samples_per_job = max(int(samples_per_job), 1)
+        #: number of times to rerun a failed job
+        self.max_retries = max_retries
+        #: seconds after which a job is killed
+        self.timeout = timeout
+        #: directory in which the job directories are created
+        self.scratch_dir = scratch_dir
+        #: name of the input file in a job directory
+        self.input_file = input_file
+        #: name of the output file in a job directory
+        self.output_file = output_file
+        #: remove the job directories after all jobs succeeded
+        self.cleanup = cleanup
+        #: seconds between checks of the running jobs
+        self.poll_interval = poll_interval
+        #: environment of the commands
+        self.env = env
+        #: number of jobs that were rerun during the last call
+        self.num_retries = 0
+        self._batch_no = 0
+
+    def model_state(self):
+        """
+        Returns the state that determines the outputs of this model, used by
+        :meth:`~bet.sampling.evaluationCache.model_identity`. Settings that
+        only affect how the jobs are run (concurrency, retries, timeouts,
+        scratch directories) are not included.
+
+        :rtype: tuple
+        :returns: ``(command, input_file, output_file, env)``
+        """
+        return (self.command, self.input_file, self.output_file, self.env)
+
+    def __call__(self, input_data):
+        """
+        Runs the model at ``input_data``.
+
+        :param input_data: samples to run the model at
+        :type input_data: :class:`numpy.ndarray` of shape (N, ndim)
+
+        :rtype: :class:`numpy.ndarray` of shape (N, mdim)
+        :returns: model output in the order of ``input_data``
+        """
+        num = input_data.shape[0]
+        if num == 0:
+            return np.zeros((0, 0))
+
+        if self.scratch_dir is None:
+            batch_dir = tempfile.mkdtemp(prefix='bet_launcher_')
+        else:
+            batch_dir = os.path.join(os.path.abspath(self.scratch_dir),
+                    "proc{}_batch{}".format(comm.rank, self._batch_no))
+        self._batch_no += 1
+
+        jobs = []
+        for job_id, start in enumerate(xrange(0, num, self.samples_per_job)):
+            job_dir = os.path.join(batch_dir, "job{}".format(job_id))
+            if not os.path.exists(job_dir):
+                os.makedirs(job_dir)
+            job = {'id': job_id, 'dir': job_dir, 'attempts': 0,
+                    'input_file': os.path.join(job_dir, self.input_file),
+                    'output_file': os.path.join(job_dir, self.output_file),
+                    'num': min(self.samples_per_job, num-start)}
+            write_array(job['input_file'], 'input',
+                    input_data[start:start+self.samples_per_job])
+            jobs.append(job)
+
+        self.num_retries = 0
+        outputs = self._run_jobs(jobs)
+
+        if self.cleanup:
+            shutil.rmtree(batch_dir, ignore_errors=True)
+        return np.concatenate([np.reshape(outputs[finished['id']],
+            (finished['num'], -1)) for finished in jobs])
+
+    def _start(self, job):
+        """
+        Starts the command for ``job``.
+
+        :param dict job: job to start
+
+        :rtype: :class:`subprocess.Popen`
+        :returns: the running command
+        """
+        fields = {'input_file': job['input_file'], 'output_file':
+                job['output_file'], 'job_dir': job['dir'], 'job_id': job['id']}
+        if job['output_file'] != job['input_file'] and \
+                os.path.exists(job['output_file']):
+            os.remove(job['output_file'])
+        job['attempts'] += 1
+        job['start'] = time.time()
+        job['stdout'] = open(os.path.join(job['dir'], 'stdout.txt'), 'w')
+        job['stderr'] = open(os.path.join(job['dir'], 'stderr.txt'), 'w')
+        if isinstance(self.command, basestring):
+            command = self.command.format(**fields)
+        else:
+            command = [arg.format(**fields) for arg in self.command]
+        return subprocess.Popen(command, cwd=job['dir'], env=self.env,
+                shell=isinstance(command, basestring), stdout=job['stdout'],
+                stderr=job['stderr'])
+
+    def _finish(self, job, returncode):
+        """
+        Reads the output of a finished ``job``.
+
+        :param dict job: finished job
+        :param int returncode: return code of the command
+
+        :rtype: :class:`numpy.ndarray` or ``None``
+        :returns: output of the job or ``None`` if the job failed
+        """
+        job['stdout'].close()
+        job['stderr'].close()
+        if returncode != 0 or not os.path.exists(job['output_file']):
+            return None
+        try:
+            return read_array(job['output_file'], 'output')
+        except (IOError, ValueError, KeyError):
+            return None
+
+    def _run_jobs(self, jobs):
+        """
+        Runs ``jobs`` with at most ``num_concurrent`` running at a time.
+
+        :param list jobs: jobs to run
+
+        :rtype: dict
+        :returns: outputs of the jobs by job id
+        """
+        pending = list(reversed(jobs))
+        running = []
+        outputs = dict()
+        try:
+            while len(pending) > 0 or len(running) > 0:
+                while len(pending) > 0 and len(running) < self.num_concurrent:
+                    job = pending.pop()
+                    running.append((job, self._start(job)))
+                still_running = []
+                for job, proc in running:
+                    returncode = proc.poll()
+                    if returncode is None and self.timeout is not None and \
+                            time.time()-job['start'] > self.timeout:
+                        proc.kill()
+                        returncode = proc.wait()
+                    if returncode is None:
+                        still_running.append((job, proc))
+                        continue
+                    output = self._finish(job, returncode)
+                    if output is not None:
+                        outputs[job['id']] = output
+                    elif job['attempts'] <= self.max_retries:
+                        self.num_retries += 1
+                        pending.append(job)
+                    else:
+                        raise job_failed("job {} in {} failed {} time(s) "
+                                "with return code {}".format(job['id'],
+                                    job['dir'], job['attempts'], returncode))
+                running = still_running
+                if len(running) > 0:
+                    time.sleep(self.poll_interval)
+        finally:
+            for job, proc in running:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                job['stdout'].close()
+                job['stderr'].close()
+        return outputs
@@ -0,0 +1,268 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module generates scrambled low discrepancy (quasi-Monte Carlo) samples
+of the unit hypercube in parallel. The ``i``-th point of a sequence is
+computed directly from ``i`` so every processor computes only its own block
+of the sequence: the points ``skip + np.array_split(range(num_samples),
+comm.size)[comm.rank]``. The union of the local points is the same set of
+points that a single processor would generate with the same ``seed``.
+
+* :meth:`sobol` Sobol' sequence (direction numbers of Joe and Kuo) up to
+    :data:`max_sobol_dim` dimensions with a random linear matrix scramble and
+    a digital shift
+* :meth:`halton` Halton sequence with random digit permutations in every
+    dimension
+
+Volume and probability estimates from ``n`` quasi-Monte Carlo points
+converge at a rate close to ``1/n`` instead of ``1/sqrt(n)`` for Monte Carlo
+points. Scrambling keeps the estimates unbiased and allows error estimates
+from independent seeds.
+"""
+
+import numpy as np
+from bet.sampling.latinHypercube import local_rows, shared_seed
+
+#: sample types of this module
+sample_types = ['sobol', 'halton']
+
+class wrong_sample_type(Exception):
+    """
+    Exception for when the sample type or the dimension is not supported.
+    """
+
+#: number of bits of the Sobol' points
+_BITS = 32
+
+#: (degree, coefficients, initial direction numbers) of the primitive
+#: polynomials of dimensions 2, 3, ... of the Sobol' sequence (Joe and Kuo,
+#: new-joe-kuo-6.21201)
+_SOBOL_POLYNOMIALS = [
+        (1, 0, [1]),
+        (2, 1, [1, 3]),
+        (3, 1, [1, 3, 1]),
+        (3, 2, [1, 1, 1]),
+        (4, 1, [1, 1, 3, 3]),
+        (4, 4, [1, 3, 5, 13]),
+        (5, 2, [1, 1, 5, 5, 17]),
+        (5, 4, [1, 1, 5, 5, 5]),
+        (5, 7, [1, 1, 7, 11, 19]),
+        (5, 11, [1, 1, 5, 1, 1]),
+        (5, 13, [1, 1, 1, 3, 11]),
+        (5, 14, [1, 3, 5, 5, 31]),
+        (6, 1, [1, 3, 3, 9, 7, 49]),
+        (6, 13, [1, 1, 1, 15, 21, 21]),
+        (6, 16, [1, 3, 1, 13, 27, 49]),
+        (6, 19, [1, 1, 1, 15, 7, 5]),
+        (6, 22, [1, 3, 1, 15, 13, 25]),
+        (6, 25, [1, 1, 5, 5, 19, 61]),
+        (7, 1, [1, 3, 7, 11, 23, 15, 103]),
+        (7, 4, [1, 3, 7, 13, 13, 15, 69]),
+        (7, 7, [1, 1, 3, 13, 7, 35, 63]),
+        (7, 8, [1, 3, 5, 9, 1, 25, 53]),
+        (7, 14, [1, 3, 1, 13, 9, 35, 107]),
+        (7, 19, [1, 3, 1, 5, 27, 61, 31]),
+        (7, 21, [1, 1, 5, 11, 19, 41, 61]),
+        (7, 28, [1, 3, 5, 3, 3, 13, 69]),
+        (7, 31, [1, 1, 7, 13, 1, 19, 1]),
+        (7, 32, [1, 3, 7, 5, 13, 19, 59]),
+        (7, 37, [1, 1, 3, 9, 25, 29, 41]),
+        (7, 41, [1, 3, 5, 13, 23, 1, 55]),
+        (7, 42, [1, 3, 7, 3, 13, 59, 17]),
+        (7, 50, [1, 3, 1, 3, 5, 53, 69]),
+        (7, 55, [1, 1, 5, 5, 23, 33, 13]),
+        (7, 56, [1, 1, 7, 7, 1, 61, 123]),
+        (7, 59, [1, 1, 7, 9, 13, 61, 49]),
+        (7, 62, [1, 3, 3, 5, 3, 55, 33]),
+        (8, 14, [1, 3, 1, 15, 31, 13, 49, 245]),
+        (8, 21, [1, 3, 5, 15, 31, 59, 63, 97]),
+        (8, 22, [1, 3, 1, 11, 11, 11, 77, 249])]
+
+#: maximum dimension of the Sobol' sequence
+max_sobol_dim = len(_SOBOL_POLYNOMIALS) + 1
+
+def sobol_directions(dim):
+    """
+    Computes the direction numbers of the first ``dim`` dimensions of the
+    Sobol' sequence.
+
+    :param int dim: dimension
+
+    :rtype: :class:`numpy.ndarray` of ``uint64`` of shape (dim, 32)
+    :returns: direction numbers scaled to 32 bit integers
+    """
+    if dim > max_sobol_dim:
+        raise wrong_sample_type("The Sobol' sequence is available for up to "
+                "{} dimensions, use 'halton'.".format(max_sobol_dim))
+    directions = np.zeros((dim, _BITS), dtype=np.uint64)
+    directions[0] = [1 << (_BITS-k-1) for k in xrange(_BITS)]
+    for j in xrange(1, dim):
+        (degree, coefficients, m) = _SOBOL_POLYNOMIALS[j-1]
+        m = list(m)
+        for k in xrange(degree, _BITS):
+            new_m = m[k-degree] ^ (m[k-degree] << degree)
+            for i in xrange(1, degree):
+                if (coefficients >> (degree-1-i)) & 1:
+                    new_m ^= m[k-i] << i
+            m.append(new_m)
+        directions[j] = [m[k] << (_BITS-k-1) for k in xrange(_BITS)]
+    return directions
+
+def _scramble_directions(directions, random_state):
+    """
+    Applies a random lower triangular binary matrix with unit diagonal
+    (linear matrix scramble) to the direction numbers of each dimension.
+
+    :param directions: direction numbers
+    :type directions: :class:`numpy.ndarray` of ``uint64`` of shape
+        (dim, 32)
+    :param random_state: random number generator
+    :type random_state: :class:`numpy.random.RandomState`
+
+    :rtype: :class:`numpy.ndarray` of ``uint64`` of shape (dim, 32)
+    :returns: scrambled direction numbers
+    """
+    scrambled = np.zeros_like(directions)
+    for j in xrange(directions.shape[0]):
+        for row in xrange(_BITS):
+            # output bit ``row`` (from the most significant bit) depends on
+            # the input bits ``0, ..., row``
+            bit = _BITS-row-1
+            mask = 1 << bit
+            if row > 0:
+                mask |= int(random_state.randint(0, 2**row)) << (bit+1)
+            parity = np.zeros(directions.shape[1], dtype=np.uint64)
+            masked = directions[j] & np.uint64(mask)
+            for b in xrange(bit, _BITS):
+                parity ^= (masked >> np.uint64(b)) & np.uint64(1)
+            scrambled[j] |= parity << np.uint64(bit)
+    return scrambled
+
+def sobol(dim, num_samples, scramble=True, seed=0, skip=0, rows=None):
+    """
+    Computes points of the Sobol' sequence.
+
+    :param int dim: dimension
+    :param int num_samples: number of points of the sequence
+    :param bool scramble: apply a random linear matrix scramble and digital
+        shift determined by ``seed``
+    :param int seed: seed of the scramble
+    :param int skip: number of initial points of the sequence to skip
+    :param rows: indices of the points to compute, defaults to all points
+    :type rows: :class:`numpy.ndarray` of ints
+
+    :rtype: :class:`numpy.ndarray` of shape (len(rows), dim)
+    :returns: points in [0, 1)^dim
+    """
+    directions = sobol_directions(dim)
+    shift = np.zeros((dim,), dtype=np.uint64)
+    if scramble:
+        random_state = np.random.RandomState(seed)
+        directions = _scramble_directions(directions, random_state)
+        shift = random_state.randint(0, 2**_BITS, size=dim).astype(np.uint64)
+    if rows is None:
+        rows = np.arange(num_samples)
+    indices = np.asarray(rows, dtype=np.uint64) + np.uint64(skip)
+    points = np.empty((indices.shape[0], dim))
+    for j in xrange(dim):
+        x = np.zeros(indices.shape, dtype=np.uint64) ^ shift[j]
+        for k in xrange(_BITS):
+            bit = (indices >> np.uint64(k)) & np.uint64(1)
+            x ^= bit * directions[j, k]
+        points[:, j] = x.astype(np.float64) * 2.0**-_BITS
+    return points
+
+def primes(num):
+    """
+    :param int num: number of primes
+
+    :rtype: list
+    :returns: the first ``num`` primes
+    """
+    found = []
+    candidate = 2
+    while len(found) < num:
+        if all(candidate % p != 0 for p in found if p*p <= candidate):
+            found.append(candidate)
+        candidate += 1
+    return found
+
+def halton(dim, num_samples, scramble=True, seed=0, skip=0, rows=None):
+    """
+    Computes points of the Halton sequence.
+
+    :param int dim: dimension
+    :param int num_samples: number of points of the sequence
+    :param bool scramble: apply random digit permutations determined by
+        ``seed``
+    :param int seed: seed of the scramble
+    :param int skip: number of initial points of the sequence to skip
+    :param rows: indices of the points to compute, defaults to all points
+    :type rows: :class:`numpy.ndarray` of ints
+
+    :rtype: :class:`numpy.ndarray` of shape (len(rows), dim)
+    :returns: points in [0, 1)^dim
+    """
+    random_state = np.random.RandomState(seed)
+    if rows is None:
+        rows = np.arange(num_samples)
+    indices = np.asarray(rows, dtype=np.int64) + skip
+    points = np.zeros((indices.shape[0], dim))
+    for j, base in enumerate(primes(dim)):
+        # enough digits for double precision
+        num_digits = int(np.ceil(53/np.log2(base)))
+        remainder = np.copy(indices)
+        scale = 1.0/base
+        for _ in xrange(num_digits):
+            (remainder, digits) = np.divmod(remainder, base)
+            if scramble:
+                digits = random_state.permutation(base)[digits]
+            points[:, j] += digits*scale
+            scale /= base
+    return np.minimum(points, np.nextafter(1.0, 0.0))
+
+def qmc(sample_type, dim, num_samples, scramble=True, seed=0, skip=0,
+        rows=None):
+    """
+    Computes points of a low discrepancy sequence.
+
+    :param string sample_type: ``'sobol'`` or ``'halton'``
+    :param int dim: dimension
+    :param int num_samples: number of points of the sequence
+    :param bool scramble: scramble the sequence
+    :param int seed: seed of the scramble
+    :param int skip: number of initial points of the sequence to skip
+    :param rows: indices of the points to compute, defaults to all points
+    :type rows: :class:`numpy.ndarray` of ints
+
+    :rtype: :class:`numpy.ndarray` of shape (len(rows), dim)
+    :returns: points in [0, 1)^dim
+    """
+    if sample_type == 'sobol':
+        return sobol(dim, num_samples, scramble, seed, skip, rows)
+    elif sample_type == 'halton':
+        return halton(dim, num_samples, scramble, seed, skip, rows)
+    raise wrong_sample_type("sample_type must be one of "
+            "{}".format(sample_types))
+
+def qmc_local(sample_type, dim, num_samples, scramble=True, seed=None,
+        skip=0):
+    """
+    Computes the local block of ``num_samples`` points of a low discrepancy
+    sequence.
+
+    :param string sample_type: ``'sobol'`` or ``'halton'``
+    :param int dim: dimension
+    :param int num_samples: total number of points
+    :param bool scramble: scramble the sequence
+    :param int seed: seed of the scramble shared by all processors, if
+        ``None`` rank 0 draws one from :mod:`numpy.random`
+    :param int skip: number of initial points of the sequence to skip
+
+    :rtype: :class:`numpy.ndarray` of shape (num_local, dim)
+    :returns: local points in [0, 1)^dim
+    """
+    num_samples = int(num_samples)
+    (start, stop) = local_rows(num_samples)
+    return qmc(sample_type, dim, num_samples, scramble, shared_seed(seed),
+            skip, np.arange(start, stop))
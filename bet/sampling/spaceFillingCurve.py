@@ -0,0 +1,182 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module orders samples along space-filling curves. Samples are mapped to
+a grid with ``2**bits`` cells per dimension of their domain and sorted by
+the index of their cell along a Hilbert or Morton (Z-order) curve. Points that
+are close along the curve are close in space, so after ordering
+
+    * consecutive samples are close in memory, which improves the cache
+        behaviour of nearest neighbor queries and volume estimates and
+    * the contiguous blocks of samples that
+        :meth:`~bet.sample.sample_set_base.global_to_local` assigns to each
+        processor are compact regions of the domain.
+
+The Hilbert index is computed with the algorithm of J. Skilling,
+"Programming the Hilbert curve", AIP Conference Proceedings 707 (2004),
+vectorized over the samples.
+"""
+
+import numpy as np
+
+#: curves available in this module
+curve_types = ['hilbert', 'morton']
+
+class wrong_curve(Exception):
+    """
+    Exception for when the curve is not supported.
+    """
+
+def integer_coordinates(values, domain=None, bits=16):
+    """
+    Maps ``values`` to the integer coordinates of the cells of a grid with
+    ``2**bits`` cells per dimension of ``domain``.
+
+    :param values: samples
+    :type values: :class:`numpy.ndarray` of shape (num, dim)
+    :param domain: domain of the grid, defaults to the bounding box of
+        ``values``
+    :type domain: :class:`numpy.ndarray` of shape (dim, 2)
+    :param int bits: number of bits per dimension
+
+    :rtype: :class:`numpy.ndarray` of ``uint64`` of shape (num, dim)
+    :returns: cell coordinates in ``range(2**bits)``
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = np.expand_dims(values, axis=1)
+    if domain is None:
+        domain = np.column_stack((np.min(values, 0), np.max(values, 0)))
+    width = domain[:, 1] - domain[:, 0]
+    width[width <= 0] = 1.0
+    scaled = (values - domain[:, 0]) / width * 2**bits
+    return np.clip(np.floor(scaled), 0, 2**bits-1).astype(np.uint64)
+
+def _interleave(coords, bits):
+    """
+    Interleaves the bits of the coordinates from the most significant bit of
+    the first dimension to the least significant bit of the last dimension.
+
+    :param coords: cell coordinates
+    :type coords: :class:`numpy.ndarray` of ``uint64`` of shape (num, dim)
+    :param int bits: number of bits per dimension
+
+    :rtype: :class:`numpy.ndarray` of ``uint64`` of shape (num, words)
+    :returns: keys as words of 64 bits, the most significant word first
+    """
+    (num, dim) = coords.shape
+    num_bits = dim*bits
+    num_words = (num_bits+63)/64
+    keys = np.zeros((num, num_words), dtype=np.uint64)
+    position = 0
+    one = np.uint64(1)
+    for bit in xrange(bits-1, -1, -1):
+        for d in xrange(dim):
+            # position counts from the most significant bit of the key
+            word = position/64
+            shift = np.uint64(63 - position%64 - (num_words*64-num_bits if \
+                    word == num_words-1 else 0))
+            keys[:, word] |= ((coords[:, d] >> np.uint64(bit)) & one) << shift
+            position += 1
+    return keys
+
+def morton_keys(coords, bits=16):
+    """
+    Computes the index of cells along the Morton (Z-order) curve.
+
+    :param coords: cell coordinates
+    :type coords: :class:`numpy.ndarray` of ``uint64`` of shape (num, dim)
+    :param int bits: number of bits per dimension
+
+    :rtype: :class:`numpy.ndarray` of ``uint64`` of shape (num, words)
+    :returns: keys as words of 64 bits, the most significant word first
+    """
+    return _interleave(np.asarray(coords, dtype=np.uint64), bits)
+
+def hilbert_keys(coords, bits=16):
+    """
+    Computes the index of cells along the Hilbert curve.
+
+    :param coords: cell coordinates
+    :type coords: :class:`numpy.ndarray` of ``uint64`` of shape (num, dim)
+    :param int bits: number of bits per dimension
+
+    :rtype: :class:`numpy.ndarray` of ``uint64`` of shape (num, words)
+    :returns: keys as words of 64 bits, the most significant word first
+    """
+    x = np.array(coords, dtype=np.uint64)
+    dim = x.shape[1]
+    top = np.uint64(1) << np.uint64(bits-1)
+    # inverse undo
+    q = top
+    shift = np.uint64(bits-1)
+    while q > 1:
+        p = q - np.uint64(1)
+        for i in xrange(dim):
+            # all ones where bit q of the i-th axis is set, zero otherwise
+            high = np.uint64(0) - ((x[:, i] & q) >> shift)
+            # invert the low bits of the first axis where the bit is set
+            x[:, 0] ^= p & high
+            # otherwise exchange the low bits of the first and the i-th axis
+            t = (x[:, 0] ^ x[:, i]) & p & ~high
+            x[:, 0] ^= t
+            x[:, i] ^= t
+        q >>= np.uint64(1)
+        shift -= np.uint64(1)
+    # Gray encode
+    for i in xrange(1, dim):
+        x[:, i] ^= x[:, i-1]
+    t = np.zeros(x.shape[0], dtype=np.uint64)
+    q = top
+    shift = np.uint64(bits-1)
+    while q > 1:
+        t ^= (q - np.uint64(1)) & (np.uint64(0) - ((x[:, dim-1] & q) >>
+            shift))
+        q >>= np.uint64(1)
+        shift -= np.uint64(1)
+    x ^= t[:, np.newaxis]
+    return _interleave(x, bits)
+
+def curve_keys(values, domain=None, curve='hilbert', bits=16):
+    """
+    Computes the index of ``values`` along a space-filling curve.
+
+    :param values: samples
+    :type values: :class:`numpy.ndarray` of shape (num, dim)
+    :param domain: domain of the curve, defaults to the bounding box of
+        ``values``
+    :type domain: :class:`numpy.ndarray` of shape (dim, 2)
+    :param string curve: ``'hilbert'`` or ``'morton'``
+    :param int bits: number of bits per dimension
+
+    :rtype: :class:`numpy.ndarray` of ``uint64`` of shape (num, words)
+    :returns: keys as words of 64 bits, the most significant word first
+    """
+    coords = integer_coordinates(values, domain, bits)
+    if curve == 'hilbert':
+        return hilbert_keys(coords, bits)
+    elif curve == 'morton':
+        return morton_keys(coords, bits)
+    raise wrong_curve("curve must be one of {}".format(curve_types))
+
+def curve_order(values, domain=None, curve='hilbert', bits=16):
+    """
+    Computes the order of ``values`` along a space-filling curve. Samples in
+    the same cell keep their order.
+
+    :param values: samples
+    :type values: :class:`numpy.ndarray` of shape (num, dim)
+    :param domain: domain of the curve, defaults to the bounding box of
+        ``values``
+    :type domain: :class:`numpy.ndarray` of shape (dim, 2)
+    :param string curve: ``'hilbert'`` or ``'morton'``
+    :param int bits: number of bits per dimension
+
+    :rtype: :class:`numpy.ndarray` of ints of shape (num,)
+    :returns: indices that sort ``values`` along the curve
+    """
+    keys = curve_keys(values, domain, curve, bits)
+    if keys.shape[1] == 1:
+        return np.argsort(keys[:, 0], kind='mergesort')
+    # lexsort sorts by the last key first
+    return np.lexsort(keys[:, ::-1].transpose())
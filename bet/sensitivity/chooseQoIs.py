@@ -7,7 +7,6 @@ stochastic inverse problem.
 import logging
 from itertools import combinations
 import numpy as np
-from scipy import stats
 from bet.Comm import comm
 import bet.util as util
 
@@ -83,6 +82,7 @@ def calculate_avg_skewness(input_set, qoi_set=None):
         skewness at each center in the input space (float) and skewgi
         has shape (num_centers, output_dim)
     """
+    from scipy import stats
 
     if input_set._jacobians is None:
         raise ValueError("You must have jacobians to use this method.")
@@ -160,6 +160,7 @@ def calculate_avg_condnum(input_set, qoi_set=None):
         has shape (num_centers, output_dim)
     
     """
+    from scipy import stats
 
     if input_set._jacobians is None:
         raise ValueError("You must have jacobians to use this method.")
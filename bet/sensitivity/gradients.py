@@ -7,10 +7,8 @@ input_set._values in the following order : CENTERS, FOLLOWED BY THE CLUSTER
 AROUND THE FIRST CENTER, THEN THE CLUSTER AROUND THE SECOND CENTER AND SO ON.
 """
 import numpy as np
-import scipy.spatial as spatial
 import bet.util as util
 import bet.sample as sample
-import bet.sampling.LpGeneralizedSamples as lpsam
 
 def sample_lp_ball(input_set, num_close, radius, p_num=2):
     r"""
@@ -34,6 +32,7 @@ def sample_lp_ball(input_set, num_close, radius, p_num=2):
         ``input_dim``))
     
     """
+    import bet.sampling.LpGeneralizedSamples as lpsam
     if input_set.get_values() is None:
         raise ValueError("You must have values to use this method.")
     input_dim = input_set.get_dim()
@@ -298,6 +297,7 @@ def calculate_gradients_rbf(cluster_discretization, num_centers=None,
         output_dim, input_dim)
     
     """
+    import scipy.spatial as spatial
     if cluster_discretization._input_sample_set.get_values() is None \
             or cluster_discretization._output_sample_set.get_values() is None:
         raise ValueError("You must have values to use this method.")
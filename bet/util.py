@@ -14,51 +14,73 @@ possible_types = {int:MPI.INT, float:MPI.DOUBLE}
 def meshgrid_ndim(X):
     """
     Return coordinate matrix from two or more coordinate vectors.
-    Handles a maximum of 10 vectors.
 
     Make N-D coordinate arrays for vectorized evaluations of
     N-D scalar/vector fields over N-D grids, given
     one-dimensional coordinate arrays (x1, x2,..., xn).
 
+    .. seealso::
+
+        :meth:`grid_chunks` to iterate over large grids in blocks
 
     :param X: A tuple containing the 1d coordinate arrays
     :type X: tuple
     :rtype: :class:`~numpy.ndarray` of shape (num_grid_points,n)
     :returns: X_new
     """
-    n = len(X)
-    alist = []
-    for i in range(n):
-        alist.append(X[i])
-    for i in range(n, 10):
-        alist.append(np.array([0]))
-
-    a, b, c, d, e, f, g, h, i, j = np.meshgrid(alist[0],
-                                               alist[1],
-                                               alist[2],
-                                               alist[3],
-                                               alist[4],
-                                               alist[5],
-                                               alist[6],
-                                               alist[7],
-                                               alist[8],
-                                               alist[9],
-                                               indexing='ij')
-
-    X_new = np.vstack(
-        (a.flat[:],
-         b.flat[:],
-         c.flat[:],
-         d.flat[:],
-         e.flat[:],
-         f.flat[:],
-         g.flat[:],
-         h.flat[:],
-         i.flat[:],
-         j.flat[:])).transpose()
-    X_new = X_new[:, 0:n]
-
-    return X_new
+    return grid_index_to_point(X, np.arange(np.prod(grid_shape(X))))
+
+def grid_shape(X):
+    """
+    Returns the shape of the grid of coordinate vectors.
+
+    :param X: A tuple containing the 1d coordinate arrays
+    :type X: tuple
+    :rtype: tuple
+    :returns: (len(x1), len(x2),..., len(xn))
+    """
+    return tuple(np.size(x) for x in X)
+
+def grid_index_to_point(X, indices):
+    """
+    Computes the points of the grid of coordinate vectors with the given
+    flat indices. The points are numbered in the order of
+    :meth:`meshgrid_ndim`, i.e. the flattened ``indexing='ij'``
+    :meth:`numpy.meshgrid`, so the last coordinate varies fastest.
+
+    :param X: A tuple containing the 1d coordinate arrays
+    :type X: tuple
+    :param indices: flat indices of grid points
+    :type indices: :class:`~numpy.ndarray` of ints
+    :rtype: :class:`~numpy.ndarray` of shape (len(indices), n)
+    :returns: grid points
+    """
+    X = [np.ravel(x) for x in X]
+    multi_index = np.unravel_index(np.asarray(indices, dtype=np.int64),
+            grid_shape(X))
+    return np.column_stack([x[i] for (x, i) in zip(X, multi_index)])
+
+def grid_chunks(X, chunk_size=10000, start=0, stop=None):
+    """
+    Iterates over the points ``start`` to ``stop`` of the grid of coordinate
+    vectors in blocks of at most ``chunk_size`` points without creating the
+    whole grid.
+
+    :param X: A tuple containing the 1d coordinate arrays
+    :type X: tuple
+    :param int chunk_size: maximum number of points per block
+    :param int start: flat index of the first point
+    :param int stop: flat index after the last point, defaults to the number
+        of grid points
+    :rtype: generator
+    :returns: tuples (first flat index of the block, points of the block of
+        shape (block_size, n))
+    """
+    if stop is None:
+        stop = int(np.prod(grid_shape(X)))
+    for first in xrange(start, stop, chunk_size):
+        last = min(first + chunk_size, stop)
+        yield (first, grid_index_to_point(X, np.arange(first, last)))
 
 def get_global_values(array, shape=None):
     """
@@ -95,6 +117,65 @@ def get_global_values(array, shape=None):
                 possible_types[dtype]])
             return whole_a
 
+def split_owners(indices, num):
+    """
+    Finds the processors that own the rows ``indices`` of a global array of
+    ``num`` rows in the :meth:`np.array_split` layout.
+
+    :param indices: global row indices
+    :type indices: :class:`~numpy.ndarray` of ints
+    :param int num: number of global rows
+    :rtype: :class:`~numpy.ndarray` of ints
+    :returns: rank of the owner of each row
+    """
+    sizes = num/comm.size + (np.arange(comm.size) < num%comm.size)
+    bounds = np.cumsum(sizes)
+    return np.searchsorted(bounds, indices, side='right')
+
+def redistribute(array, dest):
+    """
+    Sends row ``i`` of the local array to processor ``dest[i]``. The rows are
+    sent with a single :meth:`Alltoallv` of typed buffers, so they are
+    neither pickled nor gathered on any processor.
+
+    :param array: local rows, ``None`` if this processor has none
+    :type array: :class:`~numpy.ndarray` of shape (num_local, ...)
+    :param dest: destination processor of each local row
+    :type dest: :class:`~numpy.ndarray` of ints of shape (num_local,)
+    :rtype: :class:`~numpy.ndarray` of shape (num_received, ...)
+    :returns: received rows ordered by the rank of the sending processor,
+        the rows from each processor in their original order, ``None`` if no
+        processor has rows
+    """
+    if comm.size == 1:
+        return array
+    # processors without rows need the shape and type of the rows
+    layouts = [l for l in comm.allgather(None if array is None else \
+            (array.shape[1:], array.dtype.str)) if l is not None]
+    if len(layouts) == 0:
+        return None
+    (row_shape, dtype) = layouts[0]
+    # arrays read from files may have an explicit byte order
+    dtype = np.dtype(dtype).newbyteorder('=')
+    if array is None:
+        array = np.empty((0,)+row_shape, dtype=dtype)
+        dest = np.zeros((0,), dtype=np.int64)
+    dest = np.asarray(dest, dtype=np.int64)
+    order = np.argsort(dest, kind='mergesort')
+    send = np.empty(array.shape, dtype=dtype)
+    send[:] = array[order]
+    row_size = int(np.prod(row_shape))
+    send_counts = np.bincount(dest, minlength=comm.size)
+    recv_counts = np.array(comm.alltoall(send_counts.tolist()))
+    recv = np.empty((np.sum(recv_counts),)+row_shape, dtype=dtype)
+    send_displs = np.append(0, np.cumsum(send_counts)[:-1])
+    recv_displs = np.append(0, np.cumsum(recv_counts)[:-1])
+    comm.Alltoallv([send.reshape(-1), ((send_counts*row_size).tolist(),
+        (send_displs*row_size).tolist())], [recv.reshape(-1),
+            ((recv_counts*row_size).tolist(),
+                (recv_displs*row_size).tolist())])
+    return recv
+
 def fix_dimensions_vector(vector):
     """
     Fix the dimensions of an input so that it is a :class:`numpy.ndarray` of
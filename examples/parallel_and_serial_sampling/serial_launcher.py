@@ -0,0 +1,21 @@
+# Copyright (C) 2016 The BET Development Team
+
+# -*- coding: utf-8 -*-
+
+# This demonstrates how to use BET in serial to sample a serial external model
+# with several model runs at the same time.
+# run by calling "python serial_launcher.py"
+
+import os, sys
+import bet.sampling.basicSampling as bsam
+from bet.sampling.launcher import file_launcher
+
+# each job gets 25 samples in its own directory and at most 4 jobs run at the
+# same time, serial_model.py reads and writes io_file.mat
+lb_model = file_launcher([sys.executable, os.path.abspath('serial_model.py'),
+    '{input_file}'], num_concurrent=4, samples_per_job=25,
+    input_file='io_file.mat', output_file='io_file.mat', max_retries=1)
+
+my_sampler = bsam.sampler(lb_model)
+my_discretization = my_sampler.create_random_discretization(sample_type='r',
+        input_obj=4, savefile="serial_launcher_example", num_samples=100)
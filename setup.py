@@ -19,4 +19,5 @@ setup(name='bet',
       url='https://github.com/UT-CHG/BET',
       packages=['bet', 'bet.sampling', 'bet.calculateP', 'bet.postProcess', 'bet.sensitivity'],
       install_requires=['matplotlib', 'pyDOE', 'scipy',
-          'numpy', 'nose'])
+          'numpy', 'nose'],
+      extras_require={'executors': ['futures']})
@@ -28,6 +28,9 @@ class Test_comm_for_no_mpi4py(unittest.TestCase):
     def test_bcast(self):
         thing = range(4)
         self.assertEqual(self.comm.bcast(thing, root=0), thing)
+    def test_alltoall(self):
+        thing = [range(4)]
+        self.assertEqual(self.comm.alltoall(thing), thing)
     def test_Allgather(self):
         thing = range(4)
         self.assertEqual(self.comm.Allgather(thing), thing)
@@ -65,3 +68,22 @@ class Test_MPI_for_no_mpi4py(unittest.TestCase):
         self.assertEqual(MPI_no.SUM, None)
         self.assertEqual(MPI_no.DOUBLE, float)
         self.assertEqual(MPI_no.INT, int)
+
+class Test_use_comm(unittest.TestCase):
+    """
+    Test :meth:`bet.Comm.use_comm`.
+    """
+    def test(self):
+        import bet.util as util
+        import bet.sample as sample
+        old_comm = Comm.comm
+        new_comm = Comm.comm_for_no_mpi4py()
+        with Comm.use_comm(new_comm):
+            self.assertIs(Comm.comm, new_comm)
+            self.assertIs(util.comm, new_comm)
+            self.assertIs(sample.comm, new_comm)
+            self.assertEqual(Comm.size, 1)
+        self.assertIs(Comm.comm, old_comm)
+        self.assertIs(util.comm, old_comm)
+        self.assertIs(sample.comm, old_comm)
+        self.assertEqual(Comm.size, old_comm.Get_size())
@@ -195,3 +195,144 @@ class Test_1_to_1(calculate_error, unittest.TestCase):
         disc._input_sample_set.set_jacobians(jac)
         self.disc = disc
 
+
+class Test_cell_connectivity(unittest.TestCase):
+    """
+    Testing :class:`bet.calculateP.calculateError.cell_connectivity` and
+    :meth:`bet.calculateP.calculateError.cell_connectivity_exact`.
+    """
+    def create_disc(self, values):
+        """
+        Creates a discretization of ``values`` with four contour events.
+        """
+        input_samples = sample.sample_set(values.shape[1])
+        input_samples.set_domain(np.repeat([[0.0, 1.0]], values.shape[1],
+            axis=0))
+        input_samples.set_values(values)
+        output_samples = sample.sample_set(1)
+        output_samples.set_values(np.floor(4.0*values[:, 0]))
+        output_probability_set = sample.sample_set(1)
+        output_probability_set.set_values(np.arange(4.0)[:, np.newaxis])
+        disc = sample.discretization(input_samples, output_samples,
+                output_probability_set)
+        disc.set_io_ptr()
+        return disc
+
+    def test_from_pairs(self):
+        """
+        Test :meth:`bet.calculateP.calculateError.cell_connectivity.from_pairs`.
+        """
+        nei_list = calculateError.cell_connectivity.from_pairs([2, 0, 2, 0, 2],
+                [1, 3, 0, 3, 1], 4, 5)
+        self.assertEqual(len(nei_list), 4)
+        nptest.assert_array_equal(nei_list.indptr, [0, 1, 1, 3, 3])
+        nptest.assert_array_equal(nei_list[0], [3])
+        nptest.assert_array_equal(nei_list[1], [])
+        nptest.assert_array_equal(nei_list[2], [0, 1])
+        nptest.assert_array_equal(nei_list.counts(), [1, 0, 2, 0])
+        nptest.assert_array_equal(nei_list.cells(), [0, 2, 2])
+
+    def test_exact_2D(self):
+        """
+        Test that the neighbors are the neighbors of the Delaunay
+        triangulation.
+        """
+        from scipy.spatial import Delaunay
+        import itertools
+        np.random.seed(1)
+        disc = self.create_disc(np.random.random((200, 2)))
+        nei_list = calculateError.cell_connectivity_exact(disc)
+        expected = [set() for _ in xrange(200)]
+        for simplex in Delaunay(disc._input_sample_set._values).simplices:
+            for i, j in itertools.combinations(simplex, 2):
+                expected[i].add(disc._io_ptr[j])
+                expected[j].add(disc._io_ptr[i])
+        for i in xrange(200):
+            nptest.assert_array_equal(nei_list[i], sorted(expected[i]))
+
+    def test_exact_1D(self):
+        """
+        Test that the neighbors of unsorted samples in 1D are the adjacent
+        samples.
+        """
+        values = np.array([[0.9], [0.1], [0.6], [0.3], [0.2]])
+        disc = self.create_disc(values)
+        nei_list = calculateError.cell_connectivity_exact(disc)
+        # contour events of the samples are [3, 0, 2, 1, 0]
+        for i, events in enumerate([[2], [0], [1, 3], [0, 2], [0, 1]]):
+            nptest.assert_array_equal(nei_list[i], events)
+
+    def test_boundary_sets(self):
+        """
+        Test :meth:`bet.calculateP.calculateError.boundary_sets` with the
+        connectivity and with lists of neighboring contour events.
+        """
+        np.random.seed(2)
+        disc = self.create_disc(np.random.random((100, 2)))
+        nei_list = calculateError.cell_connectivity_exact(disc)
+        (B_N, C_N) = calculateError.boundary_sets(disc, nei_list)
+        self.assertEqual(B_N.shape, (4, 100))
+        self.assertEqual(C_N.shape, (4, 100))
+        B_N = B_N.toarray()
+        C_N = C_N.toarray()
+        for i in xrange(100):
+            self.assertEqual(np.sum(B_N[:, i]), list(nei_list[i]) == \
+                    [disc._io_ptr[i]])
+            self.assertEqual(B_N[disc._io_ptr[i], i], list(nei_list[i]) == \
+                    [disc._io_ptr[i]])
+            for j in xrange(4):
+                self.assertEqual(C_N[j, i], j in nei_list[i])
+        lists = [list(nei_list[i]) for i in xrange(100)]
+        (B_N_lists, C_N_lists) = calculateError.boundary_sets(disc, lists)
+        nptest.assert_array_equal(B_N, B_N_lists.toarray())
+        nptest.assert_array_equal(C_N, C_N_lists.toarray())
+
+    def test_knn_1D(self):
+        """
+        Test that the pruned nearest neighbor graph of unsorted samples in 1D
+        connects the adjacent samples.
+        """
+        values = np.array([[0.9], [0.1], [0.6], [0.3], [0.2]])
+        disc = self.create_disc(values)
+        nei_list = calculateError.cell_connectivity_knn(disc, k=4,
+                gabriel=True)
+        for i, events in enumerate([[2], [0], [1, 3], [0, 2], [0, 1]]):
+            nptest.assert_array_equal(nei_list[i], events)
+
+    def test_knn_2D(self):
+        """
+        Test that the pruned nearest neighbor graph is a subgraph of the
+        Delaunay triangulation and that the nearest neighbor graph contains
+        the nearest neighbors.
+        """
+        from scipy.spatial import cKDTree
+        np.random.seed(3)
+        disc = self.create_disc(np.random.random((100, 2)))
+        exact = calculateError.cell_connectivity_exact(disc)
+        gabriel = calculateError.cell_connectivity_knn(disc, k=99,
+                gabriel=True)
+        knn = calculateError.cell_connectivity_knn(disc)
+        nearest = cKDTree(disc._input_sample_set._values).query(
+                disc._input_sample_set._values, 2)[1][:, 1]
+        for i in xrange(100):
+            self.assertTrue(set(gabriel[i]) <= set(exact[i]))
+            self.assertIn(disc._io_ptr[nearest[i]], knn[i])
+
+    def test_knn_sampling_error(self):
+        """
+        Test :class:`bet.calculateP.calculateError.sampling_error` with
+        approximate connectivity in 8 dimensions.
+        """
+        np.random.seed(4)
+        disc = self.create_disc(np.random.random((500, 8)))
+        disc._output_probability_set.set_probabilities(np.ones((4,))/4.0)
+        disc._input_sample_set.estimate_volume_mc()
+        for gabriel in [False, True]:
+            s_error = calculateError.sampling_error(disc, exact=False,
+                    gabriel=gabriel)
+            (upper, lower) = s_error.calculate_for_contour_events()
+            self.assertEqual(len(upper), 4)
+            for (up, low) in zip(upper, lower):
+                if not np.isnan(up):
+                    self.assertGreaterEqual(up, 0.0)
+                    self.assertLessEqual(low, 0.0)
@@ -0,0 +1,93 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module contains tests for the import time of :mod:`bet`. Heavy optional
+dependencies (:mod:`scipy` submodules, :mod:`matplotlib`, :mod:`pyDOE`) are
+only imported when they are first used.
+"""
+
+import sys
+import json
+import subprocess
+import unittest
+from bet.Comm import comm
+
+#: modules that should not be imported by importing :mod:`bet`
+HEAVY_MODULES = ['scipy.io', 'scipy.spatial', 'scipy.stats', 'matplotlib',
+        'matplotlib.pyplot', 'pyDOE', 'bet.sampling.LpGeneralizedSamples']
+
+#: seconds that importing the modules of :mod:`bet` may take in addition to
+#: :mod:`numpy` and :mod:`bet.Comm`
+IMPORT_BUDGET = 1.0
+
+BET_MODULES = ['bet.util', 'bet.sample', 'bet.sampling.basicSampling',
+        'bet.sampling.adaptiveSampling', 'bet.calculateP.calculateP',
+        'bet.calculateP.simpleFunP', 'bet.calculateP.calculateError',
+        'bet.postProcess.plotP', 'bet.postProcess.plotDomains',
+        'bet.postProcess.plotVoronoi', 'bet.postProcess.postTools',
+        'bet.sensitivity.gradients', 'bet.sensitivity.chooseQoIs',
+        'bet.surrogates']
+
+SCRIPT = """
+import sys, time, json
+import numpy
+import bet.Comm
+start = time.time()
+for name in {modules}:
+    __import__(name)
+elapsed = time.time() - start
+{statement}
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(m for m in
+    sys.modules if sys.modules[m] is not None)}}))
+"""
+
+def import_in_subprocess(modules, statement=''):
+    """
+    Imports ``modules`` in a fresh interpreter and then executes
+    ``statement``.
+
+    :param list modules: names of the modules to import
+    :param string statement: statement to execute after the imports
+
+    :rtype: tuple
+    :returns: (elapsed, modules) the time it took to import ``modules`` and
+        the names of all imported modules
+    """
+    output = subprocess.check_output([sys.executable, '-c',
+        SCRIPT.format(modules=repr(modules),
+        statement=statement)])
+    result = json.loads(output.strip().splitlines()[-1])
+    return (result['elapsed'], result['modules'])
+
+@unittest.skipIf(comm.size > 1, 'Only run in serial')
+class Test_imports(unittest.TestCase):
+    """
+    Test the modules imported by and the import time of :mod:`bet`.
+    """
+    def setUp(self):
+        (self.elapsed, self.modules) = import_in_subprocess(BET_MODULES)
+
+    def test_lazy_imports(self):
+        """
+        Test that heavy optional dependencies are not imported.
+        """
+        for name in BET_MODULES:
+            self.assertIn(name, self.modules)
+        for name in HEAVY_MODULES:
+            self.assertNotIn(name, self.modules)
+
+    def test_import_budget(self):
+        """
+        Test that importing :mod:`bet` stays within :data:`IMPORT_BUDGET`.
+        """
+        self.assertLess(self.elapsed, IMPORT_BUDGET)
+
+    def test_deferred_import(self):
+        """
+        Test that the heavy dependencies are imported on first use.
+        """
+        (_, modules) = import_in_subprocess(['bet.sample'],
+                "s_set = sys.modules['bet.sample'].sample_set(1)\n"
+                "s_set.set_values(numpy.zeros((2, 1)))\n"
+                "s_set.set_kdtree()")
+        self.assertIn('scipy.spatial', modules)
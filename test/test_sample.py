@@ -1510,3 +1510,228 @@ class Test_cartesian_sample_set(unittest.TestCase):
         self.sam_set.exact_volume_lebesgue()
         volumes = self.sam_set.get_volumes()
         nptest.assert_array_almost_equal(volumes, [.25, 0.25, 0.25, 0.25, 0.0])
+
+class Test_cartesian_sample_set_3d(unittest.TestCase):
+    def test_setup(self):
+        """
+        Check the order of the rectangles of a three dimensional grid.
+        """
+        xi = [np.linspace(0, 1, 3), np.linspace(0, 2, 4), np.linspace(0, 3,
+            5)]
+        sam_set = sample.cartesian_sample_set(dim=3)
+        sam_set.setup(xi)
+        self.assertEqual(sam_set.check_num(), 2*3*4+1)
+        maxes = np.vstack(np.array(np.meshgrid(*[x[1:] for x in xi])).T)
+        mins = np.vstack(np.array(np.meshgrid(*[x[:-1] for x in xi])).T)
+        nptest.assert_array_equal(sam_set._right[:-1], maxes.reshape((24,
+            3)))
+        nptest.assert_array_equal(sam_set._left[:-1], mins.reshape((24, 3)))
+        nptest.assert_array_almost_equal(sam_set._values[:-1],
+                0.5*(sam_set._right[:-1] + sam_set._left[:-1]))
+
+class Test_regular_grid_sample_set(unittest.TestCase):
+    def setUp(self):
+        self.dim = 2
+        self.axes = [np.array([0.0, 0.5, 1.0]), np.array([0.1, 0.3, 0.6,
+            0.9])]
+        self.sam_set = sample.regular_grid_sample_set(dim=self.dim)
+        self.sam_set.setup(self.axes)
+        self.sam_set.set_domain(np.array([[0, 1], [0, 1]], dtype=np.float))
+        grid = np.meshgrid(*self.axes, indexing='ij')
+        self.values = np.column_stack([g.ravel() for g in grid])
+
+    def test_values(self):
+        """
+        Check that the values are created lazily from the axes.
+        """
+        self.assertEqual(self.sam_set.check_num(), 12)
+        self.assertIsNone(self.sam_set._values)
+        self.sam_set.global_to_local()
+        self.assertIsNone(self.sam_set._values)
+        nptest.assert_array_equal(self.sam_set._values_local,
+                np.array_split(self.values, comm.size)[comm.rank])
+        nptest.assert_array_equal(self.sam_set.get_values(), self.values)
+        for (axis, loaded) in zip(self.axes, self.sam_set.get_axes()):
+            nptest.assert_array_equal(axis, loaded)
+        with self.assertRaises(sample.length_not_matching):
+            self.sam_set.set_probabilities(np.ones((5,)))
+            self.sam_set.check_num()
+
+    def test_query(self):
+        """
+        Check that queries match a kd tree of the values.
+        """
+        import scipy.spatial as spatial
+        np.random.seed(1)
+        x = np.random.random((50, self.dim))*1.4-0.2
+        tree = spatial.KDTree(self.values)
+        for p_norm in [2.0, 1.0, np.inf]:
+            self.sam_set.set_p_norm(p_norm)
+            (dist, ptr) = self.sam_set.query(x)
+            (ref_dist, ref_ptr) = tree.query(x, p=p_norm)
+            nptest.assert_array_almost_equal(dist, ref_dist)
+            if not np.isinf(p_norm):
+                # nearest neighbors in the max norm are not unique
+                nptest.assert_array_equal(ptr, ref_ptr)
+        self.assertIsNone(self.sam_set._kdtree)
+        (_, ptr) = self.sam_set.query(x, k=2)
+        nptest.assert_array_equal(ptr, tree.query(x, k=2, p=np.inf)[1])
+
+    def test_exact_volume(self):
+        """
+        Check the volumes including the partial cells at the boundary.
+        """
+        self.sam_set.exact_volume()
+        volumes = np.outer([0.25, 0.5, 0.25], [0.2, 0.25, 0.3, 0.25]).ravel()
+        nptest.assert_array_almost_equal(self.sam_set.get_volumes(), volumes)
+        nptest.assert_array_almost_equal(self.sam_set.get_volumes_local(),
+                np.array_split(volumes, comm.size)[comm.rank])
+        self.sam_set.estimate_volume_mc(globalize=False)
+        nptest.assert_array_almost_equal(self.sam_set.get_volumes_local(),
+                np.array_split(volumes, comm.size)[comm.rank])
+        self.sam_set.set_volumes(None)
+        self.sam_set.estimate_volume()
+        nptest.assert_array_almost_equal(self.sam_set.get_volumes(), volumes)
+
+    def test_discretization(self):
+        """
+        Check a discretization with a regular grid input sample set.
+        """
+        emulated_set = sample.sample_set(self.dim)
+        np.random.seed(2)
+        emulated_set.set_values(np.random.random((40, self.dim)))
+        output_set = sample.sample_set(1)
+        output_set.set_values_local(np.sum(self.sam_set.get_values_local(),
+            1))
+        disc = sample.discretization(self.sam_set, output_set,
+                emulated_input_sample_set=emulated_set)
+        disc.set_emulated_ii_ptr(globalize=False)
+        (_, ptr) = sample.sample_set.query(self.sam_set,
+                emulated_set.get_values_local())
+        nptest.assert_array_equal(disc._emulated_ii_ptr_local, ptr)
+
+    def test_regular_sample_set(self):
+        """
+        Check :meth:`bet.sampling.basicSampling.regular_sample_set`.
+        """
+        domain = np.array([[-1.0, 1.0], [0.0, 3.0]])
+        grid_set = bsam.regular_sample_set(domain, [4, 3], globalize=False)
+        self.assertIsInstance(grid_set, sample.regular_grid_sample_set)
+        self.assertIsNone(grid_set._values)
+        self.assertEqual(grid_set.check_num(), 12)
+        grid_set.estimate_volume_mc()
+        nptest.assert_array_almost_equal(grid_set.get_volumes(),
+                np.ones((12,))/12.0)
+        nptest.assert_array_almost_equal(grid_set.get_values()[:4],
+                [[-0.75, 0.5], [-0.75, 1.5], [-0.75, 2.5], [-0.25, 0.5]])
+
+    def test_set_values(self):
+        """
+        Check that setting values makes a general Voronoi sample set.
+        """
+        self.sam_set.set_values(self.values[:5])
+        self.assertIsNone(self.sam_set.get_axes())
+        self.assertEqual(self.sam_set.check_num(), 5)
+        (_, ptr) = self.sam_set.query(self.values[3:4])
+        nptest.assert_array_equal(ptr, [3])
+
+    def test_copy(self):
+        """
+        Check copy.
+        """
+        copied_set = self.sam_set.copy()
+        self.assertIsInstance(copied_set, sample.regular_grid_sample_set)
+        nptest.assert_array_equal(copied_set.get_values(), self.values)
+
+class Test_load_parallel(unittest.TestCase):
+    """
+    Test loading sample sets and discretizations from files saved by a
+    different number of processors.
+    """
+    def setUp(self):
+        import scipy.io as sio
+        np.random.seed(1)
+        self.file_name = os.path.join(local_path, 'testfile_parallel')
+        self.num = 23
+        self.values = np.random.random((self.num, 2))
+        self.outputs = np.random.random((self.num, 1))
+        self.probabilities = np.random.random((self.num,))
+        self.io_ptr = np.arange(self.num) % 4
+        self.domain = np.array([[0.0, 1.0], [0.0, 1.0]])
+        if comm.rank == 0:
+            # files of a run with one processor more
+            for old_rank, rows in enumerate(np.array_split(\
+                    np.arange(self.num), comm.size+1)):
+                mdat = {'TEST_input_sample_set_dim':2,
+                        'TEST_input_sample_set_sample_set_type':
+                        'bet.sample.sample_set',
+                        'TEST_input_sample_set_values_local':
+                        self.values[rows],
+                        'TEST_input_sample_set_probabilities_local':
+                        self.probabilities[rows],
+                        'TEST_input_sample_set_domain':self.domain,
+                        'TEST_output_sample_set_dim':1,
+                        'TEST_output_sample_set_sample_set_type':
+                        'bet.sample.sample_set',
+                        'TEST_output_sample_set_values_local':
+                        self.outputs[rows],
+                        'TEST_io_ptr_local':self.io_ptr[rows]}
+                sio.savemat(os.path.join(local_path, "proc{}_{}".format(\
+                    old_rank, 'testfile_parallel')), mdat)
+        comm.barrier()
+
+    def tearDown(self):
+        comm.barrier()
+        if comm.rank == 0:
+            for mdat_file in sample.parallel_file_names(self.file_name):
+                os.remove(mdat_file)
+        comm.barrier()
+
+    def test_parallel_file_names(self):
+        """
+        Test :meth:`bet.sample.parallel_file_names`.
+        """
+        mdat_files = sample.parallel_file_names(self.file_name)
+        self.assertEqual(len(mdat_files), comm.size+1)
+        for old_rank, mdat_file in enumerate(mdat_files):
+            self.assertEqual(os.path.basename(mdat_file),
+                    "proc{}_testfile_parallel.mat".format(old_rank))
+        self.assertEqual(sample.parallel_file_names(self.file_name+'.mat'),
+                mdat_files)
+        self.assertEqual(sample.parallel_file_names('testfile_parall'), [])
+
+    def test_load_sample_set_parallel(self):
+        """
+        Test :meth:`bet.sample.load_sample_set_parallel`.
+        """
+        loaded_set = sample.load_sample_set_parallel(self.file_name,
+                'TEST_input_sample_set')
+        local_index = np.array_split(np.arange(self.num),
+                comm.size)[comm.rank]
+        nptest.assert_array_equal(loaded_set._local_index, local_index)
+        nptest.assert_array_equal(loaded_set.get_values_local(),
+                self.values[local_index])
+        nptest.assert_array_equal(loaded_set.get_probabilities_local(),
+                self.probabilities[local_index])
+        nptest.assert_array_equal(loaded_set.get_domain(), self.domain)
+        self.assertIsNone(loaded_set.get_values())
+        self.assertIsNone(sample.load_sample_set_parallel(self.file_name,
+            'OTHER'))
+
+    def test_load_discretization_parallel(self):
+        """
+        Test :meth:`bet.sample.load_discretization_parallel` and that
+        :meth:`bet.sample.load_discretization` uses it.
+        """
+        local_index = np.array_split(np.arange(self.num),
+                comm.size)[comm.rank]
+        for loaded_disc in [sample.load_discretization_parallel(\
+                self.file_name, 'TEST'), sample.load_discretization(\
+                    self.file_name, 'TEST')]:
+            nptest.assert_array_equal(loaded_disc._input_sample_set.\
+                    get_values_local(), self.values[local_index])
+            nptest.assert_array_equal(loaded_disc._output_sample_set.\
+                    get_values_local(), self.outputs[local_index])
+            nptest.assert_array_equal(loaded_disc._io_ptr_local,
+                    self.io_ptr[local_index])
+            self.assertIsNone(loaded_disc._emulated_input_sample_set)
@@ -4,4 +4,6 @@
 This subpackage contains the test modules for the sampling subpackage.
 """
 __all__ = ['test_adaptiveSampling','test_basicSampling',
-    'test_LpGeneralizedSamples']
+    'test_LpGeneralizedSamples', 'test_launcher', 'test_evaluationCache',
+    'test_latinHypercube', 'test_quasiMonteCarlo',
+    'test_spaceFillingCurve', 'test_distributedIndex']
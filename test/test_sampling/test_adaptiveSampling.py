@@ -11,12 +11,17 @@ import unittest, os, glob
 import numpy.testing as nptest
 import numpy as np
 import bet.sampling.adaptiveSampling as asam
+import bet.sampling.basicSampling as bsam
 import scipy.io as sio
 from bet.Comm import comm 
 import bet
 import bet.sample
 from bet.sample import sample_set
 from bet.sample import discretization as disc
+try:
+    import concurrent.futures as futures
+except ImportError:
+    futures = None
 
 #local_path = os.path.join(os.path.dirname(bet.__file__),
 #    "../test/test_sampling")
@@ -99,6 +104,69 @@ def test_loadmat_init():
         if os.path.exists(os.path.join(local_path, 'testfile2.mat')):
             os.remove(os.path.join(local_path, 'testfile2.mat'))
 
+def test_loadmat_parallel():
+    """
+    Tests :meth:`bet.sampling.adaptiveSampling.loadmat` for a hot start from
+    the files of a partial run with a different number of processors.
+    """
+    np.random.seed(1)
+    chain_length = 3
+    old_num_proc = comm.size+1
+    num_chains = 2*comm.size*old_num_proc
+    old_num_chains_pproc = num_chains/old_num_proc
+    num_chains_pproc = num_chains/comm.size
+    # chain-major samples of all chains
+    inputs = np.random.random((num_chains, chain_length, 2))
+    outputs = np.random.random((num_chains, chain_length, 1))
+    step_ratios = np.random.random((num_chains, chain_length))
+    kern_old = np.random.random((num_chains,))
+    savefile = os.path.join(local_path, 'testfile_parallel')
+
+    def batch_major(chains):
+        return np.reshape(np.swapaxes(chains, 0, 1), (-1,)+chains.shape[2:])
+
+    if comm.rank == 0:
+        for old_rank in xrange(old_num_proc):
+            chains = slice(old_rank*old_num_chains_pproc,
+                    (old_rank+1)*old_num_chains_pproc)
+            mdat = {'num_chains':num_chains,
+                    'chain_length':chain_length,
+                    'step_ratios':batch_major(step_ratios[chains]),
+                    'kern_old':kern_old[chains],
+                    'default_input_sample_set_dim':2,
+                    'default_input_sample_set_sample_set_type':
+                    'bet.sample.sample_set',
+                    'default_input_sample_set_values_local':
+                    batch_major(inputs[chains]),
+                    'default_output_sample_set_dim':1,
+                    'default_output_sample_set_sample_set_type':
+                    'bet.sample.sample_set',
+                    'default_output_sample_set_values_local':
+                    batch_major(outputs[chains])}
+            sio.savemat(os.path.join(local_path, "proc{}_{}".format(old_rank,
+                'testfile_parallel')), mdat)
+    comm.barrier()
+
+    (loaded_sampler, discretization, all_step_ratios, loaded_kern_old) = \
+            asam.loadmat(savefile, hot_start=1)
+    chains = slice(comm.rank*num_chains_pproc,
+            (comm.rank+1)*num_chains_pproc)
+    nptest.assert_array_equal(discretization._input_sample_set.\
+            get_values_local(), batch_major(inputs[chains]))
+    nptest.assert_array_equal(discretization._output_sample_set.\
+            get_values_local(), batch_major(outputs[chains]))
+    nptest.assert_array_equal(all_step_ratios,
+            batch_major(step_ratios[chains]))
+    nptest.assert_array_equal(loaded_kern_old, kern_old[chains])
+    assert loaded_sampler.chain_length == chain_length
+    assert loaded_sampler.num_chains == num_chains
+    assert loaded_sampler.num_chains_pproc == num_chains_pproc
+    comm.barrier()
+    if comm.rank == 0:
+        for mdat_file in bet.sample.parallel_file_names(savefile):
+            os.remove(mdat_file)
+    comm.barrier()
+
 def verify_samples(QoI_range, sampler, input_domain,
         t_set, savefile, initial_sample_type, hot_start=0):
     """
@@ -751,6 +819,35 @@ class maxima_kernel(kernel):
         #nptest.assert_array_eqyal(kern_new, something)
         nptest.assert_array_equal(proposal, [0.5, 2.0, 1.0])
 
+    def test_weighted_distance(self):
+        """
+        Test the weighted_distance method of
+        :class:`bet.sampling.adaptiveSampling.maxima_kernel`
+        """
+        rho_max = np.ravel(self.kernel.rho_max)
+        expected = [np.min(np.linalg.norm(self.kernel.MAXIMA - q, 2,
+            1)/rho_max) for q in self.output]
+        nptest.assert_array_almost_equal(self.kernel.weighted_distance(
+            self.output), expected)
+
+    def test_many_maxima(self):
+        """
+        Test the weighted distance to many maxima with and without a kd-tree.
+        """
+        maxima = np.random.random((200, self.mdim))*10.0
+        tree_kernel = asam.maxima_kernel(maxima, lambda x:
+                np.ones((x.shape[0],)))
+        assert tree_kernel._kdtree is not None
+        weighted_kernel = asam.maxima_kernel(maxima, lambda x:
+                np.arange(1.0, x.shape[0]+1))
+        assert weighted_kernel._kdtree is None
+        for kern, weights in [(tree_kernel, 1.0), (weighted_kernel,
+            np.arange(1.0, 201))]:
+            expected = [np.min(np.linalg.norm(maxima - q, 2, 1)/weights) for
+                    q in self.output]
+            nptest.assert_array_almost_equal(kern.weighted_distance(
+                self.output), expected)
+
 class test_maxima_kernel_1D(maxima_kernel, output_1D):
     """
     Test :class:`bet.sampling.adaptiveSampling.maxima_kernel` on a 1D output
@@ -904,6 +1001,9 @@ class transition_set(object):
         step_ratio[local_num/2:] = .1
         step_size = np.repeat([step_ratio], self.output_set.get_dim(),
                 0).transpose()*self.output_set._width_local
+        self.output_set.set_p_norm(np.inf)
+        self.output_set.set_reference_value(np.zeros((
+            self.output_set.get_dim(),)))
         # take a step
         samples_new = self.t_set.step(step_ratio, self.output_set)
 
@@ -926,6 +1026,68 @@ class transition_set(object):
                 self.output_set.get_values_local()\
                 -0.5*step_size)
 
+        # only the domain, bounds, p_norm and reference value are passed on
+        assert samples_new._domain is self.output_set._domain
+        assert samples_new.get_p_norm() == np.inf
+        assert samples_new.get_reference_value() is \
+                self.output_set.get_reference_value()
+        assert samples_new._probabilities is None
+        assert samples_new._kdtree is None
+
+    def test_step_values_reflect(self):
+        """
+        Tests the method
+        :meth:`bet.sampling.adaptiveSampling.transition_set.step_values` with
+        reflective boundaries.
+        """
+        t_set = asam.transition_set(.5, .5**5, 1.0, 'reflect')
+        values = self.output_set.get_values_local()
+        (left, right) = (self.output_domain[:, 0], self.output_domain[:, 1])
+        step_ratio = np.ones((values.shape[0],))
+        out = np.empty(values.shape)
+        samples_new = t_set.step_values(step_ratio, values, left, right, out)
+        assert samples_new is out
+        assert np.all(samples_new <= right)
+        assert np.all(samples_new >= left)
+        assert np.all(np.abs(samples_new - values) <= 0.5*(right-left))
+
+        # steps from the lower bound with the whole domain as step size are
+        # uniform in the lower half of the domain
+        np.random.seed(1)
+        values = np.repeat([left], 4000, 0)
+        samples_new = t_set.step_values(np.ones((4000,)), values, left, right)
+        nptest.assert_array_almost_equal(np.mean(samples_new, 0),
+                left + 0.25*(right-left), 1)
+        # a box around the center does not touch the boundary
+        values = np.repeat([0.5*(left+right)], 4000, 0)
+        samples_new = t_set.step_values(0.5*np.ones((4000,)), values, left,
+                right)
+        assert np.all(np.abs(samples_new - values) <= 0.25*(right-left))
+        # dimensions without width stay at the bound
+        (left, right) = (np.array([0.0, 2.0]), np.array([1.0, 2.0]))
+        values = np.column_stack((np.random.random((20,)), 2.0*np.ones((20,))))
+        samples_new = t_set.step_values(np.ones((20,)), values, left, right)
+        assert not np.any(np.isnan(samples_new))
+        nptest.assert_array_equal(samples_new[:, 1], 2.0)
+        assert np.all(samples_new[:, 0] >= 0.0)
+        assert np.all(samples_new[:, 0] <= 1.0)
+        # and with bounds for each sample
+        samples_new = t_set.step_values(np.ones((20,)), values,
+                np.repeat([left], 20, 0), np.repeat([right], 20, 0))
+        nptest.assert_array_equal(samples_new[:, 1], 2.0)
+
+    def test_wrong_boundary(self):
+        """
+        Tests that unknown boundaries raise
+        :class:`bet.sampling.adaptiveSampling.wrong_boundary`.
+        """
+        try:
+            asam.transition_set(.5, .5**5, 1.0, 'periodic')
+        except asam.wrong_boundary:
+            pass
+        else:
+            assert False
+
 
 class test_transition_set_1D(transition_set, output_1D):
     """
@@ -963,3 +1125,448 @@ class test_transition_set_3D(transition_set, output_3D):
         super(test_transition_set_3D, self).createData()
         super(test_transition_set_3D, self).setUp()
 
+
+class Test_chain_engine(unittest.TestCase):
+    """
+    Test :class:`bet.sampling.adaptiveSampling.chain_engine`.
+    """
+    def setUp(self):
+        """
+        Set up
+        """
+        np.random.seed(1)
+        self.domain = np.array([[0.0, 1.0], [-1.0, 1.0]])
+        self.t_set = asam.transition_set(.5, .5**5, 1.0)
+        self.kernel = asam.rhoD_kernel(1.0, lambda x: np.exp(-np.sum(x**2,
+            1)))
+        self.engine = asam.chain_engine(3, 4, 2, 1)
+        self.input_values = np.random.random((6, 2))*[1.0, 2.0]-[0.0, 1.0]
+        self.output_values = np.sum(self.input_values, 1)[:, np.newaxis]
+        self.step_ratios = np.random.random((6,))*0.5
+        (self.kern_old, _) = self.kernel.delta_step(self.output_values[3:])
+        self.engine.load(self.input_values, self.output_values,
+                self.step_ratios, self.kern_old)
+
+    def test_load(self):
+        """
+        Test that batch-major local arrays are stored chain-major.
+        """
+        self.assertEqual(self.engine.length, 2)
+        nptest.assert_array_equal(self.engine.inputs[1, :2],
+                self.input_values[[1, 4]])
+        nptest.assert_array_equal(self.engine.step_ratios[2, :2],
+                self.step_ratios[[2, 5]])
+        nptest.assert_array_equal(self.engine.get_step_ratios_local(),
+                self.step_ratios)
+
+    def test_propose_accept(self):
+        """
+        Test that proposals are written in place and match
+        :meth:`bet.sampling.adaptiveSampling.transition_set.step`.
+        """
+        input_old = sample_set(2)
+        input_old.set_domain(self.domain)
+        input_old.set_values_local(self.input_values[3:])
+        input_old.update_bounds_local()
+        np.random.seed(2)
+        input_new = self.t_set.step(self.step_ratios[3:], input_old)
+        np.random.seed(2)
+        proposal = self.engine.propose(self.t_set, self.domain)
+        self.assertTrue(np.may_share_memory(proposal, self.engine.inputs))
+        nptest.assert_array_equal(proposal, input_new.get_values_local())
+
+        output_new = np.sum(proposal, 1)[:, np.newaxis]
+        (kern_new, ratio) = self.kernel.delta_step(output_new, self.kern_old)
+        self.engine.accept(output_new, self.kernel, self.t_set.min_ratio,
+                self.t_set.max_ratio)
+        self.assertEqual(self.engine.length, 3)
+        nptest.assert_array_equal(self.engine.kern_old, kern_new)
+        nptest.assert_array_almost_equal(self.engine.step_ratios[:, 2],
+                np.clip(ratio*self.step_ratios[3:], self.t_set.min_ratio,
+                    self.t_set.max_ratio))
+
+        my_disc = disc(sample_set(2), sample_set(1))
+        self.engine.to_discretization(my_disc)
+        nptest.assert_array_equal(my_disc._input_sample_set.\
+                get_values_local(), np.vstack((self.input_values,
+                    proposal)))
+        nptest.assert_array_equal(my_disc._output_sample_set.\
+                get_values_local(), np.vstack((self.output_values,
+                    output_new)))
+
+    def test_chain(self):
+        """
+        Test that chains advanced on their own only change their own state.
+        """
+        kern_old = np.copy(self.engine.kern_old)
+        step_ratios = np.copy(self.engine.step_ratios[:, :2])
+        proposal = self.engine.propose_chain(1, self.t_set, self.domain)
+        self.assertEqual(proposal.shape, (1, 2))
+        self.assertTrue(np.may_share_memory(proposal, self.engine.inputs))
+        output_new = np.sum(proposal, 1)
+        (kern_new, ratio) = self.kernel.delta_step(output_new[:,
+            np.newaxis], kern_old[1:2])
+        self.engine.accept_chain(1, output_new, self.kernel,
+                self.t_set.min_ratio, self.t_set.max_ratio)
+        nptest.assert_array_equal(self.engine.lengths, [2, 3, 2])
+        self.assertEqual(self.engine.length, 2)
+        nptest.assert_array_equal(self.engine.kern_old[[0, 2]],
+                kern_old[[0, 2]])
+        self.assertEqual(self.engine.kern_old[1], kern_new[0])
+        nptest.assert_array_equal(self.engine.step_ratios[:, :2], step_ratios)
+        self.assertAlmostEqual(self.engine.step_ratios[1, 2], np.clip(
+            ratio[0]*step_ratios[1, 1], self.t_set.min_ratio,
+            self.t_set.max_ratio))
+
+    def test_async_chains(self):
+        """
+        Test :meth:`bet.sampling.adaptiveSampling.sampler.generalized_chains`
+        with an executor.
+        """
+        if futures is None:
+            self.skipTest("concurrent.futures is not installed")
+        import time
+        def model(inputs):
+            time.sleep(0.01*np.random.random())
+            return np.sum(inputs, 1)[:, np.newaxis]
+        savefile = os.path.join(local_path, 'async_chains')
+        my_sampler = asam.sampler(8*comm.size*6, 6, model)
+        with futures.ThreadPoolExecutor(max_workers=4) as executor:
+            (my_disc, all_step_ratios) = my_sampler.generalized_chains(
+                    self.domain, self.t_set, self.kernel, savefile,
+                    executor=executor)
+        self.assertEqual(all_step_ratios.shape, (my_sampler.num_chains, 6))
+        self.assertTrue(np.all(all_step_ratios >= self.t_set.min_ratio))
+        self.assertTrue(np.all(all_step_ratios <= self.t_set.max_ratio))
+        inputs = my_disc._input_sample_set.get_values()
+        self.assertEqual(inputs.shape, (my_sampler.num_samples, 2))
+        self.assertTrue(np.all(inputs >= self.domain[:, 0]))
+        self.assertTrue(np.all(inputs <= self.domain[:, 1]))
+        nptest.assert_array_almost_equal(my_disc._output_sample_set.\
+                get_values(), model(inputs))
+        if comm.size == 1:
+            # each chain follows its own kernel values and step ratios
+            outputs = np.reshape(my_disc._output_sample_set.get_values(),
+                    (my_sampler.num_chains, 6, 1), 'F')
+            for c in xrange(my_sampler.num_chains):
+                for j in xrange(1, 6):
+                    (_, ratio) = self.kernel.delta_step(outputs[c, j:j+1],
+                            self.kernel.rho_D(outputs[c, j-1:j]))
+                    self.assertAlmostEqual(all_step_ratios[c, j],
+                            np.clip(ratio[0]*all_step_ratios[c, j-1],
+                                self.t_set.min_ratio, self.t_set.max_ratio))
+        comm.barrier()
+        if comm.rank == 0:
+            for f in glob.glob(savefile+'.mat')+glob.glob(os.path.join(
+                local_path, 'proc*_async_chains.mat')):
+                os.remove(f)
+
+class Test_surrogate_screen(unittest.TestCase):
+    """
+    Test :class:`bet.sampling.adaptiveSampling.surrogate_screen`.
+    """
+    def setUp(self):
+        """
+        Set up
+        """
+        np.random.seed(3)
+        self.domain = np.array([[0.0, 1.0], [0.0, 1.0]])
+        self.t_set = asam.transition_set(.5, .5**5, 1.0)
+        # rho_D is positive for outputs larger than 1.5
+        self.kernel = asam.rhoD_kernel(1.0, lambda x: np.greater(np.sum(x,
+            1), 1.5).astype('float64'))
+        self.engine = asam.chain_engine(4, 5, 2, 1)
+        input_values = np.random.random((8, 2))
+        self.engine.load(input_values, np.sum(input_values, 1), 0.5*np.ones(
+            (8,)), self.kernel.evaluate(np.sum(input_values[4:], 1)[:,
+                np.newaxis]))
+
+    def test_predict(self):
+        """
+        Test that the surrogate predicts the output of the nearest evaluated
+        sample.
+        """
+        screen = asam.surrogate_screen(0.0)
+        screen.update(self.engine)
+        nptest.assert_array_equal(screen.predict(self.engine.inputs[:, 1]),
+                self.engine.outputs[:, 1])
+
+    def test_screen(self):
+        """
+        Test the rejection and verification of irrelevant proposals.
+        """
+        chains = np.arange(4)
+        # every proposal is irrelevant, none is verified
+        screen = asam.surrogate_screen(2.0, verify_rate=0.0, max_retries=3)
+        self.engine.propose(self.t_set, self.domain)
+        screen.screen(self.engine, chains, self.t_set, self.kernel,
+                self.domain)
+        self.assertEqual(screen.num_screened, 4)
+        self.assertEqual(screen.num_rejected, 12)
+        self.assertEqual(screen.num_verified, 0)
+        proposals = self.engine.inputs[:, 2]
+        self.assertTrue(np.all(proposals >= 0.0))
+        self.assertTrue(np.all(proposals <= 1.0))
+        self.assertTrue(np.all(np.abs(proposals - self.engine.inputs[:, 1])
+            <= 0.25))
+        # every irrelevant proposal is verified
+        screen = asam.surrogate_screen(2.0, verify_rate=1.0)
+        screen.screen(self.engine, chains, self.t_set, self.kernel,
+                self.domain)
+        self.assertEqual(screen.num_rejected, 0)
+        self.assertEqual(screen.num_verified, 4)
+        # relevant proposals are kept
+        screen = asam.surrogate_screen(-1.0, verify_rate=0.0)
+        before = np.copy(self.engine.inputs[:, 2])
+        screen.screen(self.engine, chains, self.t_set, self.kernel,
+                self.domain)
+        self.assertEqual(screen.num_rejected, 0)
+        nptest.assert_array_equal(self.engine.inputs[:, 2], before)
+        screen.reset()
+        self.assertEqual(screen.num_screened, 0)
+
+    def test_generalized_chains(self):
+        """
+        Test :meth:`bet.sampling.adaptiveSampling.sampler.generalized_chains`
+        with a screen.
+        """
+        def model(inputs):
+            return np.sum(inputs, 1)[:, np.newaxis]
+        savefile = os.path.join(local_path, 'screened_chains')
+        my_sampler = asam.sampler(10*comm.size*8, 8, model)
+        screen = asam.surrogate_screen(0.0, verify_rate=0.2)
+        (my_disc, _) = my_sampler.generalized_chains(self.domain, self.t_set,
+                self.kernel, savefile, screen=screen, checkpoint=0)
+        self.assertEqual(screen.num_screened, 10*7)
+        self.assertGreater(screen.num_rejected, 0)
+        nptest.assert_array_almost_equal(my_disc._output_sample_set.\
+                get_values(), model(my_disc._input_sample_set.get_values()))
+        comm.barrier()
+        if comm.rank == 0:
+            for f in glob.glob(savefile+'.mat')+glob.glob(os.path.join(
+                local_path, 'proc*_screened_chains.mat')):
+                os.remove(f)
+
+class Test_budget_controller(unittest.TestCase):
+    """
+    Test :class:`bet.sampling.adaptiveSampling.budget_controller`.
+    """
+    def setUp(self):
+        """
+        Set up
+        """
+        np.random.seed(4)
+        self.domain = np.array([[0.0, 1.0], [0.0, 1.0]])
+        self.t_set = asam.transition_set(.5, .5**5, 1.0)
+        self.kernel = asam.rhoD_kernel(1.0, lambda x: np.greater(np.sum(x,
+            1), 1.5).astype('float64'))
+        self.engine = asam.chain_engine(3, 8, 2, 1)
+        input_values = 0.1*np.random.random((12, 2))
+        step_ratios = np.reshape(np.array([[.5, .25, .125, .0625],
+            [.5, .5, .5, .5], [.5, .5, .5, .5]]).transpose(), (-1,))
+        self.engine.load(input_values, np.sum(input_values, 1), step_ratios,
+                np.zeros((3,)))
+        self.engine.restarts[2, 2] = True
+
+    def test_stagnated(self):
+        """
+        Test the detection of stagnated chains.
+        """
+        controller = asam.budget_controller(window=3)
+        nptest.assert_array_equal(controller.stagnated(self.engine,
+            [0, 1, 2]), [False, True, False])
+        controller = asam.budget_controller(window=4)
+        nptest.assert_array_equal(controller.stagnated(self.engine,
+            [0, 1, 2]), [False, False, False])
+
+    def test_restart(self):
+        """
+        Test that stagnated chains are restarted away from the evaluated
+        samples and start with the initial step ratio.
+        """
+        controller = asam.budget_controller(window=3)
+        self.engine.propose(self.t_set, self.domain)
+        proposals = np.copy(self.engine.inputs[:, 4])
+        controller.restart(self.engine, np.arange(3), self.domain)
+        self.assertEqual(controller.num_retired, 1)
+        nptest.assert_array_equal(self.engine.restarts[:, 4], [False, True,
+            False])
+        nptest.assert_array_equal(self.engine.inputs[[0, 2], 4],
+                proposals[[0, 2]])
+        # the evaluated samples are all in [0, 0.1]^2
+        self.assertGreater(np.max(self.engine.inputs[1, 4]), 0.3)
+        output_new = np.sum(self.engine.inputs[:, 4], 1)
+        self.engine.accept(output_new, self.kernel, self.t_set.min_ratio,
+                self.t_set.max_ratio)
+        controller.accepted(self.engine, np.arange(3), self.kernel,
+                self.t_set)
+        self.assertEqual(self.engine.step_ratios[1, 4], self.t_set.init_ratio)
+        self.assertEqual(self.engine.kern_old[1],
+                self.kernel.evaluate(output_new[1:2, np.newaxis])[0])
+        nptest.assert_array_equal(self.engine.get_restarts_local()[-3:],
+                [False, True, False])
+
+    def test_generalized_chains(self):
+        """
+        Test :meth:`bet.sampling.adaptiveSampling.sampler.generalized_chains`
+        with a budget controller.
+        """
+        def model(inputs):
+            return np.sum(inputs, 1)[:, np.newaxis]
+        savefile = os.path.join(local_path, 'controlled_chains')
+        my_sampler = asam.sampler(6*comm.size*12, 12, model)
+        controller = asam.budget_controller(window=3)
+        (my_disc, all_step_ratios) = my_sampler.generalized_chains(
+                self.domain, self.t_set, self.kernel, savefile,
+                controller=controller, checkpoint=0)
+        self.assertEqual(all_step_ratios.shape, (my_sampler.num_chains, 12))
+        self.assertEqual(controller.restarts.shape, (my_sampler.num_chains,
+            12))
+        self.assertEqual(controller.stagnated_chains.shape,
+                (my_sampler.num_chains,))
+        self.assertGreater(np.sum(controller.restarts), 0)
+        nptest.assert_array_equal(all_step_ratios[controller.restarts],
+                self.t_set.init_ratio)
+        self.assertEqual(my_disc._input_sample_set.get_values().shape,
+                (my_sampler.num_samples, 2))
+        mdat = sio.loadmat(savefile)
+        nptest.assert_array_equal(mdat['restarts'], controller.restarts)
+        comm.barrier()
+        if comm.rank == 0:
+            for f in glob.glob(savefile+'.mat')+glob.glob(os.path.join(
+                local_path, 'proc*_controlled_chains.mat')):
+                os.remove(f)
+
+class Test_sweep(unittest.TestCase):
+    """
+    Test :meth:`bet.sampling.adaptiveSampling.sampler.run_sweep` and
+    :class:`bet.sampling.adaptiveSampling.memoized_model`.
+    """
+    def setUp(self):
+        """
+        Set up
+        """
+        self.calls = []
+        def model(inputs):
+            self.calls.append(inputs.shape[0])
+            return np.sum(inputs, 1)[:, np.newaxis]
+        self.model = model
+        self.domain = np.array([[0.0, 1.0], [0.0, 1.0]])
+        def rho_D(outputs):
+            return np.greater(np.sum(outputs, 1), 1.5).astype('float64')
+        self.rho_D = rho_D
+        self.savefile = os.path.join(local_path, 'sweep')
+
+    def tearDown(self):
+        comm.barrier()
+        if comm.rank == 0:
+            for f in glob.glob(self.savefile+'*.mat')+glob.glob(os.path.join(
+                local_path, 'proc*_sweep*.mat')):
+                os.remove(f)
+
+    def test_memoized_model(self):
+        """
+        Test that the model is solved once for each sample.
+        """
+        memo = asam.memoized_model(self.model)
+        inputs = np.array([[0.1, 0.2], [0.3, 0.4], [0.1, 0.2]])
+        nptest.assert_array_almost_equal(memo(inputs), [[0.3], [0.7],
+            [0.3]])
+        self.assertEqual(self.calls, [2])
+        nptest.assert_array_almost_equal(memo(inputs[1:]), [[0.7], [0.3]])
+        nptest.assert_array_almost_equal(memo(np.array([[0.5, 0.5], [0.1,
+            0.2]])),
+                [[1.0], [0.3]])
+        self.assertEqual(self.calls, [2, 1])
+        self.assertEqual((memo.hits, memo.misses), (4, 3))
+        self.assertEqual(len(memo), 3)
+
+    def test_memoized_model_threads(self):
+        """
+        Test that concurrent calls with identical samples solve the model
+        once.
+        """
+        import threading, time
+        started = threading.Event()
+        release = threading.Event()
+        def slow_model(inputs):
+            started.set()
+            release.wait()
+            return self.model(inputs)
+        memo = asam.memoized_model(slow_model)
+        inputs = np.array([[0.1, 0.2], [0.3, 0.4]])
+        outputs = [None, None]
+        def call(i):
+            outputs[i] = memo(inputs)
+        threads = [threading.Thread(target=call, args=(i,)) for i in \
+                xrange(2)]
+        threads[0].start()
+        started.wait()
+        threads[1].start()
+        # the second call waits for the samples of the first call
+        for _ in xrange(1000):
+            if memo.hits == 2:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, [2])
+        self.assertEqual((memo.hits, memo.misses), (2, 2))
+        nptest.assert_array_almost_equal(outputs[0], [[0.3], [0.7]])
+        nptest.assert_array_almost_equal(outputs[1], [[0.3], [0.7]])
+
+    def test_store(self):
+        """
+        Test :meth:`bet.sampling.adaptiveSampling.memoized_model.store`.
+        """
+        memo = asam.memoized_model(self.model)
+        memo.store(np.array([[0.1, 0.2]]), np.array([[5.0]]))
+        nptest.assert_array_almost_equal(memo(np.array([[0.1, 0.2], [0.3,
+            0.4]])), [[5.0], [0.7]])
+        self.assertEqual(self.calls, [1])
+
+    def test_run_sweep(self):
+        """
+        Test a sweep of configurations run by groups of processors with a
+        shared cache.
+        """
+        memo = asam.memoized_model(self.model)
+        my_sampler = asam.sampler(10*comm.size*5, 5, memo)
+        configurations = [(asam.transition_set(.5, .5**5, 1.0),
+            asam.rhoD_kernel(1.0, self.rho_D)), (asam.transition_set(.1,
+                .5**5, 1.0), asam.rhoD_kernel(1.0, self.rho_D)),
+            (asam.transition_set(.5, .5**5, 1.0), asam.maxima_kernel(
+                np.array([[2.0]]), lambda x: np.ones((x.shape[0],))))]
+        (results, r_step_size, results_rD, sort_ind, mean_ss, table) = \
+                my_sampler.run_sweep(configurations, self.rho_D, 1.0,
+                        self.domain, self.savefile, seed=3)
+        self.assertIs(my_sampler.lb_model, memo)
+        self.assertEqual(len(results), 3)
+        for i, step_sizes in enumerate(r_step_size):
+            self.assertEqual(step_sizes.shape, (my_sampler.num_chains, 5))
+            self.assertTrue(os.path.exists("{}_{}.mat".format(self.savefile,
+                i)))
+        # the initial samples are shared
+        initial = bsam.random_sample_set('lhs', self.domain,
+                my_sampler.num_chains, seed=3).get_values()
+        for result in results:
+            values = set(map(tuple, result._input_sample_set.get_values()))
+            self.assertTrue(set(map(tuple, initial)) <= values)
+        self.assertGreaterEqual(comm.allreduce(memo.hits),
+                2*my_sampler.num_chains)
+        # no sample is solved twice on a processor
+        self.assertLessEqual(memo.misses, len(memo))
+        if comm.size == 1:
+            self.assertEqual(memo.misses, len(memo))
+        # the table is sorted by the number of high probability samples
+        self.assertEqual(table.shape, (3,))
+        nptest.assert_array_equal(np.sort(table['configuration']), range(3))
+        self.assertTrue(np.all(np.diff(table['num_high_prob_samples']) <= 0))
+        nptest.assert_array_equal(table['num_high_prob_samples'],
+                np.array(results_rD)[table['configuration']])
+        nptest.assert_array_almost_equal(table['mean_step_ratio'],
+                np.array(mean_ss)[table['configuration']])
+        self.assertEqual(table['kernel'][table['configuration'] == 2][0],
+                'maxima_kernel')
+        nptest.assert_array_equal(sort_ind, np.argsort(results_rD))
@@ -5,7 +5,7 @@
 This module contains unittests for :mod:`~bet.sampling.basicSampling:`
 """
 
-import unittest, os, pyDOE
+import unittest, os, shutil, pyDOE
 import numpy.testing as nptest
 import numpy as np
 import scipy.io as sio
@@ -16,9 +16,65 @@ import bet.sample
 from bet.sample import sample_set
 from bet.sample import discretization as disc 
 import collections
+try:
+    import concurrent.futures as futures
+except ImportError:
+    futures = None
 
 local_path = os.path.join(".")
 
+def map_3t2_ee_jac(x):
+    """
+    A 3 to 2 linear map that returns values, error estimates and Jacobians.
+    """
+    Q_map = np.array([[0.506, 0.463], [0.253, 0.918], [0.085, 0.496]])
+    values = np.dot(x, Q_map)
+    jacobians = np.repeat([Q_map.transpose()], x.shape[0], 0)
+    return (values, 0.1*values, jacobians)
+
+def map_3t2(x):
+    """
+    A 3 to 2 linear map that returns values.
+    """
+    return map_3t2_ee_jac(x)[0]
+
+def map_fail(x):
+    """
+    A model that always fails.
+    """
+    raise ValueError("model failed")
+
+def map_fail_some(x):
+    """
+    A 3 to 2 linear map that fails at samples with a first coordinate larger
+    than 0.7.
+    """
+    if np.any(x[:, 0] > 0.7):
+        raise ValueError("model failed")
+    return map_3t2_ee_jac(x)
+
+class interrupted(BaseException):
+    """
+    Simulates a run that is killed.
+    """
+
+class interrupted_model(object):
+    """
+    A 3 to 2 linear map that counts the samples it is evaluated at and is
+    interrupted after ``num_calls`` calls.
+    """
+    def __init__(self, num_calls=None):
+        self.num_calls = num_calls
+        self.num_evaluations = 0
+
+    def __call__(self, x):
+        if self.num_calls is not None:
+            if self.num_calls == 0:
+                raise interrupted()
+            self.num_calls -= 1
+        self.num_evaluations += x.shape[0]
+        return map_3t2_ee_jac(x)
+
 
 @unittest.skipIf(comm.size > 1, 'Only run in serial')
 def test_loadmat():
@@ -466,7 +522,7 @@ def verify_regular_sample_set(sampler, input_sample_set,
             num_samples_per_dim[i] + 2))[1:num_samples_per_dim[i] + 1]
 
     if np.equal(dim, 1):
-        arrays_samples_dimension = np.array([vec_samples_dimension])
+        arrays_samples_dimension = np.array([vec_samples_dimension[0]])
     else:
         arrays_samples_dimension = np.meshgrid(
             *[vec_samples_dimension[i] for i in np.arange(0, dim)], indexing='ij')
@@ -520,7 +576,7 @@ def verify_regular_sample_set_domain(sampler, input_domain,
             num_samples_per_dim[i] + 2))[1:num_samples_per_dim[i] + 1]
 
     if np.equal(dim, 1):
-        arrays_samples_dimension = np.array([vec_samples_dimension])
+        arrays_samples_dimension = np.array([vec_samples_dimension[0]])
     else:
         arrays_samples_dimension = np.meshgrid(
             *[vec_samples_dimension[i] for i in np.arange(0, dim)], indexing='ij')
@@ -575,7 +631,7 @@ def verify_regular_sample_set_dimension(sampler, input_dim,
             num_samples_per_dim[i] + 2))[1:num_samples_per_dim[i] + 1]
 
     if np.equal(dim, 1):
-        arrays_samples_dimension = np.array([vec_samples_dimension])
+        arrays_samples_dimension = np.array([vec_samples_dimension[0]])
     else:
         arrays_samples_dimension = np.meshgrid(
             *[vec_samples_dimension[i] for i in np.arange(0, dim)], indexing='ij')
@@ -808,3 +864,252 @@ class Test_basic_sampler(unittest.TestCase):
                         verify_create_random_discretization(model, sampler,
                                 sample_type, input_domain, num_samples,
                                 savefile)
+
+    def test_init_executor(self):
+        """
+        Test initalization of :class:`bet.sampling.basicSampling.sampler`
+        with an executor.
+        """
+        my_sampler = bsam.sampler(self.models[0], executor='threads',
+                batch_size=5)
+        assert my_sampler.executor == 'threads'
+        assert my_sampler.batch_size == 5
+        assert bsam.sampler(self.models[0]).executor is None
+        with self.assertRaises(bsam.bad_object):
+            bsam.sampler(self.models[0], executor='frog')
+
+    def test_evaluate_model(self):
+        """
+        Test :meth:`bet.sampling.basicSampling.sampler.evaluate_model` with
+        serial, thread, process and user supplied executors and different
+        batch sizes.
+        """
+        if futures is None:
+            self.skipTest("concurrent.futures is not installed")
+        np.random.seed(1)
+        input_values = np.random.random((11, 3))
+        (values, ee, jac) = map_3t2_ee_jac(input_values)
+        with futures.ThreadPoolExecutor(2) as pool:
+            executors = ['serial', 'threads', pool]
+            if comm.size == 1:
+                executors.append('processes')
+            self.check_executors(executors, input_values, values, ee, jac)
+        if comm.size == 1:
+            # models defined in a closure cannot be sent to other processes
+            my_sampler = bsam.sampler(self.models[3], executor='processes')
+            with self.assertRaises(bsam.bad_object):
+                my_sampler.evaluate_model(input_values)
+
+    def check_executors(self, executors, input_values, values, ee, jac):
+        """
+        Check that each of ``executors`` evaluates the models at
+        ``input_values`` for different batch sizes.
+        """
+        for executor in executors:
+            for batch_size in [None, 1, 4, 20]:
+                my_sampler = bsam.sampler(map_3t2_ee_jac,
+                        error_estimates=True, jacobians=True,
+                        executor=executor, batch_size=batch_size)
+                (my_values, my_ee, my_jac) = \
+                        my_sampler.evaluate_model(input_values)
+                nptest.assert_array_equal(my_values, values)
+                nptest.assert_array_equal(my_ee, ee)
+                nptest.assert_array_equal(my_jac, jac)
+                # models that only return values
+                my_sampler = bsam.sampler(map_3t2, executor=executor,
+                        batch_size=batch_size)
+                (my_values, my_ee, my_jac) = \
+                        my_sampler.evaluate_model(input_values)
+                nptest.assert_array_equal(my_values, values)
+                assert my_ee is None and my_jac is None
+
+    def test_compute_QoI_and_create_discretization_executor(self):
+        """
+        Test :meth:`bet.sampling.basicSampling.sampler.compute_QoI_and_create_discretization`
+        with a thread executor.
+        """
+        if futures is None:
+            self.skipTest("concurrent.futures is not installed")
+        np.random.seed(1)
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(np.random.random((13, 3)))
+        my_sampler = bsam.sampler(map_3t2_ee_jac, error_estimates=True,
+                jacobians=True, executor='threads', batch_size=3)
+        my_disc = my_sampler.compute_QoI_and_create_discretization(
+                input_sample_set)
+        (values, ee, jac) = map_3t2_ee_jac(input_sample_set.get_values())
+        nptest.assert_array_equal(my_disc._output_sample_set.get_values(),
+                values)
+        nptest.assert_array_equal(
+                my_disc._output_sample_set.get_error_estimates(), ee)
+        nptest.assert_array_equal(my_disc._input_sample_set.get_jacobians(),
+                jac)
+
+    def test_init_schedule(self):
+        """
+        Test initalization of :class:`bet.sampling.basicSampling.sampler`
+        with a schedule.
+        """
+        my_sampler = bsam.sampler(self.models[0], schedule='dynamic',
+                chunk_size=2)
+        assert my_sampler.schedule == 'dynamic'
+        assert my_sampler.chunk_size == 2
+        assert bsam.sampler(self.models[0]).schedule == 'static'
+        with self.assertRaises(bsam.bad_object):
+            bsam.sampler(self.models[0], schedule='frog')
+
+    def test_compute_QoI_and_create_discretization_dynamic(self):
+        """
+        Test that :meth:`bet.sampling.basicSampling.sampler.compute_QoI_and_create_discretization`
+        with a dynamic schedule has the same global and local outputs as with
+        a static schedule.
+        """
+        np.random.seed(1)
+        for num, chunk_size in [(13, None), (13, 1), (13, 5), (2, 4)]:
+            input_sample_set = sample_set(3)
+            input_sample_set.set_values(np.random.random((num, 3)))
+            static_disc = bsam.sampler(map_3t2_ee_jac, error_estimates=True,
+                    jacobians=True).compute_QoI_and_create_discretization(
+                            input_sample_set.copy())
+            dynamic_disc = bsam.sampler(map_3t2_ee_jac, error_estimates=True,
+                    jacobians=True, schedule='dynamic',
+                    chunk_size=chunk_size).\
+                            compute_QoI_and_create_discretization(
+                                    input_sample_set.copy())
+            for getter in ['get_values', 'get_values_local',
+                    'get_error_estimates', 'get_error_estimates_local']:
+                nptest.assert_array_equal(
+                        getattr(dynamic_disc._output_sample_set, getter)(),
+                        getattr(static_disc._output_sample_set, getter)())
+            nptest.assert_array_equal(
+                    dynamic_disc._input_sample_set.get_jacobians_local(),
+                    static_disc._input_sample_set.get_jacobians_local())
+        # failures on a worker are raised on all processors
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(np.random.random((7, 3)))
+        my_sampler = bsam.sampler(map_fail, schedule='dynamic', chunk_size=2)
+        with self.assertRaises((bsam.worker_failed, ValueError)):
+            my_sampler.compute_QoI_and_create_discretization(input_sample_set)
+        # no samples
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(np.zeros((0, 3)))
+        my_sampler = bsam.sampler(map_3t2_ee_jac, error_estimates=True,
+                jacobians=True, schedule='dynamic')
+        (values, ee, jac) = my_sampler.evaluate_model_dynamic(
+                input_sample_set)
+        self.assertEqual(values.shape, (0, 2))
+        self.assertEqual(ee.shape, (0, 2))
+        self.assertEqual(jac.shape, (0, 2, 3))
+        self.assertEqual(my_sampler.failed_samples.shape, (0,))
+
+
+class Test_chunked_evaluation(unittest.TestCase):
+    """
+    Test fault tolerant, resumable chunked evaluation of
+    :class:`bet.sampling.basicSampling.sampler`.
+    """
+    def setUp(self):
+        self.checkpoint_dir = os.path.join(local_path, "test_checkpoints")
+        np.random.seed(1)
+        self.input_values = np.random.random((20, 3))
+
+    def tearDown(self):
+        comm.barrier()
+        if comm.rank == 0 and os.path.exists(self.checkpoint_dir):
+            shutil.rmtree(self.checkpoint_dir)
+        comm.barrier()
+
+    def test_failed_samples(self):
+        """
+        Test that failed samples are marked with ``NaN`` instead of raising.
+        """
+        (values, ee, jac) = map_3t2_ee_jac(self.input_values)
+        failed = np.nonzero(self.input_values[:, 0] > 0.7)[0]
+        values[failed] = np.nan
+        ee[failed] = np.nan
+        jac[failed] = np.nan
+        for schedule in ['static', 'dynamic']:
+            input_sample_set = sample_set(3)
+            input_sample_set.set_values(self.input_values)
+            my_sampler = bsam.sampler(map_fail_some, error_estimates=True,
+                    jacobians=True, chunk_size=3, max_retries=1,
+                    schedule=schedule)
+            my_disc = my_sampler.compute_QoI_and_create_discretization(
+                    input_sample_set)
+            nptest.assert_array_equal(my_sampler.failed_samples, failed)
+            nptest.assert_array_equal(
+                    my_disc._output_sample_set.get_values(), values)
+            nptest.assert_array_equal(
+                    my_disc._output_sample_set.get_error_estimates(), ee)
+            nptest.assert_array_equal(
+                    my_disc._input_sample_set.get_jacobians(), jac)
+        # without max_retries the error is raised
+        my_sampler = bsam.sampler(map_fail_some, chunk_size=3,
+                schedule='dynamic')
+        with self.assertRaises((bsam.worker_failed, ValueError)):
+            my_sampler.compute_QoI_and_create_discretization(
+                    input_sample_set)
+        # a model that fails everywhere
+        my_sampler = bsam.sampler(map_fail, max_retries=0)
+        with self.assertRaises(bsam.model_failed):
+            my_sampler.compute_QoI_and_create_discretization(
+                    input_sample_set)
+
+    def test_resume(self):
+        """
+        Test that an interrupted run resumes from the saved chunks.
+        """
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(self.input_values)
+        model = interrupted_model(num_calls=2)
+        my_sampler = bsam.sampler(model, error_estimates=True,
+                jacobians=True, chunk_size=2,
+                checkpoint_dir=self.checkpoint_dir)
+        with self.assertRaises(interrupted):
+            my_sampler.compute_QoI_and_create_discretization(
+                    input_sample_set)
+        comm.barrier()
+
+        model = interrupted_model()
+        my_sampler = bsam.sampler(model, error_estimates=True,
+                jacobians=True, chunk_size=2,
+                checkpoint_dir=self.checkpoint_dir)
+        my_disc = my_sampler.compute_QoI_and_create_discretization(
+                input_sample_set)
+        num_local = input_sample_set.get_values_local().shape[0]
+        self.assertEqual(model.num_evaluations, num_local-4)
+        (values, ee, jac) = map_3t2_ee_jac(self.input_values)
+        nptest.assert_array_equal(my_disc._output_sample_set.get_values(),
+                values)
+        nptest.assert_array_equal(
+                my_disc._output_sample_set.get_error_estimates(), ee)
+        nptest.assert_array_equal(my_disc._input_sample_set.get_jacobians(),
+                jac)
+
+        # a completed run is not evaluated again
+        model.num_evaluations = 0
+        my_sampler.compute_QoI_and_create_discretization(input_sample_set)
+        self.assertEqual(model.num_evaluations, 0)
+
+    def test_retry_on_resume(self):
+        """
+        Test that samples that failed in a previous run are reevaluated.
+        """
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(self.input_values)
+        my_sampler = bsam.sampler(map_fail_some, chunk_size=4,
+                checkpoint_dir=self.checkpoint_dir)
+        my_sampler.compute_QoI_and_create_discretization(input_sample_set)
+        self.assertGreater(len(my_sampler.failed_samples), 0)
+        comm.barrier()
+
+        model = interrupted_model()
+        my_sampler = bsam.sampler(model, chunk_size=4,
+                checkpoint_dir=self.checkpoint_dir)
+        my_disc = my_sampler.compute_QoI_and_create_discretization(
+                input_sample_set)
+        self.assertEqual(len(my_sampler.failed_samples), 0)
+        local_failed = input_sample_set.get_values_local()[:, 0] > 0.7
+        self.assertEqual(model.num_evaluations, np.sum(local_failed))
+        nptest.assert_array_equal(my_disc._output_sample_set.get_values(),
+                map_3t2(self.input_values))
@@ -0,0 +1,116 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module contains unittests for :mod:`~bet.sampling.distributedIndex`
+"""
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+import scipy.spatial as spatial
+import bet.sampling.distributedIndex as distributedIndex
+import bet.sample as sample
+from bet.Comm import comm
+
+class Test_distributed_kdtree(unittest.TestCase):
+    """
+    Test :class:`bet.sampling.distributedIndex.distributed_kdtree`.
+    """
+    def setUp(self):
+        np.random.seed(1)
+        self.values = np.random.random((400, 3))
+        # query points inside and outside of the bounding box of the values
+        self.x = np.random.random((60, 3))*1.4-0.2
+        self.values_local = np.array_split(self.values, comm.size)[comm.rank]
+        self.x_local = np.array_split(self.x, comm.size)[comm.rank]
+
+    def test_partition(self):
+        """
+        Test that every point is owned by exactly one processor.
+        """
+        tree = distributedIndex.distributed_kdtree(self.values_local)
+        self.assertEqual(tree.num, 400)
+        indices = np.concatenate(comm.allgather(tree.indices))
+        nptest.assert_array_equal(np.sort(indices), np.arange(400))
+        nptest.assert_array_equal(tree.values, self.values[tree.indices])
+        self.assertEqual(len(tree.boxes), comm.size)
+
+    def test_query(self):
+        """
+        Test that queries match a tree of all points.
+        """
+        reference = spatial.cKDTree(self.values)
+        for (p_norm, k) in [(2.0, 1), (1.0, 3), (np.inf, 2)]:
+            tree = distributedIndex.distributed_kdtree(self.values_local,
+                    p_norm=p_norm)
+            (dist, ptr) = tree.query(self.x_local, k)
+            (ref_dist, _) = reference.query(self.x_local, k, p=p_norm)
+            nptest.assert_array_almost_equal(dist, ref_dist)
+            self.assertEqual(ptr.shape, ref_dist.shape)
+            found = np.linalg.norm(self.values[ptr.ravel()] - np.repeat(
+                self.x_local, k, 0), ord=p_norm, axis=1)
+            nptest.assert_array_almost_equal(found, ref_dist.ravel())
+
+    def test_query_missing(self):
+        """
+        Test queries for more neighbors than points.
+        """
+        tree = distributedIndex.distributed_kdtree(self.values_local[:2])
+        num = tree.num
+        (dist, ptr) = tree.query(self.x_local, num+2)
+        self.assertTrue(np.all(np.isinf(dist[:, num:])))
+        self.assertTrue(np.all(ptr[:, num:] == num))
+        self.assertTrue(np.all(ptr[:, :num] < num))
+
+    def test_box_distances(self):
+        """
+        Test :meth:`~bet.sampling.distributedIndex.box_distances`.
+        """
+        boxes = [np.array([[0.0, 1.0], [0.0, 1.0]]), None]
+        x = np.array([[0.5, 0.5], [2.0, 0.5], [-3.0, 5.0]])
+        nptest.assert_array_almost_equal(distributedIndex.box_distances(x,
+            boxes), [[0, np.inf], [1, np.inf], [5, np.inf]])
+        nptest.assert_array_almost_equal(distributedIndex.box_distances(x,
+            boxes, 1.0)[:, 0], [0, 1, 7])
+
+class Test_sample_set_query(unittest.TestCase):
+    """
+    Test :meth:`bet.sample.voronoi_sample_set.query` with a distributed
+    index.
+    """
+    def setUp(self):
+        np.random.seed(2)
+        self.values = np.random.random((100, 2))
+        self.x = np.random.random((20, 2))
+        self.sample_set = sample.sample_set(2)
+        self.sample_set.set_domain(np.array([[0.0, 1.0], [0.0, 1.0]]))
+
+    def test_local_values(self):
+        """
+        Test that sets with only local values are queried with a distributed
+        index.
+        """
+        self.sample_set.set_values_local(np.array_split(self.values,
+            comm.size)[comm.rank])
+        (_, ptr) = self.sample_set.query(self.x)
+        self.assertIsNotNone(self.sample_set.get_distributed_kdtree())
+        self.assertIsNone(self.sample_set._values)
+        nptest.assert_array_equal(ptr,
+                spatial.KDTree(self.values).query(self.x)[1])
+
+    def test_rebuild(self):
+        """
+        Test that the distributed index follows changes of the samples.
+        """
+        self.sample_set.set_values(self.values)
+        self.sample_set.global_to_local()
+        self.sample_set.set_distributed_kdtree()
+        order = self.sample_set.reorder()
+        (_, ptr) = self.sample_set.query(self.x)
+        nptest.assert_array_equal(order[ptr],
+                spatial.KDTree(self.values).query(self.x)[1])
+        self.sample_set.set_values(self.values[:50])
+        self.sample_set.global_to_local()
+        (_, ptr) = self.sample_set.query(self.x)
+        nptest.assert_array_equal(ptr,
+                spatial.KDTree(self.values[:50]).query(self.x)[1])
@@ -0,0 +1,309 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module contains unittests for :mod:`~bet.sampling.evaluationCache`
+"""
+
+import unittest, os, functools, threading
+import numpy as np
+import numpy.testing as nptest
+import bet.sampling.evaluationCache as evaluationCache
+import bet.sampling.basicSampling as bsam
+import bet.sampling.launcher as launcher
+from bet.sample import sample_set
+from bet.Comm import comm
+
+local_path = os.path.join(".")
+
+class counting_model(object):
+    """
+    A 3 to 2 linear map that counts the number of samples it is evaluated
+    at and returns values, error estimates, and Jacobians.
+    """
+    def __init__(self):
+        self.num_evaluations = 0
+        self.Q_map = np.array([[0.506, 0.463], [0.253, 0.918], [0.085,
+            0.496]])
+
+    def model_state(self):
+        return self.Q_map
+
+    def __call__(self, x):
+        self.num_evaluations += x.shape[0]
+        values = np.dot(x, self.Q_map)
+        jacobians = np.repeat([self.Q_map.transpose()], x.shape[0], 0)
+        return (values, 0.1*values, jacobians)
+
+class unidentified_model(object):
+    """
+    A model without ``model_state``.
+    """
+    def __call__(self, x):
+        return np.sum(x, 1)
+
+def model_a(x):
+    return np.sum(x, 1)
+
+def model_b(x):
+    return np.sum(x**2, 1)
+
+def model_power(x, power=1):
+    return np.sum(x**power, 1)
+
+def linear_model(seed):
+    """
+    Creates a linear map with random coefficients.
+    """
+    Q_map = np.random.RandomState(seed).random_sample((3, 2))
+    def model(x):
+        return np.dot(x, Q_map)
+    return model
+
+class Test_evaluation_cache(unittest.TestCase):
+    """
+    Test :class:`bet.sampling.evaluationCache.evaluation_cache`.
+    """
+    def setUp(self):
+        self.file_name = os.path.join(local_path,
+                "proc{}_test_cache.db".format(comm.rank))
+        self.cache = evaluationCache.evaluation_cache(self.file_name,
+                model_id='model')
+        np.random.seed(1)
+        self.input_values = np.random.random((10, 3))
+        self.model = counting_model()
+
+    def tearDown(self):
+        self.cache.close()
+        if os.path.exists(self.file_name):
+            os.remove(self.file_name)
+
+    def test_model_identity(self):
+        """
+        Test :meth:`bet.sampling.evaluationCache.model_identity`.
+        """
+        self.assertEqual(evaluationCache.model_identity(model_a),
+                evaluationCache.model_identity(model_a))
+        self.assertNotEqual(evaluationCache.model_identity(model_a),
+                evaluationCache.model_identity(model_b))
+        self.assertIn('counting_model',
+                evaluationCache.model_identity(self.model))
+
+    def test_model_identity_state(self):
+        """
+        Test that :meth:`bet.sampling.evaluationCache.model_identity` depends
+        on closures, defaults, partial arguments, and instance state.
+        """
+        identity = evaluationCache.model_identity
+        self.assertEqual(identity(linear_model(0)), identity(linear_model(0)))
+        self.assertNotEqual(identity(linear_model(0)),
+                identity(linear_model(1)))
+        self.assertNotEqual(identity(functools.partial(model_power,
+            power=2)), identity(functools.partial(model_power, power=3)))
+        self.assertEqual(identity(functools.partial(model_power, power=2)),
+                identity(functools.partial(model_power, power=2)))
+        other_model = counting_model()
+        self.assertEqual(identity(self.model), identity(other_model))
+        self.assertEqual(identity(self.model.__call__),
+                identity(other_model.__call__))
+        other_model.Q_map = 2.0*other_model.Q_map
+        self.assertNotEqual(identity(self.model), identity(other_model))
+        self.assertNotEqual(identity(self.model.__call__),
+                identity(other_model.__call__))
+        # counters do not change the identity
+        other_model(self.input_values)
+        self.assertEqual(identity(self.model), identity(counting_model()))
+        lock_model = functools.partial(model_power, lock=threading.Lock())
+        self.assertRaises(evaluationCache.wrong_model, identity, lock_model)
+        self.assertRaises(evaluationCache.wrong_model, identity,
+                unidentified_model())
+        self.assertRaises(evaluationCache.wrong_model, identity,
+                unidentified_model().__call__)
+        self.assertRaises(evaluationCache.wrong_model, bsam.sampler,
+                lock_model, cache=self.cache.file_name+"_")
+
+    def test_model_identity_launcher(self):
+        """
+        Test that the identity of a
+        :class:`~bet.sampling.launcher.file_launcher` depends on the command
+        and files but not on how the jobs are run.
+        """
+        identity = evaluationCache.model_identity
+        command = ['model', '{input_file}', '{output_file}']
+        model = launcher.file_launcher(command)
+        model_id = identity(model)
+        model.num_retries = 3
+        model.num_concurrent = 4
+        model.samples_per_job = 2
+        model.max_retries = 1
+        model.timeout = 10.0
+        model.poll_interval = 1.0
+        model.cleanup = False
+        model.scratch_dir = 'scratch'
+        self.assertEqual(identity(model), model_id)
+        self.assertNotEqual(identity(launcher.file_launcher(command[:2])),
+                model_id)
+        self.assertNotEqual(identity(launcher.file_launcher(command,
+            output_file='output.npy')), model_id)
+        self.assertNotEqual(identity(launcher.file_launcher(command,
+            env={'OMP_NUM_THREADS': '1'})), model_id)
+
+    def test_keys(self):
+        """
+        Test that keys depend on the row values and the model identity.
+        """
+        keys = self.cache.keys(self.input_values)
+        self.assertEqual(len(set(keys)), self.input_values.shape[0])
+        self.assertEqual(keys, self.cache.keys(self.input_values.copy()))
+        self.assertEqual(keys[2:4], self.cache.keys(self.input_values[2:4]))
+        other = evaluationCache.evaluation_cache(self.file_name,
+                model_id='other_model')
+        self.assertNotEqual(keys, other.keys(self.input_values))
+        other.close()
+        with self.assertRaises(evaluationCache.wrong_model):
+            evaluationCache.evaluation_cache(self.file_name).keys(
+                    self.input_values)
+
+    def test_put_get(self):
+        """
+        Test storing and retrieving entries including persistence.
+        """
+        keys = self.cache.keys(self.input_values)
+        (values, ee, jac) = self.model(self.input_values)
+        self.cache.put(keys[:6], values[:6], ee[:6], jac[:6])
+        self.assertEqual(len(self.cache), 6)
+        found = self.cache.get(keys)
+        self.assertEqual(sorted(found.keys()), sorted(keys[:6]))
+        for i, key in enumerate(keys[:6]):
+            nptest.assert_array_equal(found[key][0], values[i])
+            nptest.assert_array_equal(found[key][1], ee[i])
+            nptest.assert_array_equal(found[key][2], jac[i])
+        # entries without error estimates or jacobians
+        self.cache.put(keys[6:], values[6:])
+        self.assertIsNone(self.cache.get(keys[6:7])[keys[6]][1])
+        # the entries persist
+        self.cache.close()
+        self.cache = evaluationCache.evaluation_cache(self.file_name,
+                model_id='model')
+        self.assertEqual(len(self.cache), 10)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_eviction(self):
+        """
+        Test least recently used eviction by number of entries and bytes.
+        """
+        keys = self.cache.keys(self.input_values)
+        values = self.model(self.input_values)[0]
+        self.cache.max_entries = 5
+        self.cache.put(keys[:4], values[:4])
+        self.cache.get(keys[:2])
+        self.cache.put(keys[4:6], values[4:6])
+        # keys 2 and 3 were used least recently
+        self.assertEqual(sorted(self.cache.get(keys).keys()),
+                sorted(keys[:2]+keys[4:6]+[keys[3]]))
+        self.cache.max_entries = None
+        size = self.cache.nbytes()/len(self.cache)
+        self.cache.max_bytes = 3*size
+        self.cache.put(keys[6:7], values[6:7])
+        self.assertEqual(len(self.cache), 3)
+        self.assertIn(keys[6], self.cache.get(keys))
+
+class Test_sampler_cache(unittest.TestCase):
+    """
+    Test :class:`bet.sampling.basicSampling.sampler` with a cache.
+    """
+    def setUp(self):
+        # all processors share the same cache file
+        self.file_name = os.path.join(local_path, "test_sampler_cache.db")
+        np.random.seed(1)
+        self.input_values = np.random.random((20, 3))
+
+    def tearDown(self):
+        comm.barrier()
+        if comm.rank == 0 and os.path.exists(self.file_name):
+            os.remove(self.file_name)
+        comm.barrier()
+
+    def test_only_misses_evaluated(self):
+        """
+        Test that only samples missing from the cache are evaluated and that
+        the outputs match the model.
+        """
+        model = counting_model()
+        my_sampler = bsam.sampler(model, error_estimates=True,
+                jacobians=True, cache=self.file_name)
+        (values, ee, jac) = model(self.input_values)
+        model.num_evaluations = 0
+
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(self.input_values[:12])
+        my_sampler.compute_QoI_and_create_discretization(input_sample_set)
+        num_local = input_sample_set.get_values_local().shape[0]
+        self.assertEqual(model.num_evaluations, num_local)
+
+        # a refined set of samples only evaluates the new samples
+        model.num_evaluations = 0
+        comm.barrier()
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(self.input_values)
+        my_disc = my_sampler.compute_QoI_and_create_discretization(
+                input_sample_set)
+        num_evaluations = comm.allreduce(model.num_evaluations)
+        self.assertLessEqual(num_evaluations, 20)
+        self.assertGreaterEqual(num_evaluations, 8)
+        nptest.assert_array_almost_equal(
+                my_disc._output_sample_set.get_values(), values)
+        nptest.assert_array_almost_equal(
+                my_disc._output_sample_set.get_error_estimates(), ee)
+        nptest.assert_array_almost_equal(
+                my_disc._input_sample_set.get_jacobians(), jac)
+
+        # rerunning evaluates nothing
+        model.num_evaluations = 0
+        comm.barrier()
+        my_sampler.compute_QoI_and_create_discretization(input_sample_set)
+        self.assertEqual(model.num_evaluations, 0)
+        my_sampler.cache.close()
+
+    def test_reused_model(self):
+        """
+        Test that a model that was already called hits the cache of a new
+        sampler.
+        """
+        model = counting_model()
+        my_sampler = bsam.sampler(model, cache=self.file_name)
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(self.input_values)
+        my_sampler.compute_QoI_and_create_discretization(input_sample_set)
+        my_sampler.cache.close()
+        comm.barrier()
+
+        model.num_evaluations = 0
+        my_sampler = bsam.sampler(model, cache=self.file_name)
+        my_sampler.compute_QoI_and_create_discretization(input_sample_set)
+        num_local = input_sample_set.get_values_local().shape[0]
+        self.assertEqual(model.num_evaluations, 0)
+        self.assertEqual(my_sampler.cache.hits, num_local)
+        self.assertEqual(my_sampler.cache.misses, 0)
+        my_sampler.cache.close()
+
+    def test_duplicates_and_1D_output(self):
+        """
+        Test duplicate samples and models with one dimensional output.
+        """
+        file_name = os.path.join(local_path,
+                "proc{}_test_sampler_cache.db".format(comm.rank))
+        my_sampler = bsam.sampler(model_a,
+                cache=evaluationCache.evaluation_cache(file_name))
+        input_values = np.vstack([self.input_values[:5]]*2)
+        (values, ee, jac) = my_sampler.evaluate_model(input_values)
+        nptest.assert_array_almost_equal(values, model_a(input_values))
+        self.assertIsNone(ee)
+        self.assertIsNone(jac)
+        self.assertEqual(my_sampler.cache.misses, 5)
+        self.assertEqual(my_sampler.cache.hits, 5)
+        (values, ee, jac) = my_sampler.evaluate_model(input_values)
+        nptest.assert_array_almost_equal(values, model_a(input_values))
+        self.assertEqual(my_sampler.cache.hits, 15)
+        my_sampler.cache.close()
+        os.remove(file_name)
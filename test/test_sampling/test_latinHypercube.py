@@ -0,0 +1,107 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module contains unittests for :mod:`~bet.sampling.latinHypercube`
+"""
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+import bet.sampling.latinHypercube as latinHypercube
+import bet.sampling.basicSampling as bsam
+from bet.Comm import comm
+
+def verify_latin(design):
+    """
+    Verifies that every column of ``design`` has exactly one sample in each
+    of the ``design.shape[0]`` strata of [0, 1).
+    """
+    num = design.shape[0]
+    assert np.all(design >= 0) and np.all(design < 1)
+    for column in design.transpose():
+        nptest.assert_array_equal(np.sort(np.floor(column*num)),
+                np.arange(num))
+
+class Test_latin_hypercube(unittest.TestCase):
+    """
+    Test :mod:`bet.sampling.latinHypercube`.
+    """
+    def test_permute(self):
+        """
+        Test that :meth:`~bet.sampling.latinHypercube.permute` is a
+        permutation.
+        """
+        for num in [1, 2, 3, 17, 64, 1000]:
+            key = latinHypercube._key(1, num)
+            values = latinHypercube.permute(np.arange(num), num, key)
+            nptest.assert_array_equal(np.sort(values), np.arange(num))
+            nptest.assert_array_equal(latinHypercube.permute(
+                np.arange(num)[::-1], num, key), values[::-1])
+        # different keys give different permutations
+        self.assertFalse(np.array_equal(
+            latinHypercube.permute(np.arange(100), 100,
+                latinHypercube._key(1, 0)),
+            latinHypercube.permute(np.arange(100), 100,
+                latinHypercube._key(2, 0))))
+
+    def test_lhs(self):
+        """
+        Test :meth:`~bet.sampling.latinHypercube.lhs`.
+        """
+        for num in [1, 10, 101]:
+            for criterion in ['center', 'random', None]:
+                design = latinHypercube.lhs(3, num, criterion, seed=4)
+                self.assertEqual(design.shape, (num, 3))
+                verify_latin(design)
+                nptest.assert_array_equal(design, latinHypercube.lhs(3,
+                    num, criterion, seed=4))
+                # rows are independent of which rows are computed
+                nptest.assert_array_equal(design[num/2:],
+                        latinHypercube.lhs(3, num, criterion, seed=4,
+                            rows=np.arange(num/2, num)))
+            design = latinHypercube.lhs(3, num, 'center', seed=4)
+            nptest.assert_array_almost_equal((design*num) % 1, 0.5)
+        self.assertFalse(np.array_equal(latinHypercube.lhs(2, 50, seed=1),
+            latinHypercube.lhs(2, 50, seed=2)))
+        with self.assertRaises(latinHypercube.wrong_criterion):
+            latinHypercube.lhs(2, 10, 'maximin')
+
+    def test_lhs_local(self):
+        """
+        Test that the local rows form the design of a single processor.
+        """
+        for num in [2, 11, 100]:
+            for criterion in ['center', 'random']:
+                design = np.concatenate(comm.allgather(
+                    latinHypercube.lhs_local(2, num, criterion, seed=7)))
+                nptest.assert_array_equal(design, latinHypercube.lhs(2,
+                    num, criterion, seed=7))
+            # the seed is shared if it is not given
+            design = np.concatenate(comm.allgather(
+                latinHypercube.lhs_local(2, num)))
+            verify_latin(design)
+        for criterion in ['maximin', 'centermaximin']:
+            design = np.concatenate(comm.allgather(
+                latinHypercube.lhs_local(2, 20, criterion, seed=3)))
+            verify_latin(design)
+            nptest.assert_array_equal(design, np.concatenate(comm.allgather(
+                latinHypercube.lhs_local(2, 20, criterion, seed=3))))
+        with self.assertRaises(latinHypercube.wrong_criterion):
+            latinHypercube.lhs_local(2, 10, 'frog')
+
+    def test_random_sample_set(self):
+        """
+        Test latin hypercubes from
+        :meth:`~bet.sampling.basicSampling.random_sample_set`.
+        """
+        domain = np.array([[-1.0, 1.0], [2.0, 5.0]])
+        my_set = bsam.random_sample_set('lhs', domain, 30, 'random',
+                seed=5)
+        verify_latin((my_set.get_values()-domain[:, 0]) / \
+                (domain[:, 1]-domain[:, 0]))
+        nptest.assert_array_almost_equal(my_set.get_values(),
+                domain[:, 0] + (domain[:, 1]-domain[:, 0]) * \
+                        latinHypercube.lhs(2, 30, 'random', seed=5))
+        self.assertEqual(my_set.get_values_local().shape[0],
+                latinHypercube.local_rows(30)[1] - \
+                        latinHypercube.local_rows(30)[0])
@@ -0,0 +1,134 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module contains unittests for :mod:`~bet.sampling.launcher`
+"""
+
+import unittest, os, sys, shutil, tempfile
+import numpy as np
+import numpy.testing as nptest
+import bet.sampling.launcher as launcher
+import bet.sampling.basicSampling as bsam
+from bet.sample import sample_set
+
+MODEL = """
+import os, sys
+import numpy as np
+import scipy.io as sio
+input_file, output_file, mode = sys.argv[1:4]
+if input_file.endswith('.npy'):
+    input_data = np.load(input_file)
+else:
+    input_data = sio.loadmat(input_file)['input']
+if mode == 'fail':
+    sys.exit(1)
+if mode == 'flaky' and not os.path.exists('failed_once'):
+    open('failed_once', 'w').close()
+    sys.exit(1)
+output_data = np.column_stack((np.sum(input_data, 1), input_data[:, 0]))
+if output_file.endswith('.npy'):
+    np.save(output_file, output_data)
+else:
+    sio.savemat(output_file, {'output': output_data})
+"""
+
+def linear_model(input_data):
+    """
+    The map evaluated by :data:`MODEL`.
+    """
+    return np.column_stack((np.sum(input_data, 1), input_data[:, 0]))
+
+class Test_file_launcher(unittest.TestCase):
+    """
+    Test :class:`bet.sampling.launcher.file_launcher`.
+    """
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.model_file = os.path.join(self.tempdir, 'model.py')
+        with open(self.model_file, 'w') as model:
+            model.write(MODEL)
+        self.scratch_dir = os.path.join(self.tempdir, 'scratch')
+        np.random.seed(1)
+        self.input_data = np.random.random((7, 3))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def command(self, mode='ok'):
+        return [sys.executable, self.model_file, '{input_file}',
+                '{output_file}', mode]
+
+    def test_ordering(self):
+        """
+        Test that the outputs are returned in the order of the inputs for
+        different shard sizes and numbers of concurrent jobs.
+        """
+        for samples_per_job in [1, 3, 10]:
+            for num_concurrent in [1, 3]:
+                model = launcher.file_launcher(self.command(),
+                        num_concurrent=num_concurrent,
+                        samples_per_job=samples_per_job,
+                        scratch_dir=self.scratch_dir)
+                nptest.assert_array_almost_equal(model(self.input_data),
+                        linear_model(self.input_data))
+        # the scratch directories are removed
+        self.assertEqual(os.listdir(self.scratch_dir), [])
+
+    def test_npy_and_shell(self):
+        """
+        Test ``.npy`` files and shell commands.
+        """
+        command = "{} {} {{input_file}} {{output_file}} ok".format(
+                sys.executable, self.model_file)
+        model = launcher.file_launcher(command, num_concurrent=2,
+                samples_per_job=2, input_file='input.npy',
+                output_file='output.npy')
+        nptest.assert_array_almost_equal(model(self.input_data),
+                linear_model(self.input_data))
+
+    def test_retries(self):
+        """
+        Test that failed jobs are retried.
+        """
+        model = launcher.file_launcher(self.command('flaky'),
+                num_concurrent=2, samples_per_job=3, max_retries=1)
+        nptest.assert_array_almost_equal(model(self.input_data),
+                linear_model(self.input_data))
+        self.assertEqual(model.num_retries, 3)
+
+    def test_failure(self):
+        """
+        Test that jobs failing more than ``max_retries`` times raise and keep
+        their scratch directories.
+        """
+        model = launcher.file_launcher(self.command('fail'),
+                num_concurrent=2, samples_per_job=3, max_retries=1,
+                scratch_dir=self.scratch_dir)
+        with self.assertRaises(launcher.job_failed):
+            model(self.input_data)
+        self.assertGreater(len(os.listdir(self.scratch_dir)), 0)
+
+    def test_timeout(self):
+        """
+        Test that jobs exceeding the timeout are killed.
+        """
+        model = launcher.file_launcher([sys.executable, '-c',
+            'import time; time.sleep(30)'], timeout=0.2)
+        with self.assertRaises(launcher.job_failed):
+            model(self.input_data[:1])
+
+    def test_sampler(self):
+        """
+        Test a :class:`~bet.sampling.launcher.file_launcher` as the
+        ``lb_model`` of a :class:`~bet.sampling.basicSampling.sampler`.
+        """
+        model = launcher.file_launcher(self.command(), num_concurrent=3,
+                samples_per_job=2, scratch_dir=self.scratch_dir)
+        my_sampler = bsam.sampler(model)
+        input_sample_set = sample_set(3)
+        input_sample_set.set_values(self.input_data)
+        my_disc = my_sampler.compute_QoI_and_create_discretization(
+                input_sample_set)
+        nptest.assert_array_almost_equal(
+                my_disc._output_sample_set.get_values(),
+                linear_model(self.input_data))
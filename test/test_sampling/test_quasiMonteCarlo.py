@@ -0,0 +1,149 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module contains unittests for :mod:`~bet.sampling.quasiMonteCarlo`
+"""
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+import bet.sampling.quasiMonteCarlo as quasiMonteCarlo
+import bet.sampling.basicSampling as bsam
+import bet.calculateP.simpleFunP as simpleFunP
+import bet.sample as sample
+from bet.Comm import comm
+
+def verify_net(points, m):
+    """
+    Verifies that every one dimensional projection of the first ``2**m``
+    ``points`` has exactly one point in each interval ``[i/2**m,
+    (i+1)/2**m)``.
+    """
+    for column in points[:2**m].transpose():
+        nptest.assert_array_equal(np.sort(np.floor(column*2**m)),
+                np.arange(2**m))
+
+class Test_quasi_monte_carlo(unittest.TestCase):
+    """
+    Test :mod:`bet.sampling.quasiMonteCarlo`.
+    """
+    def test_sobol(self):
+        """
+        Test :meth:`~bet.sampling.quasiMonteCarlo.sobol`.
+        """
+        points = quasiMonteCarlo.sobol(3, 4, scramble=False)
+        nptest.assert_array_equal(points, [[0, 0, 0], [0.5, 0.5, 0.5],
+            [0.25, 0.75, 0.75], [0.75, 0.25, 0.25]])
+        for scramble in [False, True]:
+            points = quasiMonteCarlo.sobol(quasiMonteCarlo.max_sobol_dim,
+                    256, scramble, seed=2)
+            self.assertTrue(np.all(points >= 0) and np.all(points < 1))
+            verify_net(points, 8)
+        # the scramble depends on the seed
+        self.assertFalse(np.array_equal(quasiMonteCarlo.sobol(2, 8, seed=1),
+            quasiMonteCarlo.sobol(2, 8, seed=2)))
+        # skipping and rows
+        nptest.assert_array_equal(quasiMonteCarlo.sobol(2, 16, seed=3)[5:],
+                quasiMonteCarlo.sobol(2, 11, seed=3, skip=5))
+        nptest.assert_array_equal(quasiMonteCarlo.sobol(2, 16, seed=3)[5:9],
+                quasiMonteCarlo.sobol(2, 16, seed=3, rows=np.arange(5, 9)))
+        with self.assertRaises(quasiMonteCarlo.wrong_sample_type):
+            quasiMonteCarlo.sobol(quasiMonteCarlo.max_sobol_dim+1, 4)
+
+    def test_halton(self):
+        """
+        Test :meth:`~bet.sampling.quasiMonteCarlo.halton`.
+        """
+        self.assertEqual(quasiMonteCarlo.primes(6), [2, 3, 5, 7, 11, 13])
+        points = quasiMonteCarlo.halton(2, 4, scramble=False)
+        nptest.assert_array_almost_equal(points, [[0, 0], [0.5, 1.0/3],
+            [0.25, 2.0/3], [0.75, 1.0/9]])
+        points = quasiMonteCarlo.halton(50, 1000, seed=4)
+        self.assertTrue(np.all(points >= 0) and np.all(points < 1))
+        # the first 3**k points are stratified in the second dimension
+        nptest.assert_array_equal(np.sort(np.floor(points[:27, 1]*27)),
+                np.arange(27))
+        nptest.assert_array_equal(quasiMonteCarlo.halton(3, 20, seed=3)[7:],
+                quasiMonteCarlo.halton(3, 13, seed=3, skip=7))
+
+    def test_integration(self):
+        """
+        Test that quasi-Monte Carlo integration is more accurate than Monte
+        Carlo integration.
+        """
+        np.random.seed(1)
+        func = lambda x: np.prod(x + 0.5, 1)
+        mc_error = np.mean([np.abs(np.mean(func(np.random.random((1024,
+            4)))) - 1) for _ in xrange(5)])
+        for sample_type in quasiMonteCarlo.sample_types:
+            qmc_error = np.mean([np.abs(np.mean(func(quasiMonteCarlo.qmc(
+                sample_type, 4, 1024, seed=seed))) - 1) for seed in
+                xrange(5)])
+            self.assertLess(qmc_error, mc_error/5.0)
+        with self.assertRaises(quasiMonteCarlo.wrong_sample_type):
+            quasiMonteCarlo.qmc('frog', 2, 4)
+
+    def test_qmc_local(self):
+        """
+        Test that the local blocks form the sequence of a single processor.
+        """
+        for sample_type in quasiMonteCarlo.sample_types:
+            for num in [3, 64, 101]:
+                points = np.concatenate(comm.allgather(
+                    quasiMonteCarlo.qmc_local(sample_type, 2, num, seed=5,
+                        skip=2)))
+                nptest.assert_array_equal(points, quasiMonteCarlo.qmc(
+                    sample_type, 2, num, seed=5, skip=2))
+            # the seed is shared if it is not given
+            points = np.concatenate(comm.allgather(
+                quasiMonteCarlo.qmc_local(sample_type, 2, 64)))
+            if sample_type == 'sobol':
+                verify_net(points, 6)
+
+    def test_random_sample_set(self):
+        """
+        Test quasi-Monte Carlo samples from
+        :meth:`~bet.sampling.basicSampling.random_sample_set`.
+        """
+        domain = np.array([[-1.0, 1.0], [2.0, 5.0]])
+        for sample_type in quasiMonteCarlo.sample_types:
+            my_set = bsam.random_sample_set(sample_type, domain, 32, seed=5)
+            nptest.assert_array_almost_equal(my_set.get_values(),
+                    domain[:, 0] + (domain[:, 1]-domain[:, 0]) * \
+                            quasiMonteCarlo.qmc(sample_type, 2, 32, seed=5))
+
+    def test_estimate_volume(self):
+        """
+        Test :meth:`~bet.sample.sample_set_base.estimate_volume` with
+        quasi-Monte Carlo points.
+        """
+        my_set = sample.sample_set(2)
+        my_set.set_domain(np.array([[0.0, 1.0], [0.0, 1.0]]))
+        my_set.set_values(np.array([[0.25, 0.5], [0.75, 0.5]]))
+        for sample_type in quasiMonteCarlo.sample_types:
+            my_set.estimate_volume(n_mc_points=1024, sample_type=sample_type,
+                    seed=1)
+            nptest.assert_array_almost_equal(my_set.get_volumes(),
+                    [0.5, 0.5], 2)
+        my_set.estimate_radii_and_volume(n_mc_points=256,
+                sample_type='sobol', seed=1)
+        nptest.assert_almost_equal(np.sum(my_set.get_volumes()), 1.0)
+
+    def test_simpleFunP(self):
+        """
+        Test quasi-Monte Carlo emulation in :mod:`~bet.calculateP.simpleFunP`.
+        """
+        np.random.seed(1)
+        data = np.random.random((100, 2))
+        for sample_type in quasiMonteCarlo.sample_types:
+            s_set = simpleFunP.\
+                    uniform_partition_uniform_distribution_rectangle_scaled(
+                            data, np.array([0.5, 0.5]), 0.5, M=10,
+                            num_d_emulate=1E3, sample_type=sample_type)
+            nptest.assert_almost_equal(np.sum(s_set.get_probabilities()),
+                    1.0)
+            s_set = simpleFunP.normal_partition_normal_distribution(data,
+                    np.array([0.5, 0.5]), np.array([0.1, 0.1]), M=10,
+                    num_d_emulate=1E3, sample_type=sample_type)
+            nptest.assert_almost_equal(np.sum(s_set.get_probabilities()),
+                    1.0)
@@ -0,0 +1,183 @@
+# Copyright (C) 2014-2016 The BET Development Team
+
+"""
+This module contains unittests for :mod:`~bet.sampling.spaceFillingCurve`
+"""
+
+import unittest
+import numpy as np
+import numpy.testing as nptest
+import bet.sampling.spaceFillingCurve as spaceFillingCurve
+import bet.sampling.basicSampling as bsam
+import bet.sample as sample
+from bet.Comm import comm
+
+def all_cells(dim, bits):
+    """
+    :rtype: :class:`numpy.ndarray` of shape (2**(dim*bits), dim)
+    :returns: the integer coordinates of all cells of the grid
+    """
+    grid = np.meshgrid(*[np.arange(2**bits)]*dim, indexing='ij')
+    return np.column_stack([g.ravel() for g in grid]).astype(np.uint64)
+
+def key_integers(keys):
+    """
+    :rtype: list
+    :returns: the keys as python integers
+    """
+    integers = []
+    for row in keys:
+        value = 0
+        for word in row:
+            value = (value << 64) | int(word)
+        integers.append(value)
+    return integers
+
+class Test_space_filling_curve(unittest.TestCase):
+    """
+    Test :mod:`bet.sampling.spaceFillingCurve`.
+    """
+    def test_hilbert_keys(self):
+        """
+        Test that the Hilbert curve visits every cell once and that
+        consecutive cells are adjacent.
+        """
+        for (dim, bits) in [(2, 4), (3, 3), (5, 2)]:
+            coords = all_cells(dim, bits)
+            keys = key_integers(spaceFillingCurve.hilbert_keys(coords, bits))
+            nptest.assert_array_equal(np.sort(keys),
+                    np.arange(2**(dim*bits)))
+            ordered = coords[np.argsort(keys)].astype(np.int64)
+            steps = np.sum(np.abs(np.diff(ordered, axis=0)), axis=1)
+            nptest.assert_array_equal(steps, 1)
+
+    def test_morton_keys(self):
+        """
+        Test that the Morton keys interleave the bits of the coordinates.
+        """
+        coords = np.array([[0, 0], [1, 0], [0, 1], [3, 3], [2, 1]])
+        keys = spaceFillingCurve.morton_keys(coords, bits=2)
+        nptest.assert_array_equal(keys[:, 0], [0, 2, 1, 15, 9])
+        # keys of more than 64 bits
+        coords = all_cells(3, 2)
+        keys = spaceFillingCurve.morton_keys(coords*2**21, bits=23)
+        self.assertEqual(keys.shape[1], 2)
+        self.assertEqual(len(set(key_integers(keys))), coords.shape[0])
+
+    def test_curve_order(self):
+        """
+        Test :meth:`~bet.sampling.spaceFillingCurve.curve_order`.
+        """
+        values = np.array([[0.9, 0.1], [0.1, 0.1], [0.1, 0.9], [0.9, 0.9]])
+        domain = np.array([[0.0, 1.0], [0.0, 1.0]])
+        nptest.assert_array_equal(spaceFillingCurve.curve_order(values,
+            domain, 'hilbert', 1), [1, 2, 3, 0])
+        nptest.assert_array_equal(spaceFillingCurve.curve_order(values,
+            domain, 'morton', 1), [1, 2, 0, 3])
+        with self.assertRaises(spaceFillingCurve.wrong_curve):
+            spaceFillingCurve.curve_order(values, domain, 'peano')
+
+    def test_locality(self):
+        """
+        Test that consecutive samples along the curve are closer than
+        consecutive random samples.
+        """
+        np.random.seed(1)
+        values = np.random.random((2000, 3))
+        order = spaceFillingCurve.curve_order(values)
+        nptest.assert_array_equal(np.sort(order), np.arange(2000))
+        random_steps = np.linalg.norm(np.diff(values, axis=0), axis=1)
+        curve_steps = np.linalg.norm(np.diff(values[order], axis=0), axis=1)
+        self.assertLess(np.mean(curve_steps), 0.25*np.mean(random_steps))
+
+class Test_reorder(unittest.TestCase):
+    """
+    Test reordering sample sets and discretizations along space-filling
+    curves.
+    """
+    def setUp(self):
+        np.random.seed(2)
+        self.input_values = np.random.random((50, 2))
+        self.input_set = sample.sample_set(2)
+        self.input_set.set_domain(np.array([[0.0, 1.0], [0.0, 1.0]]))
+        self.input_set.set_values(self.input_values)
+        self.input_set.set_probabilities(np.arange(50.0)/np.sum(
+            np.arange(50.0)))
+
+    def test_reorder_sample_set(self):
+        """
+        Test :meth:`bet.sample.voronoi_sample_set.reorder`.
+        """
+        self.input_set.set_kdtree()
+        order = self.input_set.reorder()
+        nptest.assert_array_equal(self.input_set.get_values(),
+                self.input_values[order])
+        nptest.assert_array_almost_equal(self.input_set.get_probabilities(),
+                np.arange(50.0)[order]/np.sum(np.arange(50.0)))
+        nptest.assert_array_equal(self.input_set.get_values_local(),
+                np.array_split(self.input_values[order],
+                    comm.size)[comm.rank])
+        (_, ptr) = self.input_set.query(self.input_values[order[:5]])
+        nptest.assert_array_equal(ptr, np.arange(5))
+
+    def test_reorder_discretization(self):
+        """
+        Test :meth:`bet.sample.discretization.reorder`.
+        """
+        output_set = sample.sample_set(1)
+        output_set.set_values(np.sum(self.input_values, 1))
+        output_probability_set = sample.sample_set(1)
+        output_probability_set.set_values(np.array([[0.5], [1.5]]))
+        emulated_set = sample.sample_set(2)
+        emulated_set.set_values(np.random.random((30, 2)))
+        disc = sample.discretization(self.input_set, output_set,
+                output_probability_set, emulated_input_sample_set=emulated_set)
+        disc.set_io_ptr()
+        disc.set_emulated_ii_ptr()
+        io_ptr = np.copy(disc.get_io_ptr())
+        emulated_ii_ptr = np.copy(disc.get_emulated_ii_ptr())
+
+        order = disc.reorder('morton')
+        nptest.assert_array_equal(output_set.get_values()[:, 0],
+                np.sum(self.input_values[order], 1))
+        nptest.assert_array_equal(disc.get_io_ptr(), io_ptr[order])
+        # the emulated samples point to the same cells as before
+        nptest.assert_array_equal(order[disc.get_emulated_ii_ptr()],
+                emulated_ii_ptr)
+        disc.set_emulated_ii_ptr()
+        nptest.assert_array_equal(order[disc.get_emulated_ii_ptr()],
+                emulated_ii_ptr)
+
+    def test_sfc_sample_type(self):
+        """
+        Test the ``sfc`` sample type of
+        :meth:`bet.sampling.basicSampling.random_sample_set`.
+        """
+        domain = np.array([[-1.0, 1.0], [0.0, 2.0], [0.0, 1.0]])
+        np.random.seed(3)
+        input_set = bsam.random_sample_set('sfc', domain, 200)
+        values = input_set.get_values()
+        self.assertEqual(values.shape, (200, 3))
+        self.assertTrue(np.all(values >= domain[:, 0]))
+        self.assertTrue(np.all(values <= domain[:, 1]))
+        nptest.assert_array_equal(spaceFillingCurve.curve_order(values,
+            domain), np.arange(200))
+        nptest.assert_array_equal(input_set.get_values_local(),
+                np.array_split(values, comm.size)[comm.rank])
+        # random samples are not ordered along the curve
+        np.random.seed(3)
+        values = bsam.random_sample_set('random', domain, 200).get_values()
+        self.assertEqual(values.shape, (200, 3))
+        self.assertRaises(bsam.bad_object, bsam.random_sample_set, 'frog',
+                domain, 200)
+
+    def test_reorder_wrong_sample_set(self):
+        """
+        Test that only :class:`~bet.sample.voronoi_sample_set` objects can be
+        reordered.
+        """
+        rect_set = sample.rectangle_sample_set(2)
+        rect_set.setup([[0.5, 0.5], [1.0, 1.0]], [[0.0, 0.0], [0.5, 0.5]])
+        self.assertRaises(NotImplementedError, rect_set.reorder)
+        disc = sample.discretization(rect_set, rect_set.copy())
+        self.assertRaises(NotImplementedError, disc.reorder)
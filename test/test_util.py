@@ -46,6 +46,40 @@ def test_meshgrid_ndim():
         x = [[0, 1] for v in xrange(i+1)]
         yield compare_to_bin_rep, util.meshgrid_ndim(x)
 
+def test_meshgrid_ndim_large():
+    """
+    Tests :meth:`bet.util.meshgrid_ndim` for more than 10 vectors.
+    """
+    x = [[0, 1] for v in xrange(12)]
+    compare_to_bin_rep(util.meshgrid_ndim(x))
+
+def test_grid_index_to_point():
+    """
+    Tests :meth:`bet.util.grid_index_to_point`.
+    """
+    X = (np.linspace(0, 1, 3), np.array([-1.0, 2.0]), np.arange(4.0))
+    grid = np.meshgrid(*X, indexing='ij')
+    points = np.column_stack([g.ravel() for g in grid])
+    nptest.assert_array_equal(util.grid_index_to_point(X, np.arange(24)),
+            points)
+    nptest.assert_array_equal(util.grid_index_to_point(X, [23, 0, 5]),
+            points[[23, 0, 5]])
+    assert util.grid_shape(X) == (3, 2, 4)
+
+def test_grid_chunks():
+    """
+    Tests :meth:`bet.util.grid_chunks`.
+    """
+    X = (np.linspace(0, 1, 5), np.arange(3), np.arange(7))
+    points = util.meshgrid_ndim(X)
+    chunks = list(util.grid_chunks(X, chunk_size=10))
+    assert len(chunks) == 11
+    assert [first for (first, _) in chunks] == range(0, 105, 10)
+    nptest.assert_array_equal(np.vstack([c for (_, c) in chunks]), points)
+    chunks = list(util.grid_chunks(X, chunk_size=8, start=13, stop=40))
+    nptest.assert_array_equal(np.vstack([c for (_, c) in chunks]),
+            points[13:40])
+
 def test_get_global_values():
     """
     Tests :meth:`bet.util.get_global_values`.
@@ -82,6 +116,35 @@ def compare_get_global_values(i, provide_shape):
         recomposed_array = util.get_global_values(my_array)
     nptest.assert_array_equal(original_array, recomposed_array)
 
+def test_split_owners():
+    """
+    Tests :meth:`bet.util.split_owners`.
+    """
+    for num in [0, 1, comm.size*3+1]:
+        owners = util.split_owners(np.arange(num), num)
+        for rank, rows in enumerate(np.array_split(np.arange(num),
+            comm.size)):
+            nptest.assert_array_equal(owners[rows], rank)
+
+def test_redistribute():
+    """
+    Tests :meth:`bet.util.redistribute`.
+    """
+    # the last processor has no rows
+    num_local = 0 if comm.rank == comm.size-1 and comm.size > 1 else 5
+    rows = np.arange(num_local) + 5*comm.rank
+    array = None
+    if num_local > 0:
+        array = np.column_stack((rows, -rows)).astype(np.float64)
+    dest = (rows*7) % comm.size
+    received = util.redistribute(array, dest)
+    num_rows = 5*(comm.size-1) if comm.size > 1 else 5
+    expected = np.arange(num_rows)
+    expected = expected[(expected*7) % comm.size == comm.rank]
+    nptest.assert_array_equal(received, np.column_stack((expected,
+        -expected)))
+    assert util.redistribute(None, np.zeros((0,))) is None
+
 
 def test_fix_dimensions_vector():
     """